@@ -0,0 +1,22 @@
+"""Harness that runs the generated TestSprite cases in one shared browser."""
+from .auth import AuthCache, AuthHook
+from .har import HarHook
+from .loader import TestCase, discover
+from .netcapture import NetworkCaptureHook
+from .pool import ContextPool
+from .runner import CaseResult, ContextHook, SuiteRunner
+from .thirdparty import ThirdPartyHook
+
+__all__ = [
+    "AuthCache",
+    "AuthHook",
+    "CaseResult",
+    "ContextHook",
+    "ContextPool",
+    "HarHook",
+    "NetworkCaptureHook",
+    "SuiteRunner",
+    "TestCase",
+    "ThirdPartyHook",
+    "discover",
+]
@@ -0,0 +1,156 @@
+"""Run the TestSprite suite in one shared browser.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness                 # every case, default concurrency
+    python -m harness -j 8 TC003 TC004
+    python -m harness --as TC011=student
+    python -m harness --plan          # cases from testsprite_frontend_test_plan.json
+    python -m harness --warm 4        # hand out pre-navigated contexts
+    python -m harness --budgets strict --regression 0.3
+    python -m harness --blackbox 8    # keep screenshots/DOM/network of failed cases
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from . import budget, config
+from .auth import AuthHook
+from .blackbox import BlackBoxHook
+from .har import HarHook
+from .loader import discover
+from .netcapture import NetworkCaptureHook
+from .pool import ContextPool
+from .thirdparty import ThirdPartyHook
+from .runner import SuiteRunner, print_summary, write_results
+from .shard import durations_path, load_durations, record_durations
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m harness", description=__doc__.splitlines()[0])
+    parser.add_argument("cases", nargs="*", help="case ids to run (default: all)")
+    parser.add_argument("-j", "--concurrency", type=int, default=config.DEFAULT_CONCURRENCY,
+                        help="cases running at the same time (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=config.CASE_TIMEOUT,
+                        help="per-case timeout in seconds (default: %(default)s)")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--plan", action="store_true",
+                        help="run the cases of testsprite_frontend_test_plan.json instead of the scripts")
+    parser.add_argument("--keep-sleeps", action="store_true",
+                        help="run the fixed sleeps as generated instead of event-driven waits")
+    parser.add_argument("--as", dest="roles", action="append", default=[], metavar="CASE=ROLE",
+                        help="start CASE logged in as ROLE (repeatable)")
+    parser.add_argument("--no-network", action="store_true",
+                        help="skip per-request backend latency capture")
+    parser.add_argument("--restore-db", choices=["run", "case"],
+                        help="reset the database to the seeded template before the run, or after every case (-j 1)")
+    parser.add_argument("--third-party", choices=["off", "block", "stub"], default="stub",
+                        help="what to do with Maps/OAuth/Cloudinary/analytics requests (default: %(default)s)")
+    parser.add_argument("--allow-third-party", action="append", default=[], metavar="CASE=GROUP[,GROUP]",
+                        help="let these groups through for CASE (repeatable)")
+    parser.add_argument("--har", choices=["off", "record", "replay", "auto"], default="off",
+                        help="serve static and third-party responses from a recorded HAR (default: %(default)s)")
+    parser.add_argument("--warm", type=int, default=0, metavar="N",
+                        help="keep N contexts pre-navigated on the cases' entry pages (default: off)")
+    parser.add_argument("--blackbox", type=int, default=0, metavar="FRAMES",
+                        help="keep the last FRAMES screenshots and DOMs per context, written out for failed cases")
+    parser.add_argument("--blackbox-interval", type=float, default=3.0, metavar="SECONDS",
+                        help="background capture interval for --blackbox, 0 for page loads only (default: %(default)s)")
+    parser.add_argument("--budgets", choices=budget.MODES, default="on",
+                        help="on: over-budget cases fail, regressions warn; strict: both fail (default: %(default)s)")
+    parser.add_argument("--regression", type=float, default=budget.DEFAULT_REGRESSION,
+                        help="slowdown vs the median of recent runs that counts as a regression (default: %(default)s)")
+    parser.add_argument("--budget-history", type=Path, metavar="PATH",
+                        help="durations file to compare against (default: this run's durations.json)")
+    return parser.parse_args(argv)
+
+
+def _case_pairs(pairs, flag: str) -> dict:
+    values = {}
+    for pair in pairs:
+        case_id, sep, value = pair.partition("=")
+        if not sep or not value:
+            raise SystemExit(f"{flag} expects CASE=VALUE, got {pair!r}")
+        values[case_id.upper()] = value
+    return values
+
+
+def build_hooks(args: argparse.Namespace) -> list:
+    hooks = []
+    if not args.no_network:
+        hooks.append(NetworkCaptureHook())
+    if args.har != "off":
+        # Registered before the third-party routes so stub/block still take precedence.
+        hooks.append(HarHook(args.har))
+    if args.third_party != "off":
+        allow = _case_pairs(args.allow_third_party, "--allow-third-party")
+        hooks.append(ThirdPartyHook(args.third_party, {k: v.split(",") for k, v in allow.items()}))
+    if args.restore_db:
+        if args.restore_db == "case" and args.concurrency > 1:
+            raise SystemExit("--restore-db case resets the shared database; use it with -j 1")
+        from .snapshot import RestoreHook  # psycopg is only needed when restoring
+
+        hooks.append(RestoreHook(per_case=args.restore_db == "case"))
+    roles = _case_pairs(args.roles, "--as")
+    if roles:
+        hooks.append(AuthHook(roles))
+    if args.blackbox:
+        # Last, so the timing report includes what the other hooks measured.
+        hooks.append(BlackBoxHook(args.blackbox, args.blackbox_interval))
+    return hooks
+
+
+def build_pool(args: argparse.Namespace):
+    if not args.warm:
+        return None
+    if args.restore_db == "case":
+        raise SystemExit("--warm pages would show data from before the per-case restore; drop one of them")
+    if args.har != "off":
+        # route_from_har cannot be undone on a pooled context, and the warm page loads before it.
+        raise SystemExit("--warm pages load their assets before --har routing applies; drop one of them")
+    # Cases with third-party exceptions need their own routing from the first request.
+    exclude = _case_pairs(args.allow_third_party, "--allow-third-party")
+    return ContextPool(args.warm, third_party=args.third_party, exclude=exclude)
+
+
+async def _main(args: argparse.Namespace) -> int:
+    if args.plan:
+        from .plan import load_plan  # the step library needs httpx for API-side steps
+
+        cases = load_plan(args.cases)
+    else:
+        cases = discover(args.cases, rewrite_sleeps=not args.keep_sleeps)
+    if not cases:
+        print("no matching cases", file=sys.stderr)
+        return 2
+    history = durations_path(args.plan)
+    runner = SuiteRunner(
+        concurrency=args.concurrency,
+        case_timeout=args.timeout,
+        headless=not args.headed,
+        hooks=build_hooks(args),
+        pool=build_pool(args),
+        gate=budget.Gate(
+            load_durations(args.budget_history or history), args.plan, args.budgets, args.regression
+        ),
+    )
+    started = time.perf_counter()
+    results = await runner.run(cases)
+    wall_time = time.perf_counter() - started
+    write_results(results, wall_time, config.OUTPUT_DIR / "results.json")
+    record_durations(results, history)
+    print_summary(results, wall_time)
+    budget.print_warnings(results)
+    return 0 if all(r.ok for r in results) else 1
+
+
+def main(argv=None) -> int:
+    return asyncio.run(_main(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
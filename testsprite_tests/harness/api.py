@@ -0,0 +1,31 @@
+"""Pooled async HTTP access to the Express backend.
+
+The client itself lives in :mod:`surfapi`; this module only points it at
+the harness's backend. One ``httpx.AsyncClient`` with keep-alive
+connections is shared by every call, so bulk fixtures pay the TCP
+handshake once per connection instead of once per request.
+"""
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+from surfapi import DEFAULT_POOL_SIZE, ApiError, Client
+from surfapi.client import Hook
+
+from . import config
+
+__all__ = ["DEFAULT_POOL_SIZE", "ApiError", "BackendApi"]
+
+
+class BackendApi(Client):
+    """:class:`surfapi.Client` for ``config.API_URL``; ``async with BackendApi() as api: ...``."""
+
+    def __init__(
+        self,
+        base_url: str = config.API_URL,
+        token: Optional[str] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = 30.0,
+        hooks: Sequence[Hook] = (),
+    ) -> None:
+        super().__init__(base_url, token=token, pool_size=pool_size, timeout=timeout, hooks=hooks)
@@ -0,0 +1,203 @@
+"""Per-role authenticated storage state, logged in once per run.
+
+The frontend session is a NextAuth JWT cookie whose credentials provider
+calls ``POST /auth/login`` on the backend. Logging in through NextAuth's
+HTTP endpoints (csrf + ``callback/credentials``) yields the same cookie the
+login form would, without the UI round trips. The resulting Playwright
+``storage_state`` is kept on disk per role and injected into new contexts.
+
+The cookie stays valid for 30 days, and NextAuth renews the backend
+token inside it by itself once that token is 24 hours old. Steps that call
+the backend directly need a token of their own, and NextAuth does not
+expose its refresh token. So each login also runs ``POST /auth/login`` on
+the backend. The resulting token and refresh token are kept with the
+role's state. When that token is about to expire it is renewed through
+``POST /auth/refresh`` and saved back, and the cookie is left alone. The
+role only logs in again when the refresh is rejected.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import time
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from playwright import async_api
+
+from . import config
+from .loader import TestCase
+from .runner import ContextHook, SuiteRunner
+
+# Refresh this long before the backend token actually expires.
+EXPIRY_SKEW = 120.0
+
+
+class AuthError(RuntimeError):
+    pass
+
+
+@dataclass
+class RoleState:
+    role: str
+    email: str
+    storage_state: str
+    backend_token: Optional[str]
+    expires_at: float
+    refresh_token: Optional[str] = None
+
+    def fresh(self, skew: float = EXPIRY_SKEW) -> bool:
+        return bool(self.backend_token) and time.time() < self.expires_at - skew
+
+
+def token_expiry(token: Optional[str]) -> float:
+    """``exp`` claim of a JWT, 0 when it cannot be read."""
+    if not token or token.count(".") != 2:
+        return 0.0
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    try:
+        return float(json.loads(base64.urlsafe_b64decode(payload)).get("exp", 0))
+    except ValueError:
+        return 0.0
+
+
+class AuthCache:
+    """Logs each role in at most once and keeps its state fresh."""
+
+    def __init__(
+        self,
+        playwright: async_api.Playwright,
+        directory: Path = config.OUTPUT_DIR / "auth",
+        credentials: Mapping[str, Tuple[str, str]] = config.ROLE_CREDENTIALS,
+    ) -> None:
+        self._pw = playwright
+        self.directory = directory
+        self.credentials = credentials
+        self.logins = 0
+        self.refreshes = 0
+        self._states: Dict[str, RoleState] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def state(self, role: str) -> RoleState:
+        if role not in self.credentials:
+            raise AuthError(f"no credentials configured for role {role!r}")
+        lock = self._locks.setdefault(role, asyncio.Lock())
+        async with lock:
+            state = self._states.get(role) or self._load(role)
+            if state is None:
+                state = await self._login(role)
+            elif not state.fresh():
+                state = await self._refresh(state) or await self._login(role)
+            self._states[role] = state
+            return state
+
+    async def storage_state(self, role: str) -> str:
+        return (await self.state(role)).storage_state
+
+    async def backend_token(self, role: str) -> str:
+        state = await self.state(role)
+        if not state.backend_token:
+            raise AuthError(f"session for {role!r} carries no backend token")
+        return state.backend_token
+
+    def _paths(self, role: str) -> Tuple[Path, Path]:
+        return self.directory / f"{role}.json", self.directory / f"{role}.meta.json"
+
+    def _load(self, role: str) -> Optional[RoleState]:
+        storage, meta = self._paths(role)
+        if not (storage.exists() and meta.exists()):
+            return None
+        state = RoleState(**json.loads(meta.read_text(encoding="utf-8")))
+        return state if state.email == self.credentials[role][0] else None
+
+    def _save(self, state: RoleState) -> RoleState:
+        _, meta = self._paths(state.role)
+        meta.write_text(json.dumps(asdict(state), indent=2), encoding="utf-8")
+        return state
+
+    async def _backend(self, path: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """``POST`` to the backend in a throwaway context, so no refresh cookie is kept."""
+        request = await self._pw.request.new_context(base_url=config.API_URL)
+        try:
+            response = await request.post(path, data=data)
+            return await response.json() if response.ok else None
+        finally:
+            await request.dispose()
+
+    async def _login(self, role: str) -> RoleState:
+        email, password = self.credentials[role]
+        request = await self._pw.request.new_context(base_url=config.FRONTEND_URL)
+        try:
+            csrf = await (await request.get("/api/auth/csrf")).json()
+            await request.post(
+                "/api/auth/callback/credentials",
+                form={
+                    "csrfToken": csrf["csrfToken"],
+                    "email": email,
+                    "password": password,
+                    "json": "true",
+                },
+            )
+            session = await (await request.get("/api/auth/session")).json()
+            if not session or not session.get("user"):
+                raise AuthError(f"login as {role!r} ({email}) was rejected")
+            storage, _ = self._paths(role)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            await request.storage_state(path=storage)
+        finally:
+            await request.dispose()
+        backend = await self._backend("/auth/login", {"email": email, "password": password}) or {}
+        token = backend.get("token") or session.get("backendToken")
+        self.logins += 1
+        return self._save(RoleState(
+            role=role,
+            email=email,
+            storage_state=str(storage),
+            backend_token=token,
+            expires_at=token_expiry(token),
+            refresh_token=backend.get("refreshToken"),
+        ))
+
+    async def _refresh(self, state: RoleState) -> Optional[RoleState]:
+        """New backend token from ``POST /auth/refresh``; None when the refresh token is missing or rejected."""
+        if not state.refresh_token:
+            return None
+        body = await self._backend("/auth/refresh", {"refreshToken": state.refresh_token})
+        if not body or not body.get("token"):
+            return None
+        self.refreshes += 1
+        return self._save(replace(
+            state,
+            backend_token=body["token"],
+            expires_at=token_expiry(body["token"]),
+            refresh_token=body.get("refreshToken") or state.refresh_token,
+        ))
+
+
+class AuthHook(ContextHook):
+    """Starts the cases listed in ``case_roles`` already logged in."""
+
+    def __init__(self, case_roles: Mapping[str, str]) -> None:
+        self.case_roles = {k.upper(): v for k, v in case_roles.items()}
+        self.cache: Optional[AuthCache] = None
+
+    async def start(self, runner: SuiteRunner) -> None:
+        self.cache = AuthCache(runner.playwright)
+
+    async def context_options(self, case: TestCase) -> Dict[str, Any]:
+        role = self.case_roles.get(case.case_id)
+        if not role or self.cache is None:
+            return {}
+        return {"storage_state": await self.cache.storage_state(role)}
+
+    async def on_finish(self, case: TestCase, context: Any, result: Any) -> None:
+        role = self.case_roles.get(case.case_id)
+        if role:
+            result.extras["auth"] = {"role": role}
+
+    async def stop(self, runner: SuiteRunner) -> None:
+        if self.cache:
+            print(f"auth: {self.cache.logins} login(s), {self.cache.refreshes} refresh(es)")
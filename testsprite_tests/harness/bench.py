@@ -0,0 +1,340 @@
+"""Latency benchmark for the read endpoints of every router in ``server.ts``.
+
+Each endpoint is driven as every role that may call it (anonymous,
+STUDENT, INSTRUCTOR, SCHOOL_ADMIN, ADMIN), with a mix of query strings
+like the ones the frontend sends (``GET /classes?q=&date=&level=&locality=``).
+Every (endpoint, role) cell gets a few warm-up calls, then ``--requests``
+calls from ``--concurrency`` closed-loop workers. The report holds
+p50/p95/p99, throughput, response size and status counts per cell.
+
+With ``--baseline`` the run is compared to a previous report: a cell
+whose p50 or p95 grew, or whose throughput dropped, by more than
+``--tolerance`` fails the run, as does any non-2xx response.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.bench
+    python -m harness.bench --routes /classes,/reservations --roles student,anonymous
+    cp tmp/harness/bench.json tmp/harness/bench.baseline.json   # after a good run
+    python -m harness.bench --baseline tmp/harness/bench.baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from string import Formatter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from surfapi import timing_of
+
+from . import config
+from .api import ApiError, BackendApi
+from .stats import summarize
+
+ANONYMOUS = "anonymous"
+ROLES = (ANONYMOUS, "student", "instructor", "school_admin", "admin")
+_AUTHED = ROLES[1:]
+_STAFF = ("school_admin", "admin")
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """``route`` in Express notation; ``:name`` segments come from the discovered ids.
+
+    Query values may use ``{today}``, ``{date}`` (a day in the next four
+    weeks, drawn per call), ``{month}`` (today + 30 days) and any id name.
+    """
+
+    route: str
+    roles: Tuple[str, ...]
+    queries: Tuple[Dict[str, str], ...] = ({},)
+
+    @property
+    def name(self) -> str:
+        return "GET " + self.route
+
+
+CLASS_QUERIES = (
+    {},
+    {"q": "surf"},
+    {"q": "clase"},
+    {"date": "{date}"},
+    {"level": "BEGINNER"},
+    {"locality": "Miraflores"},
+    {"locality": "Lima", "level": "INTERMEDIATE", "date": "{date}"},
+    {"type": "KIDS"},
+    {"minPrice": "50", "maxPrice": "150"},
+    {"participants": "2"},
+    {"schoolId": "{school_id}"},
+)
+CALENDAR_QUERIES = ({}, {"start": "{today}", "end": "{month}"})
+PAGE_QUERIES = ({}, {"limit": "20", "offset": "0"}, {"limit": "50", "offset": "20"})
+
+# Mount order from backend/src/server.ts. Left out: /notes/test (debug
+# route) and /payments/providers, which /payments/:id shadows.
+ENDPOINTS = (
+    Endpoint("/classes", ROLES, CLASS_QUERIES),
+    Endpoint("/classes/:class_id", (ANONYMOUS, "student")),
+    Endpoint("/classes/:class_id/calendar", (ANONYMOUS, "student"), CALENDAR_QUERIES),
+    Endpoint("/classes/calendar/all", _STAFF, CALENDAR_QUERIES),
+    Endpoint("/users/profile", _AUTHED),
+    Endpoint("/users", ("admin",)),
+    Endpoint("/users/:user_id", ("admin",)),
+    Endpoint("/reservations", _AUTHED),
+    Endpoint("/reservations/all", ("admin",)),
+    Endpoint("/reservations/:reservation_id", ("student", "admin")),
+    Endpoint("/payments", _AUTHED, ({}, {"reservationId": "{reservation_id}"})),
+    Endpoint("/payments/:payment_id", ("admin",)),
+    Endpoint("/schools", (ANONYMOUS,), ({}, {"status": "APPROVED"})),
+    Endpoint("/schools/reviews/featured", (ANONYMOUS,)),
+    Endpoint("/schools/my-school", ("school_admin",)),
+    Endpoint("/schools/:school_id", (ANONYMOUS,)),
+    Endpoint("/schools/:school_id/classes", (ANONYMOUS,)),
+    Endpoint("/schools/:school_id/reviews", (ANONYMOUS,)),
+    Endpoint("/instructors", (ANONYMOUS,) + _STAFF, ({}, {"schoolId": "{school_id}"}, {"isActive": "true"})),
+    Endpoint("/instructors/:instructor_id", _STAFF),
+    Endpoint("/instructors/:instructor_id/classes", _STAFF),
+    Endpoint("/instructor/classes", ("instructor",)),
+    Endpoint("/instructor/profile", ("instructor",)),
+    Endpoint("/instructor/students", ("instructor",)),
+    Endpoint("/instructor/earnings", ("instructor",)),
+    Endpoint("/students", _STAFF),
+    Endpoint("/students/:student_id", _STAFF),
+    Endpoint("/stats/dashboard", _AUTHED),
+    Endpoint("/beaches", (ANONYMOUS,), ({}, {"active": "true"})),
+    Endpoint("/beaches/:beach_id", (ANONYMOUS,)),
+    Endpoint("/notes", _STAFF, ({}, {"date": "{date}"})),
+    Endpoint("/discount-codes", _STAFF),
+    Endpoint("/discount-codes/:discount_code_id", ("admin",)),
+    Endpoint("/images/library", _STAFF),
+    Endpoint("/upload", (ANONYMOUS,)),
+    Endpoint("/notifications", _AUTHED, PAGE_QUERIES),
+    Endpoint("/notifications/all", ("admin",), PAGE_QUERIES),
+    Endpoint("/notifications/unread-count", _AUTHED),
+    Endpoint("/products/public", (ANONYMOUS,)),
+    Endpoint("/products", ("admin",)),
+    Endpoint("/products/school/:school_id", (ANONYMOUS,), ({}, {"activeOnly": "true"})),
+)
+
+# Where each id placeholder is discovered: (role, list endpoint).
+ID_SOURCES = {
+    "class_id": ("admin", "/classes"),
+    "user_id": ("admin", "/users"),
+    "reservation_id": ("student", "/reservations"),
+    "payment_id": ("admin", "/payments"),
+    "school_id": (ANONYMOUS, "/schools"),
+    "instructor_id": ("admin", "/instructors"),
+    "student_id": ("admin", "/students"),
+    "beach_id": (ANONYMOUS, "/beaches"),
+    "discount_code_id": ("admin", "/discount-codes"),
+}
+
+
+def _first_id(body: Any) -> Optional[int]:
+    """Id of the first item of a list response, bare or wrapped in an object."""
+    if isinstance(body, dict):
+        body = next((v for v in body.values() if isinstance(v, list)), [])
+    if isinstance(body, list) and body and isinstance(body[0], dict):
+        return body[0].get("id")
+    return None
+
+
+def missing_id(endpoint: Endpoint, ids: Dict[str, Any]) -> Optional[str]:
+    """The first id placeholder of ``endpoint`` (path or query mix) that was not discovered."""
+    names = [s[1:] for s in endpoint.route.split("/") if s.startswith(":")]
+    for query in endpoint.queries:
+        names.extend(f for _, f, _, _ in Formatter().parse("".join(query.values())) if f in ID_SOURCES)
+    return next((name for name in names if ids.get(name) is None), None)
+
+
+def _fill(template: str, values: Dict[str, Any]) -> str:
+    return template.format(**values) if "{" in template else template
+
+
+def resolve(endpoint: Endpoint, ids: Dict[str, Any]) -> Optional[str]:
+    """Concrete path, or ``None`` when an id it needs was not discovered."""
+    parts = []
+    for segment in endpoint.route.split("/"):
+        if segment.startswith(":"):
+            value = ids.get(segment[1:])
+            if value is None:
+                return None
+            segment = str(value)
+        parts.append(segment)
+    return "/".join(parts)
+
+
+class Bench:
+    def __init__(self, api: BackendApi, tokens: Dict[str, str], seed: int = 1) -> None:
+        self.api = api
+        self.tokens = tokens
+        self.rng = random.Random(seed)
+        self.ids: Dict[str, Any] = {}
+
+    async def discover(self) -> None:
+        for name, (role, path) in ID_SOURCES.items():
+            # A role left out by --roles is not logged in: try the ones that are.
+            tokens = [self.tokens[role]] if role in self.tokens else list(self.tokens.values())
+            self.ids[name] = None
+            for token in tokens:
+                try:
+                    self.ids[name] = _first_id(await self.api.get(path, token=token))
+                except ApiError:
+                    continue
+                if self.ids[name] is not None:
+                    break
+
+    def _params(self, endpoint: Endpoint, n: int) -> Dict[str, str]:
+        today = date.today()
+        values = {
+            **{k: v for k, v in self.ids.items() if v is not None},
+            "today": today.isoformat(),
+            "month": (today + timedelta(days=30)).isoformat(),
+            "date": (today + timedelta(days=self.rng.randrange(28))).isoformat(),
+        }
+        # Round-robin, so every variant of the mix is exercised.
+        query = endpoint.queries[n % len(endpoint.queries)]
+        return {k: _fill(v, values) for k, v in query.items()}
+
+    async def cell(
+        self, endpoint: Endpoint, role: str, path: str, requests: int, concurrency: int, warmup: int
+    ) -> Dict[str, Any]:
+        token = self.tokens[role]
+        latencies: List[float] = []
+        sizes: List[int] = []
+        statuses: Counter = Counter()
+        counter = iter(range(requests))
+
+        async def call(n: int) -> None:
+            response = await self.api.send("GET", path, params=self._params(endpoint, n), token=token)
+            latencies.append(timing_of(response).elapsed_ms)
+            sizes.append(len(response.content))
+            statuses[response.status_code] += 1
+
+        async def worker() -> None:
+            for n in counter:
+                await call(n)
+
+        for n in range(warmup):
+            await self.api.send("GET", path, params=self._params(endpoint, n), token=token)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return {
+            "path": path,
+            "latency_ms": summarize(latencies),
+            "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "bytes": {"mean": round(sum(sizes) / len(sizes)) if sizes else 0, "max": max(sizes, default=0)},
+            "statuses": {str(k): v for k, v in sorted(statuses.items())},
+            "errors": sum(v for k, v in statuses.items() if not 200 <= k < 300),
+        }
+
+
+async def login_all(api: BackendApi, roles: Sequence[str]) -> Dict[str, str]:
+    tokens = {ANONYMOUS: ""}
+    for role in roles:
+        if role != ANONYMOUS:
+            email, password = config.ROLE_CREDENTIALS[role]
+            tokens[role] = (await api.login(email, password))["token"]
+    return tokens
+
+
+def regressions(
+    report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta_ms: float
+) -> List[str]:
+    """Cells that got slower (beyond tolerance and ``min_delta_ms``), lost throughput or erred."""
+    found = []
+    for name, roles in report["endpoints"].items():
+        for role, cell in roles.items():
+            label = f"{name} as {role}"
+            if cell["errors"]:
+                found.append(f"{label}: {cell['errors']} non-2xx responses {cell['statuses']}")
+            previous = baseline.get(name, {}).get(role)
+            if not previous:
+                continue
+            for q in ("p50", "p95"):
+                now, before = cell["latency_ms"].get(q, 0), previous["latency_ms"].get(q, 0)
+                if before and now > before * (1 + tolerance) and now - before >= min_delta_ms:
+                    found.append(f"{label}: {q} {now:.1f}ms regressed >{tolerance:.0%} from {before:.1f}ms")
+            if previous["rps"] and cell["rps"] < previous["rps"] * (1 - tolerance):
+                found.append(f"{label}: {cell['rps']:.1f} req/s dropped >{tolerance:.0%} from {previous['rps']:.1f}")
+    return found
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    roles = [r for r in ROLES if not args.roles or r in args.roles.split(",")]
+    prefixes = args.routes.split(",") if args.routes else None
+    report: Dict[str, Any] = {
+        "backend": config.API_URL,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "endpoints": {},
+        "skipped": {},
+    }
+    async with BackendApi(pool_size=max(args.concurrency, 8)) as api:
+        bench = Bench(api, await login_all(api, roles), args.seed)
+        await bench.discover()
+        report["ids"] = bench.ids
+        for endpoint in ENDPOINTS:
+            if prefixes and not any(endpoint.route.startswith(p) for p in prefixes):
+                continue
+            # A variant sent without its id would measure another request than the cell is named for.
+            missing = missing_id(endpoint, bench.ids)
+            if missing is not None:
+                report["skipped"][endpoint.name] = f"no {missing} to fill in"
+                continue
+            path = resolve(endpoint, bench.ids)
+            for role in endpoint.roles:
+                if role not in roles:
+                    continue
+                cell = await bench.cell(endpoint, role, path, args.requests, args.concurrency, args.warmup)
+                report["endpoints"].setdefault(endpoint.name, {})[role] = cell
+                latency = cell["latency_ms"]
+                print(
+                    f"{endpoint.name:<42} {role:<12} p50 {latency.get('p50', 0):7.1f}  p95 {latency.get('p95', 0):7.1f}"
+                    f"  p99 {latency.get('p99', 0):7.1f}ms  {cell['rps']:7.1f} req/s  {cell['bytes']['mean']:>8}B"
+                    + (f"  !! {cell['statuses']}" if cell["errors"] else "")
+                )
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.bench", description="Read endpoint latency benchmark.")
+    parser.add_argument("--routes", help="comma-separated route prefixes (default: all)")
+    parser.add_argument("--roles", help=f"comma-separated roles (default: {','.join(ROLES)})")
+    parser.add_argument("--requests", type=int, default=100, help="measured calls per endpoint and role")
+    parser.add_argument("--concurrency", type=int, default=4, help="closed-loop workers per cell")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured calls per cell")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the query mix")
+    parser.add_argument("--baseline", help="previous bench report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression vs baseline (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="ignore latency regressions smaller than this, however large in relative terms")
+    parser.add_argument("--output", default=str(config.OUTPUT_DIR / "bench.json"))
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    baseline = {}
+    if args.baseline and Path(args.baseline).exists():
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["endpoints"]
+    report["regressions"] = regressions(report, baseline, args.tolerance, args.min_delta_ms)
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    for name, reason in report["skipped"].items():
+        print(f"skipped {name}: {reason}")
+    for problem in report["regressions"]:
+        print(f"!! {problem}")
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Failure-only forensics: a bounded in-memory ring per context, written out when a case fails.
+
+Playwright tracing on every run slows each step and leaves a large trace
+behind for every passing case. :class:`BlackBoxHook` instead keeps, per
+context, only:
+
+- the last ``frames`` screenshots (JPEG) with the page's DOM, taken after
+  every page load and every ``interval`` seconds in the background;
+- the last :data:`MAX_EVENTS` network events (request, response, failure,
+  with offsets from the start of the case) and :data:`MAX_CONSOLE` console
+  messages and page errors.
+
+Nothing touches the disk while a case passes. When it fails, the hook
+takes one last screenshot and DOM of every open page (the state at the
+moment of failure) and writes ``failures/<case>/`` with the ring, the
+case's error and its timing report (duration, waits, plan steps, the
+backend latency report of :mod:`harness.netcapture` when enabled). Time
+budgets are judged before the hooks finish a case, so a case failed by
+:mod:`harness.budget` as too slow gets its bundle too.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness --blackbox 8               # 8 frames per context
+    python -m harness --blackbox 20 --blackbox-interval 1 TC006
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import shutil
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from playwright import async_api
+
+from . import config
+from .loader import TestCase
+from .runner import CaseResult, ContextHook, SuiteRunner
+
+MAX_EVENTS = 300
+MAX_CONSOLE = 100
+JPEG_QUALITY = 50
+CAPTURE_TIMEOUT_MS = 2000
+
+
+@dataclass
+class Frame:
+    at: float  # seconds since the context opened
+    reason: str
+    url: str
+    screenshot: Optional[bytes]
+    dom: Optional[str]
+
+
+async def capture(page: async_api.Page, at: float, reason: str) -> Optional[Frame]:
+    try:
+        screenshot = await page.screenshot(type="jpeg", quality=JPEG_QUALITY, timeout=CAPTURE_TIMEOUT_MS)
+    except async_api.Error:
+        screenshot = None
+    try:
+        dom = await page.content()
+    except async_api.Error:
+        dom = None
+    if screenshot is None and dom is None:
+        return None  # closed or mid-navigation
+    return Frame(round(at, 3), reason, page.url, screenshot, dom)
+
+
+class _Ring:
+    """What one context has seen recently."""
+
+    def __init__(self, context: async_api.BrowserContext, frames: int, interval: float) -> None:
+        self.context = context
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.frames: Deque[Frame] = deque(maxlen=frames)
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=MAX_EVENTS)
+        self.console: Deque[Dict[str, Any]] = deque(maxlen=MAX_CONSOLE)
+        self.dropped = {"frames": 0, "events": 0, "console": 0}
+        self._handlers: List[Tuple[Any, str, Callable]] = []
+        self._tasks: set = set()
+        self._ticker: Optional[asyncio.Task] = None
+
+    def _now(self) -> float:
+        return round(time.perf_counter() - self.started, 3)
+
+    def _push(self, ring: Deque, kind: str, item: Any) -> None:
+        if len(ring) == ring.maxlen:
+            self.dropped[kind] += 1
+        ring.append(item)
+
+    def _on(self, emitter: Any, event: str, handler: Callable) -> None:
+        emitter.on(event, handler)
+        self._handlers.append((emitter, event, handler))
+
+    def start(self) -> None:
+        ctx = self.context
+        self._on(ctx, "request", lambda r: self._push(self.events, "events", {
+            "at": self._now(), "event": "request", "method": r.method, "url": r.url, "type": r.resource_type,
+        }))
+        self._on(ctx, "response", lambda r: self._push(self.events, "events", {
+            "at": self._now(), "event": "response", "method": r.request.method, "url": r.url, "status": r.status,
+        }))
+        self._on(ctx, "requestfailed", lambda r: self._push(self.events, "events", {
+            "at": self._now(), "event": "failed", "method": r.method, "url": r.url, "failure": r.failure,
+        }))
+        self._on(ctx, "page", self._watch)
+        for page in ctx.pages:
+            self._watch(page)
+        if self.interval > 0:
+            self._ticker = asyncio.ensure_future(self._tick())
+
+    def _watch(self, page: async_api.Page) -> None:
+        self._on(page, "load", lambda p: self._snap(p, "load"))
+        self._on(page, "console", lambda m: self._push(self.console, "console", {
+            "at": self._now(), "type": m.type, "text": m.text,
+        }))
+        self._on(page, "pageerror", lambda e: self._push(self.console, "console", {
+            "at": self._now(), "type": "pageerror", "text": str(e),
+        }))
+
+    def _snap(self, page: async_api.Page, reason: str) -> None:
+        task = asyncio.ensure_future(self.snapshot(page, reason))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def snapshot(self, page: async_api.Page, reason: str) -> None:
+        frame = await capture(page, self._now(), reason)
+        if frame is not None:
+            self._push(self.frames, "frames", frame)
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            for page in list(self.context.pages):
+                await self.snapshot(page, "interval")
+
+    async def stop(self) -> None:
+        """Detach from the context (pooled contexts outlive the case) and let captures in flight land."""
+        if self._ticker is not None:
+            self._ticker.cancel()
+            await asyncio.gather(self._ticker, return_exceptions=True)
+        for emitter, event, handler in self._handlers:
+            emitter.remove_listener(event, handler)
+        self._handlers.clear()
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def write(self, directory: Path) -> Dict[str, Any]:
+        directory.mkdir(parents=True, exist_ok=True)
+        frames = []
+        for n, frame in enumerate(self.frames, 1):
+            stem = f"{n:02d}-{frame.reason}"
+            entry = {"at": frame.at, "reason": frame.reason, "url": frame.url}
+            if frame.screenshot is not None:
+                (directory / f"{stem}.jpg").write_bytes(frame.screenshot)
+                entry["screenshot"] = f"{stem}.jpg"
+            if frame.dom is not None:
+                (directory / f"{stem}.html").write_text(frame.dom, encoding="utf-8")
+                entry["dom"] = f"{stem}.html"
+            frames.append(entry)
+        (directory / "network.json").write_text(json.dumps(list(self.events), indent=2), encoding="utf-8")
+        (directory / "console.json").write_text(
+            json.dumps(list(self.console), indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        return {"frames": frames, "events": len(self.events), "console": len(self.console), "dropped": self.dropped}
+
+
+class BlackBoxHook(ContextHook):
+    def __init__(self, frames: int = 8, interval: float = 3.0, output_dir: Path = config.OUTPUT_DIR) -> None:
+        self.frames = frames
+        self.interval = interval
+        self.output_dir = output_dir / "failures"
+        self._rings: Dict[int, _Ring] = {}
+        self._contexts: Dict[str, int] = {}
+
+    async def start(self, runner: SuiteRunner) -> None:
+        shutil.rmtree(self.output_dir, ignore_errors=True)  # bundles of an earlier run would mislead
+
+    async def on_context(self, case: TestCase, context: async_api.BrowserContext) -> None:
+        ring = _Ring(context, self.frames, self.interval)
+        ring.start()
+        self._rings[id(context)] = ring
+
+    async def on_finish(
+        self, case: TestCase, context: async_api.BrowserContext, result: CaseResult
+    ) -> None:
+        ring = self._rings.pop(id(context), None)
+        if ring is None:
+            return
+        if not result.ok:
+            for page in list(context.pages):
+                await ring.snapshot(page, result.status)
+        await ring.stop()
+        if result.ok:
+            return
+        index = self._contexts[case.case_id] = self._contexts.get(case.case_id, 0) + 1
+        case_dir = self.output_dir / case.case_id
+        manifest = ring.write(case_dir / f"context-{index}")
+        timing = {
+            "case": case.case_id,
+            "title": case.title,
+            "status": result.status,
+            "error": result.error,
+            "duration": result.duration,
+            **{k: result.extras[k] for k in ("waits", "steps", "network") if k in result.extras},
+        }
+        (case_dir / "timing.json").write_text(json.dumps(timing, indent=2, ensure_ascii=False), encoding="utf-8")
+        (case_dir / f"context-{index}" / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        result.extras["blackbox"] = str(case_dir)
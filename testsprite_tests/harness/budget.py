@@ -0,0 +1,143 @@
+"""Wall-clock budgets for cases, and gating on duration regressions.
+
+A case passes only if it is also fast enough:
+
+- it must finish within its budget (:data:`SCRIPT_BUDGETS` for the
+  generated scripts, :data:`PLAN_BUDGETS` for plan cases). Plan cases may
+  also budget individual steps, by step number;
+- it must not take more than ``--regression`` (50% by default) longer than
+  the median of its recent runs in ``durations.json`` (see
+  :mod:`harness.shard`). At least :data:`MIN_RUNS` earlier runs are needed,
+  and the slowdown must exceed :data:`MIN_DELTA` seconds, so short cases
+  are not gated on jitter.
+
+With ``--budgets on`` (the default) budget breaches fail the case and
+regressions only warn; ``--budgets warn`` downgrades both to warnings and
+``--budgets strict`` makes regressions fail too. Only passing cases are
+checked: a case that already failed keeps its own error. The runner
+checks each case as it ends, before the hooks finish it (so a case failed
+as too slow still gets its forensics, see :mod:`harness.blackbox`) and
+before this run's durations are recorded, so a slow run is compared with
+the history it is about to join.
+"""
+from __future__ import annotations
+
+import statistics
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from .runner import FAILED, CaseResult
+
+MIN_RUNS = 3
+MIN_DELTA = 2.0
+DEFAULT_REGRESSION = 0.5
+MODES = ("on", "warn", "strict", "off")
+
+
+@dataclass
+class Budget:
+    seconds: Optional[float] = None
+    steps: Dict[int, float] = field(default_factory=dict)
+
+
+# Booking, login and dashboard flows. Roughly three times a clean local run,
+# so a budget breach means something is really wrong, not a busy machine.
+SCRIPT_BUDGETS: Dict[str, Budget] = {
+    "TC002": Budget(45),   # login and token refresh
+    "TC003": Budget(90),   # guest checkout
+    "TC005": Budget(60),   # class browsing and session selection
+    "TC006": Budget(90),   # multi-step booking
+    "TC007": Budget(90),   # booking state across navigation
+    "TC008": Budget(120),  # reservation create/update/cancel
+    "TC011": Budget(90),   # dashboards per role
+}
+
+PLAN_BUDGETS: Dict[str, Budget] = {
+    # Multi-step booking: login, modal, session, participants, discount, submit, confirmation, list.
+    "TC002": Budget(90, steps={1: 15, 2: 15, 6: 15}),
+    "TC003": Budget(90),
+    "TC009": Budget(120, steps={1: 15}),
+    "TC010": Budget(90, steps={1: 15}),
+}
+
+
+@dataclass
+class Violation:
+    case_id: str
+    kind: str  # "budget", "step" or "regression"
+    message: str
+    fatal: bool
+
+
+def check(
+    result: CaseResult,
+    budget: Optional[Budget],
+    runs: Sequence[float],
+    regression: float = DEFAULT_REGRESSION,
+) -> List[Violation]:
+    """What is wrong with ``result``'s timing; ``fatal`` as ``--budgets on`` has it."""
+    found = []
+    if budget is not None and budget.seconds is not None and result.duration > budget.seconds:
+        found.append(Violation(
+            result.case_id, "budget", f"took {result.duration:.1f}s, budget {budget.seconds:g}s", True
+        ))
+    for step in result.extras.get("steps", []):
+        limit = budget.steps.get(step["number"]) if budget is not None else None
+        if limit is not None and step["duration"] > limit:
+            found.append(Violation(
+                result.case_id, "step",
+                f"step {step['number']} ({step['description']}) took {step['duration']:.1f}s, budget {limit:g}s",
+                True,
+            ))
+    if len(runs) >= MIN_RUNS:
+        median = statistics.median(runs)
+        if result.duration > median * (1 + regression) and result.duration - median > MIN_DELTA:
+            found.append(Violation(
+                result.case_id, "regression",
+                f"took {result.duration:.1f}s, {result.duration / median - 1:.0%} over its median of "
+                f"{median:.1f}s (last {len(runs)} runs)",
+                False,
+            ))
+    return found
+
+
+class Gate:
+    """Checks one finished case at a time; ``SuiteRunner(gate=Gate(...))``."""
+
+    def __init__(
+        self,
+        history: Dict[str, List[float]],
+        plan: bool = False,
+        mode: str = "on",
+        regression: float = DEFAULT_REGRESSION,
+    ) -> None:
+        self.history = history
+        self.budgets = PLAN_BUDGETS if plan else SCRIPT_BUDGETS
+        self.mode = mode
+        self.regression = regression
+
+    def __call__(self, result: CaseResult) -> List[Violation]:
+        """Fail ``result`` if a violation is fatal; violations are also kept in ``result.extras["budget"]``."""
+        if self.mode == "off" or not result.ok:
+            return []
+        violations = check(
+            result, self.budgets.get(result.case_id), self.history.get(result.case_id, []), self.regression
+        )
+        for v in violations:
+            v.fatal = self.mode == "strict" or (self.mode == "on" and v.fatal)
+        fatal = [v.message for v in violations if v.fatal]
+        if fatal:
+            result.status, result.error = FAILED, "too slow: " + "; ".join(fatal)
+        if violations:
+            result.extras["budget"] = [{"kind": v.kind, "message": v.message, "fatal": v.fatal} for v in violations]
+        return violations
+
+
+def print_warnings(results: Sequence[CaseResult]) -> None:
+    warnings = [
+        (r.case_id, v["message"]) for r in results for v in r.extras.get("budget", []) if not v["fatal"]
+    ]
+    if warnings:
+        print()
+    for case_id, message in sorted(warnings):
+        print(f"warning: {case_id} {message}")
@@ -0,0 +1,26 @@
+"""Direct Postgres access for the tools that verify or build database state.
+
+Table and column names follow ``backend/prisma/schema.prisma``: models are
+``@@map``-ed to snake_case tables while columns keep Prisma's camelCase
+field names, so they must be double-quoted in SQL.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import psycopg
+
+from . import config
+
+
+def connect(url: Optional[str] = None, **kwargs: Any) -> psycopg.Connection:
+    return psycopg.connect(url or config.DATABASE_URL, **kwargs)
+
+
+def participant_count(value: Any) -> int:
+    """Seats taken by a reservation's ``participants`` JSON (number or list)."""
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, (int, float)):
+        return int(value)
+    return 1
@@ -0,0 +1,238 @@
+"""Record and replay of static frontend assets and third-party responses.
+
+Most of a page load is Next.js chunks, fonts and images that are identical
+from run to run. :class:`HarHook` records those responses into a HAR
+once (``record``) and serves them from it afterwards (``replay``) through
+``context.route_from_har``. Page documents, ``/api/*`` and the backend are
+never matched and always go live, so navigation time reflects what the
+backend costs.
+
+The HAR is tied to a fingerprint of the frontend: a hash of the
+contents of the ``/_next/static`` files the home page references
+(``.next/BUILD_ID`` when the page cannot be fetched) and of the frontend
+sources. ``next dev`` serves chunks under the same URLs after an edit, so
+the URLs alone would not do, and the sources cover chunks only other pages
+load. When the fingerprint changes the HAR is dropped, and ``auto`` records a
+fresh one in the same run. Assets missing from the HAR fall through to the
+network.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness --har auto          # replay if valid, record otherwise
+    python -m harness.har                 # show the stored HAR and whether it is current
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import shutil
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Pattern
+from urllib.parse import urlsplit
+
+from playwright import async_api
+
+from . import config
+from .loader import TestCase
+from .runner import CaseResult, ContextHook, SuiteRunner
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+AUTO = "auto"
+MODES = (OFF, RECORD, REPLAY, AUTO)
+
+HAR_DIR = config.OUTPUT_DIR / "har"
+HAR_PATH = HAR_DIR / "assets.har"
+META_PATH = HAR_DIR / "assets.json"
+FRONTEND_DIR = config.SUITE_DIR.parent / "frontend"
+BUILD_ID_FILE = FRONTEND_DIR / ".next" / "BUILD_ID"
+# What a frontend build is made of; an edit to any of these can change an asset.
+SOURCES = ("src", "public", "middleware.ts", "next.config.js", "package-lock.json",
+           "postcss.config.js", "tailwind.config.ts", "tsconfig.json")
+_STATIC_REF = re.compile(r"""["'](/_next/static/[^"'?]+)""")
+_ASSET_EXTENSIONS = "png|jpe?g|webp|avif|gif|svg|ico|woff2?|ttf|otf|css|js|map"
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def asset_pattern(frontend: str = config.FRONTEND_URL, backend: str = config.BACKEND_URL) -> Pattern[str]:
+    """URLs that are recorded and replayed: frontend static files and every other origin."""
+    fe, be = re.escape(_origin(frontend)), re.escape(_origin(backend))
+    return re.compile(
+        rf"^{fe}/(?:_next/static/|_next/image\b|(?!api/)[^?#]*\.(?:{_ASSET_EXTENSIONS})(?:[?#]|$))"
+        rf"|^(?!{fe}|{be})https?://"
+    )
+
+
+def _fetch(url: str) -> bytes:
+    with urllib.request.urlopen(url, timeout=15) as response:
+        return response.read()
+
+
+def source_digest(root: Path = FRONTEND_DIR) -> Optional[str]:
+    """Hash of the frontend sources in :data:`SOURCES`, ``None`` without a checkout."""
+    files = []
+    for name in SOURCES:
+        path = root / name
+        files.extend(sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path])
+    files = [f for f in files if f.is_file()]
+    if not files:
+        return None
+    digest = hashlib.sha256()
+    for f in files:
+        digest.update(f.relative_to(root).as_posix().encode() + b"\0")
+        digest.update(f.read_bytes())
+    return digest.hexdigest()
+
+
+def build_fingerprint(frontend: str = config.FRONTEND_URL) -> Optional[str]:
+    """Hash of the static assets the live home page references (or ``.next/BUILD_ID``) and the sources.
+
+    The assets are hashed by content: in dev mode their URLs carry no hash
+    and stay the same when the frontend changes.
+    """
+    build = None
+    try:
+        html = _fetch(frontend + "/").decode("utf-8", errors="replace")
+        refs = sorted(set(_STATIC_REF.findall(html)))
+        if refs:
+            digest = hashlib.sha256()
+            for ref in refs:
+                digest.update(ref.encode() + b"\0")
+                digest.update(_fetch(frontend + ref))
+            build = digest.hexdigest()
+    except OSError:
+        pass
+    if build is None and BUILD_ID_FILE.exists():
+        build = "build-" + BUILD_ID_FILE.read_text(encoding="utf-8").strip()
+    if build is None:
+        return None
+    return hashlib.sha256(f"{build}\n{source_digest()}".encode()).hexdigest()[:16]
+
+
+def load_meta() -> Optional[Dict[str, Any]]:
+    if not (HAR_PATH.exists() and META_PATH.exists()):
+        return None
+    return json.loads(META_PATH.read_text(encoding="utf-8"))
+
+
+def invalidate() -> None:
+    shutil.rmtree(HAR_DIR, ignore_errors=True)
+
+
+def merge(parts: List[Path], output: Path) -> int:
+    """Union of the entries of ``parts`` (first response per method and URL) into one HAR."""
+    merged: Optional[Dict[str, Any]] = None
+    seen = set()
+    for part in sorted(parts):
+        try:
+            har = json.loads(part.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue  # a context that crashed before writing its HAR
+        if merged is None:
+            merged = {"log": {**har["log"], "entries": []}}
+        for entry in har["log"]["entries"]:
+            key = (entry["request"]["method"], entry["request"]["url"])
+            if key not in seen:
+                seen.add(key)
+                merged["log"]["entries"].append(entry)
+    if merged is None:
+        return 0
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(merged), encoding="utf-8")
+    return len(seen)
+
+
+class HarHook(ContextHook):
+    """Routes static and third-party requests of every context through the HAR."""
+
+    def __init__(self, mode: str = AUTO) -> None:
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.mode = mode
+        self.fingerprint: Optional[str] = None
+        self.pattern = asset_pattern()
+        self._parts = HAR_DIR / "parts"
+        self._contexts = 0
+
+    async def start(self, runner: SuiteRunner) -> None:
+        if self.mode == OFF:
+            return
+        self.fingerprint = build_fingerprint()
+        meta = load_meta()
+        current = meta is not None and self.fingerprint is not None and meta["fingerprint"] == self.fingerprint
+        if meta is not None and not current:
+            print(f"har: frontend build changed ({meta['fingerprint']} -> {self.fingerprint}); dropping the HAR")
+            invalidate()
+        if self.mode == AUTO:
+            self.mode = REPLAY if current else RECORD
+        elif self.mode == REPLAY and not current:
+            raise RuntimeError("no HAR for the current frontend build; run with --har record or auto first")
+        if self.mode == RECORD:
+            shutil.rmtree(self._parts, ignore_errors=True)
+            self._parts.mkdir(parents=True)
+        print(f"har: {self.mode} (build {self.fingerprint})")
+
+    async def on_context(self, case: TestCase, context: async_api.BrowserContext) -> None:
+        if self.mode == REPLAY:
+            await context.route_from_har(HAR_PATH, url=self.pattern, not_found="fallback")
+        elif self.mode == RECORD:
+            self._contexts += 1
+            # One file per context: Playwright writes it when the context closes.
+            part = self._parts / f"{case.case_id}-{self._contexts}.har"
+            await context.route_from_har(
+                part, url=self.pattern, update=True, update_content="embed", update_mode="minimal"
+            )
+
+    async def on_finish(
+        self, case: TestCase, context: async_api.BrowserContext, result: CaseResult
+    ) -> None:
+        if self.mode in (RECORD, REPLAY):
+            result.extras["har"] = self.mode
+
+    async def stop(self, runner: SuiteRunner) -> None:
+        if self.mode != RECORD:
+            return
+        entries = merge(list(self._parts.glob("*.har")), HAR_PATH)
+        shutil.rmtree(self._parts, ignore_errors=True)
+        if not entries:
+            print("har: nothing recorded")
+            return
+        META_PATH.write_text(json.dumps({
+            "fingerprint": self.fingerprint,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "entries": entries,
+            "frontend": config.FRONTEND_URL,
+        }, indent=2), encoding="utf-8")
+        print(f"har: recorded {entries} responses to {HAR_PATH}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.har", description="Stored asset HAR status.")
+    parser.add_argument("--drop", action="store_true", help="delete the stored HAR")
+    args = parser.parse_args(argv)
+    if args.drop:
+        invalidate()
+        return 0
+    meta = load_meta()
+    fingerprint = build_fingerprint()
+    if meta is None:
+        print(f"no HAR recorded; current build {fingerprint}")
+        return 1
+    state = "current" if meta["fingerprint"] == fingerprint else f"stale (build is now {fingerprint})"
+    size = HAR_PATH.stat().st_size / 1048576
+    print(f"{HAR_PATH}: {meta['entries']} responses, {size:.1f} MB, recorded {meta['recorded_at']}, {state}")
+    return 0 if meta["fingerprint"] == fingerprint else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
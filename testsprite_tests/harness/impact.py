@@ -0,0 +1,271 @@
+"""Test impact analysis: which cases a change to the backend can affect.
+
+``build`` reads the per-case network captures of the last run
+(``network/<case>.json``) and resolves every backend call to the Express
+handler that serves it. Routers come from ``app.use`` in ``server.ts``,
+handlers from ``router.<method>(...)`` in ``backend/src/routes/*.ts``, and
+the first match in source order wins, as in Express. The index keeps, per
+case, the routes it called and the route files behind them.
+
+``select`` takes a git diff and prints the cases to run:
+
+- a route file selects the cases that hit it;
+- any other backend source (services, middleware, validations...)
+  selects the cases whose route files import it, directly or indirectly;
+  one no route file imports (only ``server.ts`` does, like the Redis
+  setup) selects every case, as it can break startup or every request;
+- ``server.ts``, the Prisma schema, migrations, package manifests, the
+  frontend and the harness itself select every case, as does any file
+  the rules do not cover;
+- a ``TCxxx_*.py`` script selects itself; Markdown selects nothing.
+
+Cases missing from the index are always selected.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness TC001 TC002 ...                # any run with network capture
+    python -m harness.impact build
+    python -m harness.impact select --base origin/main
+    python -m harness.impact select --base origin/main --run -- -j 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from . import config
+from .loader import CASE_PATTERN, discover
+from .routes import RoutePattern
+
+REPO_DIR = config.SUITE_DIR.parent
+BACKEND_SRC = REPO_DIR / "backend" / "src"
+SERVER = BACKEND_SRC / "server.ts"
+
+_IMPORT_ROUTER = re.compile(r"""import\s+(\w+)\s+from\s+['"](\./routes/[^'"]+)['"]""")
+_MOUNT = re.compile(r"""app\.use\(\s*['"]([^'"]+)['"]\s*,\s*(\w+)\s*\)""")
+_HANDLER = re.compile(r"""router\.(get|post|put|patch|delete)\(\s*['"`]([^'"`]+)['"`]""")
+_RELATIVE_IMPORT = re.compile(r"""(?:from\s+|require\(\s*)['"](\.{1,2}/[^'"]+)['"]""")
+# Changes here can affect any request or page.
+_EVERYTHING = (
+    "backend/src/server.ts",
+    "backend/prisma/",
+    "backend/package.json",
+    "backend/package-lock.json",
+    "backend/tsconfig.json",
+    "frontend/",
+    "testsprite_tests/harness/",
+    "testsprite_tests/testsprite_frontend_test_plan.json",
+)
+
+
+@dataclass(frozen=True)
+class Handler:
+    pattern: RoutePattern
+    file: str  # relative to the repository root
+    line: int
+
+    @property
+    def route(self) -> str:
+        return self.pattern.text
+
+
+def _rel(path: Path) -> str:
+    return path.resolve().relative_to(REPO_DIR.resolve()).as_posix()
+
+
+def _resolve_module(base: Path, spec: str) -> Optional[Path]:
+    target = (base.parent / spec).resolve()
+    # Append rather than with_suffix(): "email.service" is not "email.ts".
+    for candidate in (target.parent / (target.name + ".ts"), target / "index.ts", target):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def handlers(server: Path = SERVER) -> List[Handler]:
+    """Every route handler, in the order Express would try them."""
+    source = server.read_text(encoding="utf-8")
+    modules = {name: _resolve_module(server, spec) for name, spec in _IMPORT_ROUTER.findall(source)}
+    found = []
+    for prefix, name in _MOUNT.findall(source):
+        module = modules.get(name)
+        if module is None:
+            continue  # static directories and middleware
+        text = module.read_text(encoding="utf-8")
+        for match in _HANDLER.finditer(text):
+            method, sub = match.group(1).upper(), match.group(2)
+            path = prefix.rstrip("/") + ("" if sub == "/" else sub) or "/"
+            line = text.count("\n", 0, match.start()) + 1
+            found.append(Handler(RoutePattern.parse(f"{method} {path}"), _rel(module), line))
+    return found
+
+
+def resolve(calls: Iterable[Tuple[str, str]], table: Sequence[Handler]) -> Tuple[Set[Handler], Set[str]]:
+    """Handlers behind ``(method, path)`` calls, and the calls no handler matches."""
+    hit, unmatched = set(), set()
+    for method, path in calls:
+        handler = next((h for h in table if h.pattern.matches(method, path)), None)
+        if handler is None:
+            unmatched.add(f"{method} {path}")
+        else:
+            hit.add(handler)
+    return hit, unmatched
+
+
+def importers(src: Path = BACKEND_SRC) -> Dict[str, Set[str]]:
+    """For every backend source file, the files that import it, transitively."""
+    direct: Dict[str, Set[str]] = {}
+    for path in src.rglob("*.ts"):
+        for spec in _RELATIVE_IMPORT.findall(path.read_text(encoding="utf-8")):
+            target = _resolve_module(path, spec)
+            if target is not None:
+                direct.setdefault(_rel(target), set()).add(_rel(path))
+    closure: Dict[str, Set[str]] = {}
+    for module in direct:
+        seen: Set[str] = set()
+        stack = [module]
+        while stack:
+            for parent in direct.get(stack.pop(), ()):
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+        closure[module] = seen
+    return closure
+
+
+def index_path(plan: bool = False, output_dir: Path = config.OUTPUT_DIR) -> Path:
+    return output_dir / ("impact_plan.json" if plan else "impact.json")
+
+
+def build(network_dir: Path, index: Path) -> Dict[str, Dict]:
+    """Merge the captures in ``network_dir`` into ``index``; cases not captured keep their entry."""
+    table = handlers()
+    existing = json.loads(index.read_text(encoding="utf-8")) if index.exists() else {"cases": {}}
+    cases = existing["cases"]
+    for capture in sorted(network_dir.glob("*.json")):
+        data = json.loads(capture.read_text(encoding="utf-8"))
+        calls = {(c["method"], c["path"]) for c in data["calls"]}
+        if not calls and data["case"] in cases:
+            continue  # a case that died before reaching the backend says nothing new
+        hit, unmatched = resolve(calls, table)
+        cases[data["case"]] = {
+            "routes": sorted({h.route for h in hit}),
+            "files": sorted({h.file for h in hit}),
+            "handlers": sorted(f"{h.file}:{h.line}" for h in hit),
+            "unmatched": sorted(unmatched),
+            "status": data.get("status"),
+        }
+    payload = {"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "cases": dict(sorted(cases.items()))}
+    index.parent.mkdir(parents=True, exist_ok=True)
+    index.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return payload["cases"]
+
+
+def changed_files(base: str, head: str = "HEAD") -> List[str]:
+    out = subprocess.run(
+        ["git", "diff", "--name-only", f"{base}...{head}"],
+        cwd=REPO_DIR, check=True, capture_output=True, text=True,
+    ).stdout
+    return [line for line in out.splitlines() if line]
+
+
+def select(changed: Iterable[str], cases: Dict[str, Dict], all_ids: Sequence[str]) -> Tuple[List[str], Dict[str, str]]:
+    """Case ids affected by ``changed`` files, and why each was selected."""
+    graph: Optional[Dict[str, Set[str]]] = None
+    reasons: Dict[str, str] = {case: "not in the index" for case in all_ids if case not in cases}
+    for path in changed:
+        if path.endswith(".md"):
+            continue
+        name = Path(path).name
+        script = CASE_PATTERN.match(name) if path.startswith("testsprite_tests/") else None
+        if script:
+            reasons.setdefault(script.group(1), path)
+            continue
+        if path.startswith(_EVERYTHING) or not path.startswith("backend/src/"):
+            return list(all_ids), {case: path for case in all_ids}
+        if graph is None:
+            graph = importers()
+        files = {path} | {f for f in graph.get(path, ()) if f.startswith("backend/src/routes/")}
+        if not any(f.startswith("backend/src/routes/") for f in files):
+            return list(all_ids), {case: path for case in all_ids}
+        for case, entry in cases.items():
+            if files & set(entry["files"]):
+                reasons.setdefault(case, path)
+    selected = [case for case in all_ids if case in reasons]
+    return selected, {case: reasons[case] for case in selected}
+
+
+def _case_ids(plan: bool) -> List[str]:
+    if plan:
+        from .plan import load_plan
+
+        return [c.case_id for c in load_plan()]
+    return [c.case_id for c in discover()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    runner_args: List[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, runner_args = argv[:split], argv[split + 1:]
+    parser = argparse.ArgumentParser(
+        prog="python -m harness.impact",
+        description="Map cases to backend routes and select the cases a diff affects.",
+        epilog="With select --run, arguments after -- are passed to `python -m harness`.",
+    )
+    parser.add_argument("command", choices=["build", "select", "show"])
+    parser.add_argument("--plan", action="store_true", help="index the test plan's cases instead of the scripts")
+    parser.add_argument("--index", type=Path, help="index file (default: tmp/harness/impact.json)")
+    parser.add_argument("--network", type=Path, default=config.OUTPUT_DIR / "network",
+                        help="build: per-case captures to read")
+    parser.add_argument("--base", default="origin/main", help="select: diff base")
+    parser.add_argument("--head", default="HEAD", help="select: diff head")
+    parser.add_argument("--files", nargs="+", help="select: changed paths instead of a git diff")
+    parser.add_argument("--run", action="store_true", help="select: run the selected cases")
+    args = parser.parse_args(argv)
+    index = args.index or index_path(args.plan)
+
+    if args.command == "build":
+        cases = build(args.network, index)
+        for case, entry in cases.items():
+            print(f"{case}  {', '.join(Path(f).name for f in entry['files']) or '-':<40} {len(entry['routes'])} routes")
+        print(f"index: {index}")
+        return 0
+    if not index.exists():
+        print(f"no index at {index}; run `python -m harness.impact build` after a captured run", file=sys.stderr)
+        return 2
+    cases = json.loads(index.read_text(encoding="utf-8"))["cases"]
+    if args.command == "show":
+        for case, entry in cases.items():
+            print(f"{case}")
+            for route in entry["routes"]:
+                print(f"    {route}")
+            for call in entry["unmatched"]:
+                print(f"    ? {call}")
+        return 0
+
+    changed = args.files if args.files is not None else changed_files(args.base, args.head)
+    selected, reasons = select(changed, cases, _case_ids(args.plan))
+    for case in selected:
+        print(f"{case}  <- {reasons[case]}", file=sys.stderr)
+    print(" ".join(selected))
+    if not args.run:
+        return 0
+    if not selected:
+        print("no affected cases", file=sys.stderr)
+        return 0
+    from .__main__ import main as run_cases
+
+    return run_cases([*selected, *(["--plan"] if args.plan else []), *runner_args])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Frontend heap growth across repeated booking navigation.
+
+One authenticated page opens the class page once, then walks the loop
+TC007 exercises ``--iterations`` times without reloading:
+
+    booking modal (name filled in) -> dashboard -> back to the class page
+
+Navigation is client-side wherever the app allows it: a link to the target
+on the current page is clicked, else ``window.next.router.push`` is used,
+and "back" is ``history.back()``. A full load resets the heap, so each one
+is counted in the report. Every ``--interval`` iterations, after forcing
+a GC, the page's ``Performance.getMetrics`` are sampled:
+``JSHeapUsedSize``, DOM ``Nodes``, ``JSEventListeners`` and ``Documents``.
+Growth per iteration is the least-squares slope after ``--warmup``
+iterations. Any metric over its limit fails the run. With
+``--heap-snapshots``, heap snapshots are written at the first sample after
+warmup and at the last, to compare in DevTools (Memory -> Load).
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.leak --iterations 50
+    python -m harness.leak --role school_admin --dwell 5 --heap-snapshots
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from playwright import async_api
+
+from . import config
+from .auth import AuthCache
+from .seed import DEFAULT_CLASS_ID
+from .steps import DASHBOARDS
+from .throttle import open_modal
+from .waits import Waiter
+
+METRICS = ("JSHeapUsedSize", "Nodes", "JSEventListeners", "Documents")
+# Per-iteration growth allowed after warmup; heap in bytes.
+DEFAULT_LIMITS = {"JSHeapUsedSize": 256 * 1024, "Nodes": 50, "JSEventListeners": 10, "Documents": 0.5}
+
+NAVIGATE_SCRIPT = """
+(path) => {
+  const link = [...document.querySelectorAll('a[href]')].find((a) => a.getAttribute('href') === path);
+  if (link) { link.click(); return 'link'; }
+  if (window.next && window.next.router) { window.next.router.push(path); return 'router'; }
+  return null;
+}
+"""
+
+
+def slope(points: Sequence[Tuple[float, float]]) -> float:
+    """Least-squares slope of ``(x, y)`` points; 0.0 with fewer than two."""
+    if len(points) < 2:
+        return 0.0
+    xs, ys = [x for x, _ in points], [y for _, y in points]
+    mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x if var_x else 0.0
+
+
+class NavigationLoop:
+    def __init__(self, page: async_api.Page, cdp: async_api.CDPSession, dashboard: str, dwell: float) -> None:
+        self.page = page
+        self.cdp = cdp
+        self.dashboard = dashboard
+        self.dwell = dwell
+        self.waits = Waiter(timeout=15)
+        self.waits.attach(page.context)
+        self.navigations: Dict[str, int] = {"link": 0, "router": 0, "back": 0, "full": 0}
+
+    async def navigate(self, path: str) -> None:
+        how = await self.page.evaluate(NAVIGATE_SCRIPT, path)
+        if how is None:
+            how = "full"
+            await self.page.goto(config.FRONTEND_URL + path, wait_until="domcontentloaded")
+        else:
+            await self.page.wait_for_url(re.compile(re.escape(path) + r"(?:[?#].*)?$"), wait_until="commit")
+        self.navigations[how] += 1
+        await self.waits.network_idle()
+
+    async def iteration(self) -> None:
+        page = self.page
+        name = page.locator("#name")
+        if not await name.is_visible():  # the modal may have survived the way back
+            await open_modal(page)
+        await name.fill("Invitado Leak")
+        await self.navigate(self.dashboard)
+        if self.dwell:
+            await page.wait_for_timeout(self.dwell * 1000)
+        await page.evaluate("() => history.back()")
+        await page.wait_for_url(re.compile(rf"/classes/{DEFAULT_CLASS_ID}(?:[?#].*)?$"), wait_until="commit")
+        self.navigations["back"] += 1
+        await self.waits.network_idle()
+
+    async def sample(self) -> Dict[str, float]:
+        await self.cdp.send("HeapProfiler.collectGarbage")
+        metrics = (await self.cdp.send("Performance.getMetrics"))["metrics"]
+        values = {m["name"]: m["value"] for m in metrics}
+        return {name: values.get(name, 0.0) for name in METRICS}
+
+    async def heap_snapshot(self, path: Path) -> None:
+        chunks: List[str] = []
+
+        def handler(event: Dict[str, Any]) -> None:
+            chunks.append(event["chunk"])
+
+        self.cdp.on("HeapProfiler.addHeapSnapshotChunk", handler)
+        try:
+            await self.cdp.send("HeapProfiler.takeHeapSnapshot", {"reportProgress": False})
+        finally:
+            self.cdp.remove_listener("HeapProfiler.addHeapSnapshotChunk", handler)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("".join(chunks), encoding="utf-8")
+
+
+def analyse(samples: List[Dict[str, Any]], warmup: int, limits: Dict[str, float]) -> Dict[str, Dict[str, Any]]:
+    steady = [s for s in samples if s["iteration"] >= warmup]
+    out = {}
+    for metric in METRICS:
+        per_iteration = slope([(s["iteration"], s[metric]) for s in steady])
+        out[metric] = {
+            "first": steady[0][metric] if steady else None,
+            "last": steady[-1][metric] if steady else None,
+            "per_iteration": round(per_iteration, 2),
+            "limit": limits[metric],
+            "leaking": len(steady) >= 3 and per_iteration > limits[metric],
+        }
+    return out
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    limits = dict(DEFAULT_LIMITS)
+    if args.max_heap_kb is not None:
+        limits["JSHeapUsedSize"] = args.max_heap_kb * 1024
+    if args.max_nodes is not None:
+        limits["Nodes"] = args.max_nodes
+    report: Dict[str, Any] = {
+        "role": args.role, "iterations": args.iterations, "interval": args.interval, "warmup": args.warmup,
+        "samples": [],
+    }
+    async with async_api.async_playwright() as pw:
+        browser = await pw.chromium.launch(args=config.BROWSER_ARGS + ["--enable-precise-memory-info"])
+        try:
+            auth = AuthCache(pw)
+            context = await browser.new_context(storage_state=await auth.storage_state(args.role))
+            context.set_default_timeout(15000)
+            page = await context.new_page()
+            cdp = await context.new_cdp_session(page)
+            await cdp.send("Performance.enable")
+            loop = NavigationLoop(page, cdp, DASHBOARDS[args.role], args.dwell)
+            await page.goto(f"{config.FRONTEND_URL}/classes/{DEFAULT_CLASS_ID}", wait_until="load")
+            await loop.waits.network_idle()
+            # Snapshots bracket the samples the growth check uses.
+            snapshots = {-(-args.warmup // args.interval) * args.interval, args.iterations}
+            started = time.perf_counter()
+            for n in range(args.iterations + 1):
+                if n:
+                    await loop.iteration()
+                if n % args.interval == 0 or n == args.iterations:
+                    sample = {"iteration": n, "elapsed": round(time.perf_counter() - started, 1), **await loop.sample()}
+                    report["samples"].append(sample)
+                    print(f"#{n:<4} heap {sample['JSHeapUsedSize'] / 1048576:7.2f} MB  nodes {sample['Nodes']:>7.0f}"
+                          f"  listeners {sample['JSEventListeners']:>6.0f}  documents {sample['Documents']:.0f}")
+                    if args.heap_snapshots and n in snapshots:
+                        await loop.heap_snapshot(config.OUTPUT_DIR / "leak" / f"heap-{n}.heapsnapshot")
+            report["navigations"] = loop.navigations
+            await context.close()
+        finally:
+            await browser.close()
+    report["growth"] = analyse(report["samples"], args.warmup, limits)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.leak", description="Frontend heap growth under navigation.")
+    parser.add_argument("--role", default="student", choices=sorted(DASHBOARDS), help="account whose dashboard is visited")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--interval", type=int, default=5, help="iterations between samples")
+    parser.add_argument("--warmup", type=int, default=5, help="iterations ignored by the growth check")
+    parser.add_argument("--dwell", type=float, default=0, help="seconds to stay on the dashboard per iteration")
+    parser.add_argument("--max-heap-kb", type=float, help="allowed heap growth per iteration (default 256)")
+    parser.add_argument("--max-nodes", type=float, help="allowed DOM node growth per iteration (default 50)")
+    parser.add_argument("--heap-snapshots", action="store_true", help="write heap snapshots at the first sample after warmup and the last")
+    parser.add_argument("--output", default=str(config.OUTPUT_DIR / "leak.json"))
+    args = parser.parse_args(argv)
+    args.interval = max(1, args.interval)
+
+    report = asyncio.run(run(args))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    full = report["navigations"]["full"]
+    if full:
+        print(f"{full} navigation(s) were full page loads; growth across them is not visible")
+    for metric, g in report["growth"].items():
+        print(f"{metric:<18} {g['per_iteration']:+12.2f}/iteration  (limit {g['limit']:g})"
+              + ("  <- growing" if g["leaking"] else ""))
+    return 1 if any(g["leaking"] for g in report["growth"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
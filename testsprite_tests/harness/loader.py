@@ -0,0 +1,159 @@
+"""Discovery and loading of the generated TCxxx scripts.
+
+The scripts are regenerated by TestSprite, so they are never edited by
+hand. Instead each file is parsed, the trailing ``asyncio.run(run_test())``
+is dropped and the remaining module is compiled once. The runner then
+executes that code in a fresh namespace per run, with ``async_api`` bound
+to a shim that hands out contexts from the shared browser.
+
+Fixed sleeps are rewritten on the way through: a ``wait_for_timeout``
+right before an element action becomes ``__waits__.actionable(elem, ...)``
+and any other ``wait_for_timeout``/``asyncio.sleep`` becomes a bounded
+``__waits__.settle(timeout=...)`` (see :mod:`harness.waits`).
+"""
+from __future__ import annotations
+
+import ast
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import CodeType
+from typing import Any, Dict, Iterable, List, Optional
+
+from .config import SUITE_DIR
+
+CASE_PATTERN = re.compile(r"^(TC\d{3})_(.+)\.py$")
+_ACTIONS = {"click", "dblclick", "check", "uncheck", "fill", "type", "press", "select_option", "hover"}
+
+
+@dataclass
+class TestCase:
+    """A generated script, compiled and ready to run."""
+
+    case_id: str
+    title: str
+    path: Path
+    code: CodeType = field(repr=False)
+
+    def namespace(self, **overrides: Any) -> Dict[str, Any]:
+        """Execute the module body and return its globals.
+
+        ``overrides`` replace module globals after the imports ran, which is
+        how the runner swaps ``async_api`` for its shim.
+        """
+        ns: Dict[str, Any] = {
+            "__name__": f"testsprite_tests.{self.path.stem}",
+            "__file__": str(self.path),
+        }
+        exec(self.code, ns)
+        ns.update(overrides)
+        return ns
+
+    async def run(self, **overrides: Any) -> None:
+        ns = self.namespace(**overrides)
+        await ns["run_test"]()
+
+
+def _is_entry_point(node: ast.stmt) -> bool:
+    """True for the module-level ``asyncio.run(...)`` statement."""
+    if not isinstance(node, ast.Expr) or not isinstance(node.value, ast.Call):
+        return False
+    func = node.value.func
+    return (
+        isinstance(func, ast.Attribute)
+        and func.attr == "run"
+        and isinstance(func.value, ast.Name)
+        and func.value.id == "asyncio"
+    )
+
+
+def _fixed_sleep(node: ast.stmt) -> Optional[float]:
+    """Seconds slept by ``await x.wait_for_timeout(ms)`` / ``await asyncio.sleep(s)``."""
+    if not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Await)):
+        return None
+    call = node.value.value
+    if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)):
+        return None
+    if len(call.args) != 1 or not isinstance(call.args[0], ast.Constant):
+        return None
+    amount = call.args[0].value
+    if not isinstance(amount, (int, float)):
+        return None
+    if call.func.attr == "wait_for_timeout":
+        return amount / 1000
+    if call.func.attr == "sleep" and isinstance(call.func.value, ast.Name) and call.func.value.id == "asyncio":
+        return float(amount)
+    return None
+
+
+def _element_action(node: Optional[ast.stmt]) -> Optional[tuple]:
+    """``(target, action)`` for ``await elem.click(...)``-style statements."""
+    if not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Await)):
+        return None
+    call = node.value.value
+    if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)):
+        return None
+    if call.func.attr not in _ACTIONS or not isinstance(call.func.value, ast.Name):
+        return None
+    return call.func.value.id, call.func.attr
+
+
+def _waits_call(method: str, args: List[ast.expr], keywords: List[ast.keyword]) -> ast.Expr:
+    func = ast.Attribute(value=ast.Name(id="__waits__", ctx=ast.Load()), attr=method, ctx=ast.Load())
+    return ast.Expr(value=ast.Await(value=ast.Call(func=func, args=args, keywords=keywords)))
+
+
+class _SleepRewriter(ast.NodeTransformer):
+    def _rewrite(self, body: List[ast.stmt]) -> List[ast.stmt]:
+        out = []
+        for index, stmt in enumerate(body):
+            seconds = _fixed_sleep(stmt)
+            if seconds is None:
+                out.append(stmt)
+                continue
+            following = body[index + 1] if index + 1 < len(body) else None
+            action = _element_action(following)
+            if action:
+                target, name = action
+                new = _waits_call("actionable", [ast.Name(id=target, ctx=ast.Load()), ast.Constant(name)], [])
+            else:
+                new = _waits_call("settle", [], [ast.keyword(arg="timeout", value=ast.Constant(seconds))])
+            out.append(ast.copy_location(new, stmt))
+        return out
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        super().generic_visit(node)
+        for name in ("body", "orelse", "finalbody"):
+            block = getattr(node, name, None)
+            if isinstance(block, list) and block and isinstance(block[0], ast.stmt):
+                setattr(node, name, self._rewrite(block))
+        return node
+
+
+def compile_case(path: Path, rewrite_sleeps: bool = True) -> TestCase:
+    match = CASE_PATTERN.match(path.name)
+    if not match:
+        raise ValueError(f"{path.name} is not a TestSprite case file")
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    tree.body = [node for node in tree.body if not _is_entry_point(node)]
+    if rewrite_sleeps:
+        tree = ast.fix_missing_locations(_SleepRewriter().visit(tree))
+    code = compile(tree, str(path), "exec")
+    case_id, slug = match.groups()
+    return TestCase(case_id=case_id, title=slug.replace("_", " "), path=path, code=code)
+
+
+def discover(
+    selected: Optional[Iterable[str]] = None,
+    suite_dir: Path = SUITE_DIR,
+    rewrite_sleeps: bool = True,
+) -> List[TestCase]:
+    """Compile every ``TCxxx_*.py`` in the suite, optionally filtered by id."""
+    wanted = {s.upper() for s in selected} if selected else None
+    cases = []
+    for path in sorted(suite_dir.glob("TC*.py")):
+        match = CASE_PATTERN.match(path.name)
+        if not match or (wanted and match.group(1) not in wanted):
+            continue
+        cases.append(compile_case(path, rewrite_sleeps=rewrite_sleeps))
+    return cases
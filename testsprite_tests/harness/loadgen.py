@@ -0,0 +1,201 @@
+"""Open-loop load generator for guest checkout (``POST /reservations``).
+
+Each request is a unique synthetic guest, so every call walks the full
+path: bcrypt hash, user creation, the capacity ``count()`` inside the
+Prisma transaction, payment creation and the two emails. Every booking
+that succeeds is canceled again right after it is timed, so the class
+never runs out of seats however long the run. Arrivals follow a Poisson
+process at the offered rate regardless of how fast the server answers,
+stage by stage, until the server stops keeping up.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.loadgen --rates 2,5,10,20 --duration 30
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from . import config
+from .api import ApiError, BackendApi
+from .seed import DEFAULT_CLASS_ID, Seeder, unique_email
+from .stats import summarize
+
+CAPACITY_MESSAGE = "Not enough spots available"
+
+
+def classify(exc: Optional[BaseException]) -> str:
+    """Outcome bucket for one checkout attempt."""
+    if exc is None:
+        return "ok"
+    if isinstance(exc, ApiError):
+        if exc.status == 409 and exc.code == "ACCOUNT_EXISTS":
+            return "409_account_exists"
+        if exc.status == 400 and isinstance(exc.body, dict) and exc.body.get("message") == CAPACITY_MESSAGE:
+            return "400_capacity"
+        if exc.status >= 500:
+            return "5xx"
+        return f"{exc.status}_other"
+    if isinstance(exc, (httpx.TimeoutException, asyncio.TimeoutError)):
+        return "timeout"
+    return "transport"
+
+
+@dataclass
+class StageResult:
+    offered_rps: float
+    duration: float
+    sent: int = 0
+    dropped: int = 0
+    outcomes: Dict[str, int] = field(default_factory=dict)
+    achieved_rps: float = 0.0
+    latency_ms: Dict[str, float] = field(default_factory=dict)
+    cancel_failures: int = 0
+
+    @property
+    def error_rate(self) -> float:
+        """Share of calls the server failed; a full class is a correct answer, not an error."""
+        errors = self.sent - self.outcomes.get("ok", 0) - self.outcomes.get("400_capacity", 0)
+        return errors / self.sent if self.sent else 0.0
+
+
+class CheckoutLoad:
+    def __init__(
+        self,
+        seeder: Seeder,
+        class_id: int = DEFAULT_CLASS_ID,
+        slots: int = 30,
+        time_of_day: str = "09:00",
+        max_in_flight: int = 256,
+    ) -> None:
+        self.seeder = seeder
+        self.class_id = class_id
+        self.time_of_day = time_of_day
+        self.max_in_flight = max_in_flight
+        # Spread bookings over several dates so class capacity is not the
+        # first thing the load measures.
+        first = date.today() + timedelta(days=7)
+        self.dates = [first + timedelta(days=n) for n in range(max(1, slots))]
+        self._n = 0
+
+    async def _one(self, samples: List[Tuple[str, float]], result: StageResult) -> None:
+        self._n += 1
+        on = self.dates[self._n % len(self.dates)]
+        started = time.perf_counter()
+        exc: Optional[BaseException] = None
+        created = None
+        try:
+            created = await self.seeder.guest_reservation(
+                class_id=self.class_id, on=on, time=self.time_of_day, email=unique_email("load")
+            )
+        except (ApiError, httpx.HTTPError, asyncio.TimeoutError) as err:
+            exc = err
+        samples.append((classify(exc), (time.perf_counter() - started) * 1000))
+        if created is not None:
+            try:
+                await self.seeder.api.as_(created["token"]).reservations.cancel(created["id"])
+            except (ApiError, httpx.HTTPError, asyncio.TimeoutError):
+                result.cancel_failures += 1
+
+    async def stage(self, rate: float, duration: float) -> StageResult:
+        result = StageResult(offered_rps=rate, duration=duration)
+        samples: List[Tuple[str, float]] = []
+        tasks = set()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        next_at = started
+        while next_at < started + duration:
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+            next_at += random.expovariate(rate)
+            if len(tasks) >= self.max_in_flight:
+                result.dropped += 1
+                continue
+            task = asyncio.ensure_future(self._one(samples, result))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            result.sent += 1
+        if tasks:
+            await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+        counts = Counter(kind for kind, _ in samples)
+        result.outcomes = dict(counts)
+        # A full-class 400 is the server keeping up too.
+        served = counts.get("ok", 0) + counts.get("400_capacity", 0)
+        result.achieved_rps = round(served / elapsed, 2) if elapsed else 0.0
+        result.latency_ms = summarize([ms for kind, ms in samples if kind == "ok"])
+        return result
+
+
+def saturated(stage: StageResult, slo_ms: float, max_error_rate: float) -> bool:
+    """The server no longer keeps up with the offered rate."""
+    return (
+        stage.achieved_rps < 0.9 * stage.offered_rps
+        or stage.latency_ms.get("p95", 0) > slo_ms
+        or stage.error_rate > max_error_rate
+        or stage.dropped > 0
+    )
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    report: Dict = {"target": config.API_URL, "class_id": args.class_id, "stages": []}
+    async with BackendApi(pool_size=args.connections, timeout=args.request_timeout) as api:
+        load = CheckoutLoad(
+            Seeder(api),
+            class_id=args.class_id,
+            slots=args.slots,
+            max_in_flight=args.max_in_flight,
+        )
+        for rate in args.rates:
+            stage = await load.stage(rate, args.duration)
+            report["stages"].append(asdict(stage))
+            ok = not saturated(stage, args.slo_ms, args.max_error_rate)
+            print(
+                f"{rate:7.1f} rps offered  {stage.achieved_rps:7.2f} served/s  "
+                f"p50 {stage.latency_ms.get('p50', 0):7.0f}ms  p95 {stage.latency_ms.get('p95', 0):7.0f}ms  "
+                f"{stage.outcomes}{'' if ok else '  <- saturated'}"
+            )
+            if not ok:
+                report["saturation_rps"] = rate
+                break
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.loadgen", description="Guest checkout load generator.")
+    parser.add_argument("--rates", type=lambda s: [float(x) for x in s.split(",")], default=[1, 2, 5, 10, 20],
+                        help="comma-separated offered arrival rates in requests/s, one stage each")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per stage")
+    parser.add_argument("--class-id", type=int, default=DEFAULT_CLASS_ID)
+    parser.add_argument("--slots", type=int, default=30, help="distinct dates bookings are spread over")
+    parser.add_argument("--connections", type=int, default=64, help="HTTP connection pool size")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--request-timeout", type=float, default=30)
+    parser.add_argument("--slo-ms", type=float, default=2000, help="p95 above this marks saturation")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--output", default=str(config.OUTPUT_DIR / "loadgen.json"))
+    args = parser.parse_args(argv)
+    report = asyncio.run(run(args))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if "saturation_rps" in report:
+        print(f"saturated at {report['saturation_rps']} rps offered")
+    else:
+        print("no saturation within the offered rates")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""Local stand-in for the Resend email API.
+
+``EmailService.sendEmail`` awaits ``resend.emails.send`` inside the request
+handlers, so offline runs either fail the call or hang on it. The Resend
+SDK honours ``RESEND_BASE_URL``; start the backend with
+
+    RESEND_BASE_URL=http://127.0.0.1:8025 RESEND_API_KEY=re_local npm run dev
+
+and :class:`MailServer` answers ``POST /emails`` (and ``/emails/batch``)
+locally, capturing every message. Cases query the captured messages by
+recipient and category and wait for them without polling.
+:meth:`Mailbox.expect` records the gap between the API call that triggered
+an email and its arrival, alongside the call's own latency.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.mailbox serve --port 8025
+    python -m harness.mailbox probe --count 20 --latency-ms 300
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from . import config
+
+# EmailService passes its category to the database only; the subject is
+# what reaches Resend, so categories are recovered from the subject prefix.
+CATEGORIES: Tuple[Tuple[str, str], ...] = (
+    ("¡Bienvenido a", "WELCOME"),
+    ("Recuperación de Contraseña", "PASSWORD_RESET"),
+    ("Reserva Confirmada:", "RESERVATION_CONFIRMED"),
+    ("Reserva Cancelada:", "RESERVATION_CANCELLED"),
+    ("Cambio en tu Reserva:", "RESERVATION_CHANGED"),
+    ("Pago Recibido:", "PAYMENT_RECEIVED"),
+    ("Recordatorio:", "CHECK_IN_REMINDER"),
+)
+
+
+def category_for(subject: str) -> str:
+    for prefix, category in CATEGORIES:
+        if subject.startswith(prefix):
+            return category
+    return "GENERAL"
+
+
+@dataclass
+class Message:
+    id: str
+    to: List[str]
+    subject: str
+    category: str
+    sender: str
+    received_at: float
+    html: str = field(default="", repr=False)
+
+
+@dataclass
+class Delivery:
+    trigger: str
+    category: str
+    recipient: str
+    request_ms: Optional[float]
+    email_ms: Optional[float]
+
+    @property
+    def delivered(self) -> bool:
+        return self.email_ms is not None
+
+
+class Mailbox:
+    """Captured messages, queryable by recipient and category."""
+
+    def __init__(self) -> None:
+        self.messages: List[Message] = []
+        self.deliveries: List[Delivery] = []
+        self._arrived = asyncio.Condition()
+
+    async def add(self, payload: Dict[str, Any]) -> Message:
+        to = payload.get("to") or []
+        subject = payload.get("subject", "")
+        message = Message(
+            id=str(uuid.uuid4()),
+            to=[to] if isinstance(to, str) else list(to),
+            subject=subject,
+            category=category_for(subject),
+            sender=payload.get("from", ""),
+            received_at=time.time(),
+            html=payload.get("html") or "",
+        )
+        async with self._arrived:
+            self.messages.append(message)
+            self._arrived.notify_all()
+        return message
+
+    def find(self, to: Optional[str] = None, category: Optional[str] = None, since: float = 0.0) -> List[Message]:
+        to = to.lower() if to else None
+        return [
+            m for m in self.messages
+            if m.received_at >= since
+            and (to is None or to in (t.lower() for t in m.to))
+            and (category is None or m.category == category)
+        ]
+
+    async def wait_for(
+        self, to: Optional[str] = None, category: Optional[str] = None, since: float = 0.0, timeout: float = 5.0
+    ) -> Message:
+        """First matching message, waiting up to ``timeout`` seconds for it."""
+
+        def match() -> Optional[Message]:
+            found = self.find(to, category, since)
+            return found[0] if found else None
+
+        async with self._arrived:
+            try:
+                await asyncio.wait_for(self._arrived.wait_for(match), timeout)
+            except asyncio.TimeoutError:
+                raise AssertionError(f"no {category or 'email'} for {to or 'anyone'} within {timeout:.1f}s") from None
+            return match()
+
+    async def expect(
+        self,
+        trigger: str,
+        call: Any,
+        to: str,
+        *categories: str,
+        timeout: float = 5.0,
+    ) -> Tuple[Any, List[Message]]:
+        """Await ``call`` and the ``categories`` it should send to ``to``.
+
+        Records one :class:`Delivery` per category: the call's latency and
+        the gap from the start of the call to the email arriving.
+        """
+        started = time.time()
+        result = await call
+        request_ms = round((time.time() - started) * 1000, 2)
+        messages = []
+        for category in categories:
+            try:
+                message = await self.wait_for(to, category, since=started, timeout=timeout)
+            except AssertionError:
+                self.deliveries.append(Delivery(trigger, category, to, request_ms, None))
+                raise
+            messages.append(message)
+            email_ms = round((message.received_at - started) * 1000, 2)
+            self.deliveries.append(Delivery(trigger, category, to, request_ms, email_ms))
+        return result, messages
+
+    def clear(self) -> None:
+        self.messages.clear()
+        self.deliveries.clear()
+
+
+class MailServer:
+    """Minimal HTTP/1.1 server speaking the part of the Resend API the backend uses.
+
+    ``latency`` delays every send, to measure what a slow provider adds to
+    the request that awaits it. ``GET /_harness/messages?to=&category=``
+    exposes the mailbox to other processes; with ``wait=<seconds>`` it
+    holds the request until a match arrives.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = config.MAILBOX_PORT, latency: float = 0.0) -> None:
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.mailbox = Mailbox()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def __aenter__(self) -> "MailServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode("latin-1").strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self._handle(method, target, body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        parts = urlsplit(target)
+        if method == "POST" and parts.path in ("/emails", "/emails/batch"):
+            payload = json.loads(body or b"{}")
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            items = payload if isinstance(payload, list) else [payload]
+            sent = [await self.mailbox.add(item) for item in items]
+            if isinstance(payload, list):
+                return 200, {"data": [{"id": m.id} for m in sent]}
+            return 200, {"id": sent[0].id}
+        if method == "GET" and parts.path == "/_harness/messages":
+            query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            to, category, since = query.get("to"), query.get("category"), float(query.get("since", 0))
+            if "wait" in query:
+                try:
+                    await self.mailbox.wait_for(to, category, since, timeout=float(query["wait"]))
+                except AssertionError:
+                    pass
+            return 200, [asdict(m) for m in self.mailbox.find(to, category, since)]
+        return 404, {"name": "not_found", "message": f"{method} {parts.path}"}
+
+
+async def _serve(args: argparse.Namespace) -> int:
+    async with MailServer(args.host, args.port, args.latency_ms / 1000) as server:
+        print(f"Resend stand-in on {server.url} (set RESEND_BASE_URL={server.url})")
+        seen = 0
+        while True:
+            await asyncio.sleep(0.5)
+            for message in server.mailbox.messages[seen:]:
+                print(f"{message.category:<22} {', '.join(message.to)}  {message.subject}")
+            seen = len(server.mailbox.messages)
+
+
+async def _probe(args: argparse.Namespace) -> Dict[str, Any]:
+    from .api import BackendApi  # httpx is only needed for the probe
+    from .seed import Seeder, unique_email
+    from .stats import summarize
+
+    async with MailServer(args.host, args.port, args.latency_ms / 1000) as server, BackendApi() as api:
+        seeder = Seeder(api)
+        mailbox = server.mailbox
+        for _ in range(args.count):
+            email = unique_email("mail")
+            created, _ = await mailbox.expect(
+                "POST /reservations",
+                seeder.guest_reservation(email=email),
+                email,
+                "RESERVATION_CONFIRMED",
+                "WELCOME",
+                timeout=args.timeout,
+            )
+            await mailbox.expect(
+                "PUT /reservations/:id",
+                api.put(f"/reservations/{created['id']}", {"status": "CANCELED"}, token=created["token"]),
+                email,
+                "RESERVATION_CANCELLED",
+                timeout=args.timeout,
+            )
+        report: Dict[str, Any] = {"provider_latency_ms": args.latency_ms, "triggers": {}}
+        for trigger in sorted({d.trigger for d in mailbox.deliveries}):
+            rows = [d for d in mailbox.deliveries if d.trigger == trigger]
+            report["triggers"][trigger] = {
+                "request_ms": summarize([d.request_ms for d in rows if d.request_ms is not None]),
+                "email_ms": {
+                    category: summarize([d.email_ms for d in rows if d.category == category and d.delivered])
+                    for category in sorted({d.category for d in rows})
+                },
+            }
+        report["deliveries"] = [asdict(d) for d in mailbox.deliveries]
+        return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.mailbox", description="Local Resend stand-in.")
+    parser.add_argument("command", choices=["serve", "probe"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=config.MAILBOX_PORT)
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay every send by this much")
+    parser.add_argument("--count", type=int, default=10, help="probe: guest checkouts to run")
+    parser.add_argument("--timeout", type=float, default=10, help="probe: seconds to wait for each email")
+    parser.add_argument("--output", default=str(config.OUTPUT_DIR / "mailbox.json"))
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        try:
+            return asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            return 0
+    report = asyncio.run(_probe(args))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    for trigger, row in report["triggers"].items():
+        print(f"{trigger:<24} request p50 {row['request_ms'].get('p50', 0):7.0f}ms")
+        for category, gap in row["email_ms"].items():
+            print(f"    {category:<22} email p50 {gap.get('p50', 0):7.0f}ms  p95 {gap.get('p95', 0):7.0f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Per-request latency capture for backend calls made during a case.
+
+Every finished or failed backend request is recorded with its method,
+normalised route, status, TTFB, total duration and payload sizes. Each case
+gets ``network/<case>.json``; the run gets ``network_summary.json`` with
+p50/p95/p99 per route, turning a functional run into an API latency profile.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from playwright import async_api
+
+from . import config
+from .loader import TestCase
+from .routes import backend_path, normalize_path
+from .runner import CaseResult, ContextHook, SuiteRunner
+from .stats import summarize
+
+
+@dataclass
+class CallRecord:
+    method: str
+    route: str
+    path: str
+    status: Optional[int]
+    ttfb_ms: Optional[float]
+    duration_ms: Optional[float]
+    request_bytes: Optional[int]
+    response_bytes: Optional[int]
+    failure: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.method} {self.route}"
+
+
+def _span(timing: Dict[str, float], start: str, end: str) -> Optional[float]:
+    """``timing[end] - timing[start]`` in ms; Playwright uses -1 for 'unknown'."""
+    a, b = timing.get(start, -1), timing.get(end, -1)
+    if a is None or b is None or a < 0 or b < 0:
+        return None
+    return round(b - a, 2)
+
+
+async def describe(request: async_api.Request, failure: Optional[str] = None) -> Optional[CallRecord]:
+    path = backend_path(request.url)
+    if path is None:
+        return None
+    timing = request.timing
+    status = sizes = None
+    try:
+        response = await request.response()
+        status = response.status if response else None
+        sizes = await request.sizes()
+    except async_api.Error:
+        pass
+    return CallRecord(
+        method=request.method,
+        route=normalize_path(path),
+        path=path,
+        status=status,
+        ttfb_ms=_span(timing, "requestStart", "responseStart"),
+        # responseEnd is already relative to startTime
+        duration_ms=timing["responseEnd"] if timing.get("responseEnd", -1) >= 0 else None,
+        request_bytes=sizes["requestBodySize"] if sizes else None,
+        response_bytes=sizes["responseBodySize"] if sizes else None,
+        failure=failure,
+    )
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.records: List[CallRecord] = []
+        self._pending: Set[asyncio.Task] = set()
+
+    def attach(self, context: async_api.BrowserContext) -> None:
+        context.on("requestfinished", lambda r: self._track(describe(r)))
+        context.on("requestfailed", lambda r: self._track(describe(r, r.failure or "failed")))
+
+    def _track(self, coro: Any) -> None:
+        task = asyncio.ensure_future(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is None and task.result() is not None:
+            self.records.append(task.result())
+
+    async def drain(self) -> None:
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+
+def route_summary(records: List[CallRecord]) -> Dict[str, Any]:
+    grouped: Dict[str, List[CallRecord]] = defaultdict(list)
+    for record in records:
+        grouped[record.key].append(record)
+    summary = {}
+    for key in sorted(grouped):
+        calls = grouped[key]
+        summary[key] = {
+            "calls": len(calls),
+            "errors": sum(1 for c in calls if c.failure or (c.status or 0) >= 400),
+            "ttfb_ms": summarize([c.ttfb_ms for c in calls if c.ttfb_ms is not None]),
+            "duration_ms": summarize([c.duration_ms for c in calls if c.duration_ms is not None]),
+            "response_bytes": summarize([c.response_bytes for c in calls if c.response_bytes is not None], 0),
+        }
+    return summary
+
+
+class NetworkCaptureHook(ContextHook):
+    def __init__(self, output_dir: Path = config.OUTPUT_DIR) -> None:
+        self.output_dir = output_dir
+        self._recorders: Dict[str, _Recorder] = {}
+        self._all: List[CallRecord] = []
+
+    async def on_context(self, case: TestCase, context: async_api.BrowserContext) -> None:
+        self._recorders.setdefault(case.case_id, _Recorder()).attach(context)
+
+    async def on_finish(
+        self, case: TestCase, context: async_api.BrowserContext, result: CaseResult
+    ) -> None:
+        recorder = self._recorders.pop(case.case_id, None)
+        if recorder is None:
+            return
+        await recorder.drain()
+        path = self.output_dir / "network" / f"{case.case_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "case": case.case_id,
+            "status": result.status,
+            "routes": route_summary(recorder.records),
+            "calls": [asdict(r) for r in recorder.records],
+        }
+        path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        self._all.extend(recorder.records)
+        result.extras["network"] = {"calls": len(recorder.records), "report": str(path)}
+
+    async def stop(self, runner: SuiteRunner) -> None:
+        path = self.output_dir / "network_summary.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"calls": len(self._all), "routes": route_summary(self._all)}
+        path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
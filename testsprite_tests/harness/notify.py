@@ -0,0 +1,266 @@
+"""In-app notification delivery latency: from the triggering call to the user seeing it.
+
+The backend stores a notification only after the matching email went out
+(``EmailService.saveNotification``), so the probe runs the Resend stand-in
+of :mod:`harness.mailbox` itself. Each round, as ``--role``'s account, it:
+
+- books a class (``POST /reservations``) -> ``RESERVATION_CONFIRMED``;
+- has an admin mark the payment paid (``PUT /payments/:id``) -> ``PAYMENT_CONFIRMED``;
+- cancels the reservation (``PUT /reservations/:id``) -> ``RESERVATION_CANCELLED``.
+
+Two watchers time every event from the start of the call:
+
+- ``api_ms``: ``GET /notifications`` polled every ``--api-poll`` seconds
+  until a newer notification of the expected category is listed. This is
+  the delivery time the backend itself allows.
+- ``ui_ms``: a logged-in page on the notifications screen shows the new
+  entry. The screen loads once and has no polling of its own, so the
+  watcher presses its "Actualizar" button every ``--ui-refresh`` seconds
+  (30 by default, the interval the navbar polls ``/notifications/unread-count``
+  at). The refresh cadence runs independently of the events, as a real
+  poll would.
+
+``--load-rps`` runs guest checkouts (:class:`harness.loadgen.CheckoutLoad`)
+in the background, so the distributions can be compared idle and busy.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.notify --rounds 10
+    python -m harness.notify --rounds 20 --ui-refresh 5 --load-rps 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Dict, List, Optional
+
+from playwright import async_api
+
+from . import config
+from .api import BackendApi
+from .auth import AuthCache
+from .loadgen import CheckoutLoad
+from .mailbox import MailServer
+from .seed import DEFAULT_CLASS_ID, DEFAULT_TIME, Seeder
+from .stats import summarize
+
+# Students, instructors and school admins share this screen; admins have their own.
+NOTIFICATIONS_PATH = "/dashboard/student/notifications"
+ROLES = ("student", "instructor", "school_admin")
+LOAD_CHUNK = 5.0  # seconds per background load stage; the load stops within one chunk
+
+
+@dataclass
+class Event:
+    trigger: str
+    category: str
+    request_ms: float
+    api_ms: Optional[float]
+    ui_ms: Optional[float]
+    notification_id: Optional[int]
+
+
+class ApiWatcher:
+    def __init__(self, api: BackendApi, token: str, interval: float) -> None:
+        self.api = api
+        self.token = token
+        self.interval = interval
+
+    async def latest_id(self) -> int:
+        items = await self.api.get("/notifications", params={"limit": 1}, token=self.token)
+        return items[0]["id"] if items else 0
+
+    async def wait(self, after: int, category: str, started: float, timeout: float) -> Optional[int]:
+        """Id of the first notification newer than ``after`` in ``category``, polled until ``timeout``."""
+        while time.perf_counter() - started < timeout:
+            items = await self.api.get("/notifications", params={"limit": 5}, token=self.token)
+            for item in items:
+                if item["id"] > after and item.get("category") == category:
+                    return item["id"]
+            await asyncio.sleep(self.interval)
+        return None
+
+
+class UiWatcher:
+    """The notifications screen of a logged-in page, refreshed on a fixed cadence."""
+
+    def __init__(self, page: async_api.Page, refresh: float) -> None:
+        self.page = page
+        self.refresh = refresh
+        self.refreshes = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self.page.goto(config.FRONTEND_URL + NOTIFICATIONS_PATH, wait_until="domcontentloaded")
+        self._task = asyncio.ensure_future(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _poll(self) -> None:
+        button = self.page.get_by_role("button", name="Actualizar")
+        while True:
+            await asyncio.sleep(self.refresh)
+            try:
+                await button.click(timeout=5000)
+                self.refreshes += 1
+            except async_api.Error:
+                pass  # mid-render; the next tick tries again
+
+    async def wait(self, notification_id: int, timeout: float) -> bool:
+        link = self.page.locator(f'a[href="{NOTIFICATIONS_PATH}/{notification_id}"]')
+        try:
+            await link.first.wait_for(state="visible", timeout=timeout * 1000)
+        except async_api.Error:
+            return False
+        return True
+
+
+class Probe:
+    def __init__(self, seeder: Seeder, token: str, api: ApiWatcher, ui: Optional[UiWatcher], timeout: float) -> None:
+        self.seeder = seeder
+        self.token = token
+        self.api = api
+        self.ui = ui
+        self.timeout = timeout
+        self.events: List[Event] = []
+
+    async def observe(self, trigger: str, category: str, call: Awaitable[Any]) -> Any:
+        after = await self.api.latest_id()
+        started = time.perf_counter()
+        result = await call
+        request_ms = (time.perf_counter() - started) * 1000
+        found = await self.api.wait(after, category, started, self.timeout)
+        api_ms = (time.perf_counter() - started) * 1000 if found else None
+        ui_ms = None
+        if found and self.ui is not None:
+            remaining = self.timeout + self.ui.refresh - (time.perf_counter() - started)
+            if await self.ui.wait(found, max(remaining, 0.1)):
+                ui_ms = (time.perf_counter() - started) * 1000
+        event = Event(trigger, category, round(request_ms, 1), _round(api_ms), _round(ui_ms), found)
+        self.events.append(event)
+        print(f"{trigger:<24} {category:<22} request {event.request_ms:7.0f}ms  "
+              f"api {_fmt(event.api_ms)}  ui {_fmt(event.ui_ms)}")
+        return result
+
+    async def round(self, on: date) -> None:
+        api = self.seeder.api
+        created = await self.observe(
+            "POST /reservations", "RESERVATION_CONFIRMED",
+            self.seeder.reservation(self.token, class_id=DEFAULT_CLASS_ID, on=on, time=DEFAULT_TIME),
+        )
+        await self.observe(
+            "PUT /payments/:id", "PAYMENT_CONFIRMED",
+            self.seeder.update_payment(created["payment"]["id"], status="PAID"),
+        )
+        await self.observe(
+            "PUT /reservations/:id", "RESERVATION_CANCELLED",
+            api.put(f"/reservations/{created['id']}", {"status": "CANCELED"}, token=self.token),
+        )
+
+
+def _round(ms: Optional[float]) -> Optional[float]:
+    return None if ms is None else round(ms, 1)
+
+
+def _fmt(ms: Optional[float]) -> str:
+    return f"{ms:7.0f}ms" if ms is not None else "   missed"
+
+
+async def _background(load: CheckoutLoad, rate: float, stop: asyncio.Event, stages: List[Dict[str, Any]]) -> None:
+    while not stop.is_set():
+        stages.append(asdict(await load.stage(rate, LOAD_CHUNK)))
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "role": args.role, "rounds": args.rounds, "api_poll_s": args.api_poll, "ui_refresh_s": args.ui_refresh,
+        "load_rps": args.load_rps,
+    }
+    load_stages: List[Dict[str, Any]] = []
+    async with MailServer(port=args.mailbox_port), BackendApi(pool_size=args.connections) as api:
+        seeder = Seeder(api)
+        token = await seeder.token(args.role)
+        async with async_api.async_playwright() as pw:
+            browser = await pw.chromium.launch(args=config.BROWSER_ARGS)
+            ui: Optional[UiWatcher] = None
+            stop = asyncio.Event()
+            background = None
+            try:
+                if not args.no_ui:
+                    context = await browser.new_context(storage_state=await AuthCache(pw).storage_state(args.role))
+                    ui = UiWatcher(await context.new_page(), args.ui_refresh)
+                    await ui.start()
+                if args.load_rps:
+                    load = CheckoutLoad(Seeder(api), slots=args.slots)
+                    background = asyncio.ensure_future(_background(load, args.load_rps, stop, load_stages))
+                probe = Probe(seeder, token, ApiWatcher(api, token, args.api_poll), ui, args.timeout)
+                # Far enough ahead of the load's dates that the two never share a slot.
+                first = date.today() + timedelta(days=7 + args.slots)
+                for n in range(args.rounds):
+                    await probe.round(first + timedelta(days=n))
+            finally:
+                stop.set()
+                if background is not None:
+                    await background
+                if ui is not None:
+                    await ui.stop()
+                    report["ui_refreshes"] = ui.refreshes
+                await browser.close()
+    events = probe.events
+    report["triggers"] = {}
+    for trigger in dict.fromkeys(e.trigger for e in events):
+        rows = [e for e in events if e.trigger == trigger]
+        report["triggers"][trigger] = {
+            "category": rows[0].category,
+            "request_ms": summarize([e.request_ms for e in rows], 1),
+            "api_ms": summarize([e.api_ms for e in rows if e.api_ms is not None], 1),
+            "ui_ms": summarize([e.ui_ms for e in rows if e.ui_ms is not None], 1),
+            "missed_api": sum(e.api_ms is None for e in rows),
+            "missed_ui": sum(e.ui_ms is None for e in rows) if ui is not None else None,
+        }
+    report["events"] = [asdict(e) for e in events]
+    report["load"] = load_stages
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.notify", description="In-app notification latency probe.")
+    parser.add_argument("--role", default="student", choices=ROLES, help="account that receives the notifications")
+    parser.add_argument("--rounds", type=int, default=10, help="book/pay/cancel rounds")
+    parser.add_argument("--api-poll", type=float, default=0.1, help="seconds between GET /notifications polls")
+    parser.add_argument("--ui-refresh", type=float, default=30, help="seconds between refreshes of the notifications screen")
+    parser.add_argument("--no-ui", action="store_true", help="only poll the API")
+    parser.add_argument("--timeout", type=float, default=15, help="seconds to wait for each notification in the API")
+    parser.add_argument("--load-rps", type=float, default=0, help="background guest checkouts per second")
+    parser.add_argument("--slots", type=int, default=30, help="dates the background load spreads over")
+    parser.add_argument("--connections", type=int, default=32, help="HTTP connection pool size")
+    parser.add_argument("--mailbox-port", type=int, default=config.MAILBOX_PORT,
+                        help="port of the Resend stand-in the backend sends to")
+    parser.add_argument("--output", default=str(config.OUTPUT_DIR / "notify.json"))
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    for trigger, row in report["triggers"].items():
+        api_ms, ui_ms = row["api_ms"], row["ui_ms"]
+        print(f"{trigger:<24} api p50 {api_ms.get('p50', 0):7.0f}ms p95 {api_ms.get('p95', 0):7.0f}ms  "
+              f"ui p50 {ui_ms.get('p50', 0):7.0f}ms p95 {ui_ms.get('p95', 0):7.0f}ms")
+    missed = sum(row["missed_api"] for row in report["triggers"].values())
+    if missed:
+        print(f"{missed} notification(s) never reached GET /notifications within {args.timeout:g}s")
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Concurrent-booking stress test for a single class slot.
+
+``POST /reservations`` reads the slot's occupancy with
+``tx.reservation.count(...)`` and inserts inside an interactive Prisma
+transaction at the default (READ COMMITTED) isolation level. This scenario
+releases hundreds of bookings for the same ``classId``/``date``/``time`` at
+once, with mixed party sizes, then reads the database to check that seats
+held by non-canceled reservations never exceed the slot capacity.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.overbook --requests 300 --class-id 3 --date 2026-12-01 --time 09:00
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from . import config, db
+from .api import ApiError, BackendApi
+from .loadgen import classify
+from .seed import DEFAULT_CLASS_ID, Seeder, unique_email
+from .stats import summarize
+
+# Prisma surfaces serialization failures and deadlocks as 500s with these. Not a bare
+# "Transaction": that also matches P2028 (transaction closed or timed out), a real failure.
+_ABORT_MARKERS = ("P2034", "write conflict", "deadlock", "could not serialize")
+
+
+@dataclass
+class Attempt:
+    participants: int
+    outcome: str
+    latency_ms: float
+    retries: int = 0
+
+
+@dataclass
+class SlotState:
+    capacity: int
+    reservations: int
+    seats_taken: int
+
+    @property
+    def oversold(self) -> int:
+        return max(0, self.seats_taken - self.capacity)
+
+
+@dataclass
+class Report:
+    class_id: int
+    date: str
+    time: str
+    requests: int
+    outcomes: Dict[str, int] = field(default_factory=dict)
+    latency_ms: Dict[str, float] = field(default_factory=dict)
+    abort_rate: float = 0.0
+    retry_rate: float = 0.0
+    before: Optional[SlotState] = None
+    after: Optional[SlotState] = None
+    seats_granted: int = 0
+
+    @property
+    def overbooked(self) -> bool:
+        return self.after is not None and self.after.oversold > 0
+
+
+def is_abort(exc: BaseException) -> bool:
+    if not isinstance(exc, ApiError) or exc.status < 500:
+        return False
+    text = json.dumps(exc.body) if not isinstance(exc.body, str) else exc.body
+    return any(marker in text for marker in _ABORT_MARKERS)
+
+
+def slot_state(class_id: int, on: date, time_of_day: str) -> SlotState:
+    """Capacity and seats held by non-canceled reservations, read from Postgres."""
+    with db.connect() as conn:
+        row = conn.execute(
+            'SELECT capacity FROM class_sessions WHERE "classId" = %s AND "date"::date = %s AND "time" = %s',
+            (class_id, on, time_of_day),
+        ).fetchone()
+        if row is None:
+            row = conn.execute('SELECT "defaultCapacity" FROM classes WHERE id = %s', (class_id,)).fetchone()
+        capacity = row[0] if row else 0
+        rows = conn.execute(
+            'SELECT participants FROM reservations WHERE "classId" = %s AND "date"::date = %s '
+            "AND \"time\" = %s AND status <> 'CANCELED'",
+            (class_id, on, time_of_day),
+        ).fetchall()
+    return SlotState(
+        capacity=capacity,
+        reservations=len(rows),
+        seats_taken=sum(db.participant_count(r[0]) for r in rows),
+    )
+
+
+class Stampede:
+    def __init__(self, seeder: Seeder, class_id: int, on: date, time_of_day: str, guest: bool, max_retries: int) -> None:
+        self.seeder = seeder
+        self.class_id = class_id
+        self.on = on
+        self.time_of_day = time_of_day
+        self.guest = guest
+        self.max_retries = max_retries
+        self.gate = asyncio.Event()
+
+    async def _book(self, participants: int, token: Optional[str]) -> None:
+        if self.guest:
+            await self.seeder.guest_reservation(
+                class_id=self.class_id, on=self.on, time=self.time_of_day,
+                participants=participants, email=unique_email("stress"),
+            )
+        else:
+            await self.seeder.reservation(
+                token, class_id=self.class_id, on=self.on, time=self.time_of_day, participants=participants
+            )
+
+    async def attempt(self, participants: int, token: Optional[str]) -> Attempt:
+        await self.gate.wait()
+        started = time.perf_counter()
+        retries = 0
+        while True:
+            try:
+                await self._book(participants, token)
+                outcome = "ok"
+            except (ApiError, httpx.HTTPError) as exc:
+                if is_abort(exc) and retries < self.max_retries:
+                    retries += 1
+                    continue
+                outcome = "aborted" if is_abort(exc) else classify(exc)
+            return Attempt(participants, outcome, (time.perf_counter() - started) * 1000, retries)
+
+
+async def run(args: argparse.Namespace) -> Report:
+    on = date.fromisoformat(args.date) if args.date else date.today() + timedelta(days=60)
+    report = Report(class_id=args.class_id, date=on.isoformat(), time=args.time, requests=args.requests)
+    report.before = slot_state(args.class_id, on, args.time)
+    sizes = [int(s) for s in args.party_sizes.split(",")]
+    async with BackendApi(pool_size=args.requests) as api:
+        seeder = Seeder(api)
+        token = None if args.guest else await seeder.token(args.role)
+        stampede = Stampede(seeder, args.class_id, on, args.time, args.guest, args.retries)
+        tasks = [
+            asyncio.ensure_future(stampede.attempt(random.choice(sizes), token))
+            for _ in range(args.requests)
+        ]
+        await asyncio.sleep(0.1)  # let every task reach the gate
+        stampede.gate.set()
+        attempts: List[Attempt] = await asyncio.gather(*tasks)
+    report.after = slot_state(args.class_id, on, args.time)
+    report.outcomes = dict(Counter(a.outcome for a in attempts))
+    report.latency_ms = summarize([a.latency_ms for a in attempts])
+    report.abort_rate = round(sum(a.outcome == "aborted" for a in attempts) / len(attempts), 4)
+    report.retry_rate = round(sum(a.retries for a in attempts) / len(attempts), 4)
+    report.seats_granted = sum(a.participants for a in attempts if a.outcome == "ok")
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.overbook", description="Overbooking stress test for one slot.")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--class-id", type=int, default=DEFAULT_CLASS_ID)
+    parser.add_argument("--date", help="YYYY-MM-DD (default: 60 days from today)")
+    parser.add_argument("--time", default="09:00")
+    parser.add_argument("--party-sizes", default="1,1,1,2,2,3,4", help="sampled uniformly per request")
+    parser.add_argument("--guest", action="store_true", help="book as unique guests instead of one logged-in role")
+    parser.add_argument("--role", default="student", help="account used when not booking as guests")
+    parser.add_argument("--retries", type=int, default=0, help="retry transaction aborts up to N times")
+    parser.add_argument("--output", default=str(config.OUTPUT_DIR / "overbook.json"))
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(asdict(report), indent=2), encoding="utf-8")
+
+    after = report.after
+    print(f"slot {report.class_id} {report.date} {report.time}: capacity {after.capacity}")
+    print(f"outcomes {report.outcomes}  abort rate {report.abort_rate:.2%}  retries/request {report.retry_rate}")
+    print(f"latency {report.latency_ms}")
+    print(f"seats held {after.seats_taken} in {after.reservations} reservations (before: {report.before.seats_taken})")
+    if report.overbooked:
+        print(f"OVERBOOKED by {after.oversold} seat(s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Cases compiled from ``testsprite_frontend_test_plan.json``.
+
+Each plan entry becomes a :class:`PlanCase` whose steps are bound to the
+shared :mod:`harness.steps` library when the plan is loaded. A plan case
+runs as a plain coroutine on the runner's shared browser, exactly like a
+compiled script, so hooks, waits and reports apply unchanged. Adding a
+case means adding JSON (and, for new wording, a step definition).
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness --plan              # run the plan instead of the scripts
+    python -m harness.plan                # list steps with no definition
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .config import SUITE_DIR
+from .steps import LIBRARY, StepContext, StepDef, UndefinedStep
+from .waits import Waiter
+
+PLAN_PATH = SUITE_DIR / "testsprite_frontend_test_plan.json"
+
+
+@dataclass
+class PlanStep:
+    kind: str
+    description: str
+    definition: Optional[StepDef] = field(default=None, repr=False)
+    arguments: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class PlanCase:
+    """A plan entry with its steps bound to step definitions."""
+
+    case_id: str
+    title: str
+    path: Path
+    steps: List[PlanStep]
+    priority: str = ""
+
+    @property
+    def undefined(self) -> List[PlanStep]:
+        return [s for s in self.steps if s.definition is None]
+
+    async def run(
+        self,
+        async_api: Any,
+        __waits__: Optional[Waiter] = None,
+        __steps__: Optional[List[Dict[str, Any]]] = None,
+        **_: Any,
+    ) -> None:
+        """Run the steps in order; each one's duration is appended to ``__steps__``, when given."""
+        if self.undefined:
+            raise UndefinedStep("no step definition for: " + "; ".join(s.description for s in self.undefined))
+        pw = await async_api.async_playwright().start()
+        ctx = StepContext(await pw.chromium.launch(), __waits__)
+        try:
+            for number, plan_step in enumerate(self.steps, 1):
+                started = time.perf_counter()
+                try:
+                    await plan_step.definition.func(ctx, **plan_step.arguments)
+                except AssertionError as exc:
+                    raise AssertionError(f"step {number} ({plan_step.description}): {exc}") from exc
+                finally:
+                    if __steps__ is not None:
+                        __steps__.append({
+                            "number": number,
+                            "description": plan_step.description,
+                            "duration": round(time.perf_counter() - started, 3),
+                        })
+        finally:
+            await ctx.close()
+
+
+def _bind(kind: str, description: str) -> PlanStep:
+    try:
+        definition, arguments = LIBRARY.resolve(description)
+    except UndefinedStep:
+        return PlanStep(kind, description)
+    return PlanStep(kind, description, definition, arguments)
+
+
+def load_plan(selected: Optional[Iterable[str]] = None, path: Path = PLAN_PATH) -> List[PlanCase]:
+    """Plan entries, optionally filtered by id, with every step resolved once."""
+    wanted = {s.upper() for s in selected} if selected else None
+    cases = []
+    for entry in json.loads(path.read_text(encoding="utf-8")):
+        if wanted and entry["id"].upper() not in wanted:
+            continue
+        cases.append(
+            PlanCase(
+                case_id=entry["id"],
+                title=entry["title"],
+                path=path,
+                steps=[_bind(s["type"], s["description"]) for s in entry["steps"]],
+                priority=entry.get("priority", ""),
+            )
+        )
+    return cases
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.plan", description="Step coverage of the test plan.")
+    parser.add_argument("cases", nargs="*")
+    parser.add_argument("--plan", type=Path, default=PLAN_PATH)
+    args = parser.parse_args(argv)
+    cases = load_plan(args.cases, args.plan)
+    total = sum(len(c.steps) for c in cases)
+    missing = 0
+    for case in cases:
+        state = "ready" if not case.undefined else f"{len(case.undefined)} undefined"
+        print(f"{case.case_id}  {state:<12} {case.title}")
+        for plan_step in case.undefined:
+            print(f"    - [{plan_step.kind}] {plan_step.description}")
+        missing += len(case.undefined)
+    print(f"{total - missing}/{total} steps bound to {len(LIBRARY.definitions)} definitions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""Pre-warmed browser contexts for the runner.
+
+A fresh context pays for creation, a first page, the first navigation
+and Next.js hydration before the case does anything. :class:`ContextPool`
+keeps ``size`` contexts ready in the background, each with one page
+already loaded and settled on an entry page. The entry pages are those the
+selected cases open first (usually ``/classes/3``), or home, ``/classes/3``
+and ``/login``.
+
+A case that asks for a context without options gets a pooled one. Its
+first ``new_page()`` returns the warm page, and its first ``goto`` to the
+URL that page already shows is skipped. Hooks see the context as usual.
+Whatever the case registers on it (listeners, routes) is recorded and
+removed when the context comes back. The pool then closes the pages,
+clears cookies and origin storage (local storage, IndexedDB, cache
+storage, service workers), keeps the HTTP cache, and warms it again.
+A context is closed instead when the case did not end in
+passed/failed or touched something that cannot be undone (init scripts,
+exposed bindings, headers, offline mode, permissions, geolocation).
+"""
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from playwright import async_api
+
+from . import config
+from .loader import TestCase
+from .runner import FAILED, PASSED, CaseResult
+from .thirdparty import OFF, interceptor
+
+DEFAULT_ENTRIES = ("/", "/classes/3", "/login")
+DEFAULT_MAX_AGE = 120.0
+WARM_CONCURRENCY = 2
+_GOTO = re.compile(r"""\.goto\(\s*["']([^"']+)["']""")
+# Calls a case can make that a returned context cannot be reset from.
+_IRREVERSIBLE = {
+    "add_init_script",
+    "expose_binding",
+    "expose_function",
+    "set_extra_http_headers",
+    "set_offline",
+    "set_geolocation",
+    "grant_permissions",
+    "set_http_credentials",
+    "route_from_har",
+}
+
+
+def _same_url(a: str, b: str) -> bool:
+    return a.rstrip("/") == b.rstrip("/")
+
+
+def entry_url(case: Any) -> Optional[str]:
+    """The first URL a generated script navigates to, if it is a literal."""
+    return _first_goto(case.path) if isinstance(case, TestCase) else None
+
+
+@lru_cache(maxsize=None)
+def _first_goto(path: Path) -> Optional[str]:
+    try:
+        match = _GOTO.search(path.read_text(encoding="utf-8"))
+    except OSError:
+        return None
+    return match.group(1) if match else None
+
+
+@dataclass
+class _Warm:
+    context: async_api.BrowserContext
+    page: async_api.Page
+    url: str
+    warmed_at: float
+    uses: int = 0
+    listeners: List[Tuple[str, Callable]] = field(default_factory=list)
+    routes: List[Tuple[Any, Callable]] = field(default_factory=list)
+    dirty: bool = False
+
+
+def _skip_first_goto(page: async_api.Page, pool: "ContextPool") -> async_api.Page:
+    """Make the warm page's first ``goto`` to the URL it already shows a no-op.
+
+    The page itself is handed out, not a wrapper: ``expect(page)`` only
+    accepts a real :class:`Page`. The shadowing ``goto`` is an instance
+    attribute that removes itself on its first call.
+    """
+    navigate = page.goto
+
+    async def goto(url: str, **options: Any) -> Optional[async_api.Response]:
+        del page.goto
+        if _same_url(url, page.url):
+            pool.stats["skipped_goto"] += 1
+            return None
+        return await navigate(url, **options)
+
+    page.goto = goto
+    return page
+
+
+class PooledContext:
+    """A pooled context as handed to a case: records what must be undone on return."""
+
+    def __init__(self, warm: _Warm, pool: "ContextPool") -> None:
+        self._warm = warm
+        self._pool = pool
+        self._page_taken = False
+
+    def __getattr__(self, name: str) -> Any:
+        if name in _IRREVERSIBLE:
+            self._warm.dirty = True
+        return getattr(self._warm.context, name)
+
+    def on(self, event: str, handler: Callable) -> None:
+        self._warm.listeners.append((event, handler))
+        self._warm.context.on(event, handler)
+
+    def remove_listener(self, event: str, handler: Callable) -> None:
+        if (event, handler) in self._warm.listeners:
+            self._warm.listeners.remove((event, handler))
+        self._warm.context.remove_listener(event, handler)
+
+    async def route(self, url: Any, handler: Callable, **options: Any) -> None:
+        self._warm.routes.append((url, handler))
+        await self._warm.context.route(url, handler, **options)
+
+    async def new_page(self) -> Any:
+        if not self._page_taken and not self._warm.page.is_closed():
+            self._page_taken = True
+            if time.monotonic() - self._warm.warmed_at < self._pool.max_age:
+                return _skip_first_goto(self._warm.page, self._pool)
+            return self._warm.page
+        return await self._warm.context.new_page()
+
+    async def close(self, **_: Any) -> None:
+        await self._pool.checkin(self, None)
+
+
+class ContextPool:
+    """``size`` warm contexts on the runner's browser, refilled in the background."""
+
+    def __init__(
+        self, size: int, third_party: str = OFF, max_age: float = DEFAULT_MAX_AGE, exclude: Sequence[str] = ()
+    ) -> None:
+        self.size = size
+        self.third_party = third_party
+        self.max_age = max_age
+        self.exclude = {c.upper() for c in exclude}
+        self.browser: Optional[async_api.Browser] = None
+        self.targets: Dict[str, int] = {}
+        self.stats: Counter = Counter()
+        self._ready: List[_Warm] = []
+        self._warming: Counter = Counter()
+        self._slots = asyncio.Semaphore(WARM_CONCURRENCY)
+        self._tasks: set = set()
+        self._demand = 0
+        self._recycling = 0  # returned contexts being reset; they count towards the warm size
+        self._intercept = interceptor(third_party) if third_party != OFF else None
+
+    async def start(self, browser: async_api.Browser, cases: Sequence[Any]) -> None:
+        self.browser = browser
+        self._demand = sum(map(self.accepts, cases))
+        hints = Counter(u for u in map(entry_url, cases) if u)
+        if not hints:
+            hints = Counter({config.FRONTEND_URL + path: 1 for path in DEFAULT_ENTRIES})
+        # Split the pool by how many cases start on each page, at least one each.
+        total = sum(hints.values())
+        for url, count in hints.most_common(self.size or None):
+            self.targets[url] = max(1, round(self.size * count / total))
+        self._refill()
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for warm in self._ready:
+            await self._close(warm)
+        self._ready.clear()
+        if self.stats:
+            print("context pool: " + ", ".join(f"{k}={v}" for k, v in sorted(self.stats.items())))
+
+    def accepts(self, case: Any) -> bool:
+        return self.browser is not None and case.case_id.upper() not in self.exclude
+
+    def owns(self, context: Any) -> bool:
+        return isinstance(context, PooledContext)
+
+    async def checkout(self, case: Any) -> Optional[PooledContext]:
+        """A warm context, preferably on the case's entry page; ``None`` when the pool is empty."""
+        self._demand -= 1
+        if not self._ready:
+            self.stats["miss"] += 1
+            return None
+        hint = entry_url(case)
+        warm = next((w for w in self._ready if hint and _same_url(w.url, hint)), self._ready[0])
+        self._ready.remove(warm)
+        if self._intercept is not None:
+            await warm.context.unroute(*self._intercept)
+        warm.uses += 1
+        self.stats["hit" if warm.uses == 1 else "reused"] += 1
+        self._refill()
+        return PooledContext(warm, self)
+
+    async def checkin(self, pooled: PooledContext, result: Optional[CaseResult]) -> None:
+        """Take a context back from a finished case: reset and re-warm it, or close it."""
+        warm = pooled._warm
+        if result is None or result.status not in (PASSED, FAILED) or warm.dirty:
+            self.stats["discarded"] += 1
+            await self._close(warm)
+            self._refill()
+            return
+        self._recycling += 1
+        self._spawn(self._recycle(warm))
+
+    def _deficit(self) -> Optional[str]:
+        if self._demand <= len(self._ready) + sum(self._warming.values()) + self._recycling:
+            return None  # enough warm contexts for every case still to come
+        have = Counter(w.url for w in self._ready) + self._warming
+        missing = {url: target - have[url] for url, target in self.targets.items() if target > have[url]}
+        if sum(missing.values()) <= self._recycling:
+            return None
+        return max(missing, key=missing.get)
+
+    def _refill(self) -> None:
+        while True:
+            url = self._deficit()
+            if url is None:
+                return
+            self._warming[url] += 1
+            self._spawn(self._warm(url))
+
+    def _spawn(self, coro: Any) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _warm(self, url: str, warm: Optional[_Warm] = None) -> None:
+        try:
+            async with self._slots:
+                if warm is None:
+                    context = await self.browser.new_context()
+                    context.set_default_timeout(config.DEFAULT_ACTION_TIMEOUT_MS)
+                    warm = _Warm(context, await context.new_page(), url, 0.0)
+                    self.stats["created"] += 1
+                warm.url = url
+                if self._intercept is not None:
+                    await warm.context.route(*self._intercept)
+                started = time.perf_counter()
+                await warm.page.goto(url, wait_until="load", timeout=30000)
+                try:
+                    await warm.page.wait_for_load_state("networkidle", timeout=10000)
+                except async_api.Error:
+                    pass  # long-polling pages never go idle; "load" is enough then
+                self.stats["warm_ms"] += round((time.perf_counter() - started) * 1000)
+                warm.warmed_at = time.monotonic()
+                self._ready.append(warm)
+        except async_api.Error:
+            self.stats["warm_failed"] += 1
+            if warm is not None:
+                await self._close(warm)
+        finally:
+            self._warming[url] -= 1
+
+    async def _recycle(self, warm: _Warm) -> None:
+        try:
+            await self._reset(warm)
+        except async_api.Error:
+            self.stats["discarded"] += 1
+            await self._close(warm)
+            return
+        finally:
+            self._recycling -= 1
+        url = self._deficit()
+        if url is None:
+            await self._close(warm)
+            return
+        self._warming[url] += 1
+        await self._warm(url, warm)
+
+    async def _reset(self, warm: _Warm) -> None:
+        """Undo what the case registered and drop its cookies, storage and pages."""
+        for event, handler in warm.listeners:
+            warm.context.remove_listener(event, handler)
+        for url, handler in warm.routes:
+            await warm.context.unroute(url, handler)
+        warm.listeners.clear()
+        warm.routes.clear()
+        for page in list(warm.context.pages):
+            await page.close()
+        await warm.context.clear_cookies()
+        warm.page = await warm.context.new_page()
+        cdp = await warm.context.new_cdp_session(warm.page)
+        for origin in {_origin(config.FRONTEND_URL), _origin(config.BACKEND_URL)}:
+            await cdp.send("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        await cdp.detach()
+
+    async def _close(self, warm: _Warm) -> None:
+        try:
+            await warm.context.close()
+        except async_api.Error:
+            pass
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
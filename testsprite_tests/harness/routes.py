@@ -0,0 +1,67 @@
+"""Recognising backend calls among the requests a page makes.
+
+The browser reaches the Express API either directly (``BACKEND_URL``) or
+through the Next.js ``/api/*`` rewrite; ``/api/auth/*`` stays in NextAuth.
+Both forms are reduced to the path the Express router sees.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Optional, Pattern
+from urllib.parse import urlsplit
+
+from .config import BACKEND_URL, FRONTEND_URL
+
+_BACKEND_ORIGIN = urlsplit(BACKEND_URL)._replace(path="", query="", fragment="").geturl()
+_FRONTEND_ORIGIN = urlsplit(FRONTEND_URL)._replace(path="", query="", fragment="").geturl()
+
+
+def backend_path(url: str) -> Optional[str]:
+    """Express path for a backend call, or ``None`` for anything else."""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    if origin == _BACKEND_ORIGIN:
+        return parts.path or "/"
+    if (
+        origin == _FRONTEND_ORIGIN
+        and parts.path.startswith("/api/")
+        and not parts.path.startswith("/api/auth/")
+    ):
+        return parts.path[len("/api"):]
+    return None
+
+
+@dataclass(frozen=True)
+class RoutePattern:
+    """``"/classes/:id/calendar"`` or ``"POST /reservations"``.
+
+    ``:name`` matches one path segment; a trailing ``*`` matches the rest
+    of the path, so ``"/reservations*"`` also covers ``/reservations/12``.
+    """
+
+    text: str
+    method: Optional[str]
+    regex: Pattern[str]
+
+    @classmethod
+    def parse(cls, text: str) -> "RoutePattern":
+        method, _, path = text.strip().rpartition(" ")
+        body = re.escape(path.rstrip("*").rstrip("/") or "/")
+        body = re.sub(r":\w+", "[^/]+", body)
+        tail = "(?:/.*)?" if path.endswith("*") else "/?"
+        return cls(text=text, method=method.upper() or None, regex=re.compile(f"^{body}{tail}$"))
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.method and self.method != method.upper():
+            return False
+        return self.regex.match(path) is not None
+
+
+_ID_SEGMENT = re.compile(r"^(\d+|v_[\w-]+|[0-9a-f]{8}-[0-9a-f-]{27,}|c[a-z0-9]{20,})$", re.I)
+
+
+def normalize_path(path: str) -> str:
+    """Collapse id-like segments so ``/classes/3/calendar`` -> ``/classes/:id/calendar``."""
+    segments = [":id" if _ID_SEGMENT.match(s) else s for s in path.split("/")]
+    return "/".join(segments) or "/"
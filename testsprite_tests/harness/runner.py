@@ -0,0 +1,276 @@
+"""Shared-browser runner for the TestSprite suite.
+
+One Chromium instance is launched per run. Each case gets its own browser
+context and cases run concurrently, bounded by a semaphore.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+
+from playwright import async_api
+
+from . import config
+from .loader import TestCase
+from .waits import Waiter
+
+if TYPE_CHECKING:
+    from .pool import ContextPool
+
+PASSED = "passed"
+FAILED = "failed"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+
+@dataclass
+class CaseResult:
+    case_id: str
+    title: str
+    status: str
+    duration: float
+    error: Optional[str] = None
+    extras: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == PASSED
+
+
+class ContextHook:
+    """Extension point for per-context instrumentation.
+
+    Subclasses override whichever methods they need; all of them are no-ops
+    here. ``start``/``stop`` bracket the whole run (the browser is up),
+    ``context_options`` is merged into ``browser.new_context(...)``,
+    ``on_context`` runs right after creation and ``on_finish`` runs once the
+    case is over but before the runner closes the context.
+    """
+
+    async def start(self, runner: "SuiteRunner") -> None:
+        pass
+
+    async def stop(self, runner: "SuiteRunner") -> None:
+        pass
+
+    async def context_options(self, case: TestCase) -> Dict[str, Any]:
+        return {}
+
+    async def on_context(self, case: TestCase, context: async_api.BrowserContext) -> None:
+        pass
+
+    async def on_finish(
+        self, case: TestCase, context: async_api.BrowserContext, result: CaseResult
+    ) -> None:
+        pass
+
+
+class _BorrowedContext:
+    """Real context whose ``close()`` is deferred to the runner."""
+
+    def __init__(self, context: async_api.BrowserContext) -> None:
+        self._context = context
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._context, name)
+
+    async def close(self, **_: Any) -> None:
+        pass
+
+
+class _BorrowedBrowser:
+    """What a script sees as ``browser``: contexts come from the shared one."""
+
+    def __init__(self, session: "_CaseSession") -> None:
+        self._session = session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session.runner.browser, name)
+
+    async def new_context(self, **options: Any) -> _BorrowedContext:
+        return _BorrowedContext(await self._session.open_context(**options))
+
+    async def new_page(self, **options: Any) -> async_api.Page:
+        context = await self.new_context(**options)
+        return await context.new_page()
+
+    async def close(self, **_: Any) -> None:
+        pass
+
+
+class _PlaywrightShim:
+    """Stands in for the ``async_api`` module inside a generated script.
+
+    ``async_playwright().start()``, ``.chromium`` and ``.launch()`` all lead
+    to the borrowed browser; everything else (``Error``, ``expect``...) is
+    the real module.
+    """
+
+    def __init__(self, session: "_CaseSession") -> None:
+        self._browser = _BorrowedBrowser(session)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(async_api, name)
+
+    def async_playwright(self) -> "_PlaywrightShim":
+        return self
+
+    async def start(self) -> "_PlaywrightShim":
+        return self
+
+    async def stop(self) -> None:
+        pass
+
+    @property
+    def chromium(self) -> "_PlaywrightShim":
+        return self
+
+    async def launch(self, **_: Any) -> _BorrowedBrowser:
+        return self._browser
+
+
+class _CaseSession:
+    """Contexts opened on behalf of one case."""
+
+    def __init__(self, runner: "SuiteRunner", case: TestCase) -> None:
+        self.runner = runner
+        self.case = case
+        self.contexts: List[async_api.BrowserContext] = []
+        self.waits = Waiter()
+        self.steps: List[Dict[str, Any]] = []  # filled by plan cases
+
+    async def open_context(self, **options: Any) -> async_api.BrowserContext:
+        merged: Dict[str, Any] = {}
+        for hook in self.runner.hooks:
+            merged.update(await hook.context_options(self.case))
+        merged.update(options)
+        context = None
+        pool = self.runner.pool
+        if not merged and pool is not None and pool.accepts(self.case):
+            context = await pool.checkout(self.case)
+        if context is None:
+            context = await self.runner.browser.new_context(**merged)
+        context.set_default_timeout(config.DEFAULT_ACTION_TIMEOUT_MS)
+        self.contexts.append(context)
+        self.waits.attach(context)
+        for hook in self.runner.hooks:
+            await hook.on_context(self.case, context)
+        return context
+
+    async def finish(self, result: CaseResult) -> None:
+        result.extras["waits"] = self.waits.report()
+        for context in self.contexts:
+            for hook in self.runner.hooks:
+                try:
+                    await hook.on_finish(self.case, context, result)
+                except Exception as exc:  # instrumentation must not mask the case outcome
+                    result.extras.setdefault("hook_errors", []).append(repr(exc))
+            if self.runner.pool is not None and self.runner.pool.owns(context):
+                await self.runner.pool.checkin(context, result)
+                continue
+            try:
+                await context.close()
+            except async_api.Error:
+                pass
+
+
+class SuiteRunner:
+    def __init__(
+        self,
+        concurrency: int = config.DEFAULT_CONCURRENCY,
+        case_timeout: float = config.CASE_TIMEOUT,
+        headless: bool = True,
+        hooks: Sequence[ContextHook] = (),
+        pool: Optional["ContextPool"] = None,
+        gate: Optional[Callable[[CaseResult], Any]] = None,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.case_timeout = case_timeout
+        self.headless = headless
+        self.hooks: List[ContextHook] = list(hooks)
+        self.pool = pool
+        # Judges a result before the hooks see it, e.g. harness.budget.Gate.
+        self.gate = gate
+        self.playwright: Optional[async_api.Playwright] = None
+        self.browser: Optional[async_api.Browser] = None
+        self._slots = asyncio.Semaphore(self.concurrency)
+
+    async def run(self, cases: Sequence[TestCase]) -> List[CaseResult]:
+        async with async_api.async_playwright() as pw:
+            self.playwright = pw
+            self.browser = await pw.chromium.launch(
+                headless=self.headless, args=config.BROWSER_ARGS
+            )
+            started: List[ContextHook] = []
+            try:
+                for hook in self.hooks:
+                    await hook.start(self)
+                    started.append(hook)
+                if self.pool is not None:
+                    await self.pool.start(self.browser, cases)
+                return list(await asyncio.gather(*(self._run_case(c) for c in cases)))
+            finally:
+                if self.pool is not None:
+                    await self.pool.stop()
+                for hook in reversed(started):
+                    await hook.stop(self)
+                await self.browser.close()
+                self.browser = None
+                self.playwright = None
+
+    async def _run_case(self, case: TestCase) -> CaseResult:
+        async with self._slots:
+            session = _CaseSession(self, case)
+            error = None
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    case.run(async_api=_PlaywrightShim(session), __waits__=session.waits, __steps__=session.steps),
+                    self.case_timeout,
+                )
+                status = PASSED
+            except AssertionError as exc:
+                status, error = FAILED, str(exc)
+            except asyncio.TimeoutError:
+                status, error = TIMEOUT, f"exceeded {self.case_timeout:.0f}s"
+            except Exception:
+                status, error = ERROR, traceback.format_exc(limit=5)
+            result = CaseResult(
+                case_id=case.case_id,
+                title=case.title,
+                status=status,
+                duration=round(time.perf_counter() - started, 3),
+                error=error,
+            )
+            if session.steps:
+                result.extras["steps"] = session.steps
+            if self.gate is not None:
+                self.gate(result)
+            await session.finish(result)
+            return result
+
+
+def write_results(results: Sequence[CaseResult], wall_time: float, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "wall_time": round(wall_time, 3),
+        "passed": sum(r.ok for r in results),
+        "total": len(results),
+        "cases": [asdict(r) for r in results],
+    }
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def print_summary(results: Sequence[CaseResult], wall_time: float) -> None:
+    for r in sorted(results, key=lambda r: r.case_id):
+        waited = r.extras.get("waits", {}).get("total_waited", 0.0)
+        print(f"{r.case_id}  {r.status:<8} {r.duration:8.1f}s  (waits {waited:5.1f}s)  {r.title}")
+        if r.error and not r.ok:
+            print(f"        {r.error.strip().splitlines()[-1]}")
+    passed = sum(r.ok for r in results)
+    print(f"\n{passed}/{len(results)} passed in {wall_time:.1f}s")
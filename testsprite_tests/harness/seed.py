@@ -0,0 +1,201 @@
+"""Backend-side preconditions for booking-dependent cases.
+
+Instead of clicking through the booking modal on ``/classes/3`` to reach
+the step under test, a case asks the :class:`Seeder` for the reservations,
+payments and discount codes it needs. Bulk helpers fan out over the pooled
+client behind a semaphore.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.seed reservations --count 20 --class-id 3
+    python -m harness.seed discount-codes --count 5 --percentage 15
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from . import config
+from .api import DEFAULT_POOL_SIZE, BackendApi
+
+DEFAULT_CLASS_ID = 3
+DEFAULT_TIME = "09:00"
+
+T = TypeVar("T")
+
+
+def unique_email(prefix: str = "guest") -> str:
+    return f"{prefix}.{uuid.uuid4().hex[:12]}@example.com"
+
+
+def guest_participant(email: Optional[str] = None, name: str = "Invitado Harness", age: int = 25) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "email": email or unique_email(),
+        "age": age,
+        "height": 170,
+        "weight": 70,
+        "canSwim": True,
+        "injuries": "Ninguna",
+    }
+
+
+class Seeder:
+    """Creates fixtures through the public API, logging in per role lazily."""
+
+    def __init__(self, api: BackendApi, concurrency: int = DEFAULT_POOL_SIZE) -> None:
+        self.api = api
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tokens: Dict[str, str] = {}
+        self._login_lock = asyncio.Lock()
+
+    async def token(self, role: str) -> str:
+        async with self._login_lock:
+            if role not in self._tokens:
+                email, password = config.ROLE_CREDENTIALS[role]
+                self._tokens[role] = (await self.api.login(email, password))["token"]
+            return self._tokens[role]
+
+    async def bulk(self, count: int, factory: Callable[[int], Awaitable[T]]) -> List[T]:
+        async def one(index: int) -> T:
+            async with self._slots:
+                return await factory(index)
+
+        return list(await asyncio.gather(*(one(i) for i in range(count))))
+
+    async def guest_reservation(
+        self,
+        class_id: int = DEFAULT_CLASS_ID,
+        on: Optional[date] = None,
+        time: str = DEFAULT_TIME,
+        participants: int = 1,
+        email: Optional[str] = None,
+        discount_code_id: Optional[int] = None,
+        discount_amount: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Guest checkout (``POST /reservations`` without a token).
+
+        The response carries the new reservation, its ``UNPAID`` payment and
+        the guest's ``token`` for follow-up calls.
+        """
+        lead = guest_participant(email)
+        extra = [guest_participant(lead["email"], name=f"Acompañante {n}") for n in range(1, participants)]
+        body: Dict[str, Any] = {
+            "classId": class_id,
+            "date": (on or date.today() + timedelta(days=1)).isoformat(),
+            "time": time,
+            "participants": [lead, *extra],
+        }
+        if discount_code_id is not None:
+            body["discountCodeId"] = discount_code_id
+        if discount_amount is not None:
+            body["discountAmount"] = discount_amount
+        return await self.api.as_("").reservations.create(body)
+
+    async def reservation(
+        self,
+        token: str,
+        class_id: int = DEFAULT_CLASS_ID,
+        on: Optional[date] = None,
+        time: str = DEFAULT_TIME,
+        participants: int = 1,
+    ) -> Dict[str, Any]:
+        """Authenticated ``POST /reservations`` (no guest account is created)."""
+        body = {
+            "classId": class_id,
+            "date": (on or date.today() + timedelta(days=1)).isoformat(),
+            "time": time,
+            "participants": participants,
+        }
+        return await self.api.as_(token).reservations.create(body)
+
+    async def guest_reservations(self, count: int, **kwargs: Any) -> List[Dict[str, Any]]:
+        return await self.bulk(count, lambda _: self.guest_reservation(**kwargs))
+
+    async def payment(
+        self,
+        reservation_id: int,
+        amount: float,
+        status: str = "PENDING",
+        payment_method: str = "transfer",
+        voucher_image: Optional[str] = None,
+        token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """``POST /payments`` for a reservation that has no payment yet.
+
+        Reservations made through ``POST /reservations`` already own an
+        ``UNPAID`` payment; use :meth:`update_payment` for those.
+        """
+        body = {
+            "reservationId": reservation_id,
+            "amount": amount,
+            "status": status,
+            "paymentMethod": payment_method,
+            "voucherImage": voucher_image,
+        }
+        return await self.api.as_(token or await self.token("admin")).payments.create(body)
+
+    async def update_payment(self, payment_id: int, token: Optional[str] = None, **fields: Any) -> Dict[str, Any]:
+        """``PUT /payments/:id``, e.g. ``voucherImage=..., status="PENDING"``."""
+        return await self.api.as_(token or await self.token("admin")).payments.update(payment_id, fields)
+
+    async def discount_code(
+        self,
+        code: Optional[str] = None,
+        percentage: float = 10,
+        valid_days: int = 30,
+        max_uses: Optional[int] = None,
+        school_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        body = {
+            "code": code or f"HARNESS{uuid.uuid4().hex[:8].upper()}",
+            "discountPercentage": percentage,
+            "validFrom": (now - timedelta(hours=1)).isoformat().replace("+00:00", "Z"),
+            "validTo": (now + timedelta(days=valid_days)).isoformat().replace("+00:00", "Z"),
+            "isActive": True,
+            "maxUses": max_uses,
+            "schoolId": school_id,
+        }
+        return await self.api.as_(await self.token("admin")).discount_codes.create(body)
+
+    async def discount_codes(self, count: int, **kwargs: Any) -> List[Dict[str, Any]]:
+        return await self.bulk(count, lambda _: self.discount_code(**kwargs))
+
+
+def _summary(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    keys = ("id", "code", "status", "date", "time")
+    return [{k: item[k] for k in keys if k in item} for item in items]
+
+
+async def _main(args: argparse.Namespace) -> int:
+    async with BackendApi(pool_size=args.concurrency) as api:
+        seeder = Seeder(api, concurrency=args.concurrency)
+        if args.kind == "reservations":
+            items = await seeder.guest_reservations(
+                args.count, class_id=args.class_id, participants=args.participants
+            )
+        else:
+            items = await seeder.discount_codes(args.count, percentage=args.percentage)
+    print(json.dumps(_summary(items), indent=2, default=str))
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.seed", description="Create fixtures through the backend API.")
+    parser.add_argument("kind", choices=["reservations", "discount-codes"])
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--class-id", type=int, default=DEFAULT_CLASS_ID)
+    parser.add_argument("--participants", type=int, default=1)
+    parser.add_argument("--percentage", type=float, default=10)
+    return asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
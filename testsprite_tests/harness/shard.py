@@ -0,0 +1,220 @@
+"""Duration-aware sharding of the suite across worker processes.
+
+One runner process is bound to one event loop and one Chromium. This
+module splits the selected cases over ``-n`` worker processes, each running
+``python -m harness`` with its own browser, output directory and,
+optionally, its own backend tenant (a set of ``HARNESS_LOGIN_<ROLE>``
+credentials). Cases are bin-packed by their historical duration, longest
+first onto the least-loaded shard, so the slowest shard finishes as close
+to the others as possible.
+
+Every run records per-case durations in ``durations.json`` (the median of
+the last few runs is the estimate); unknown cases are estimated at the
+median of the known ones.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.shard -n 4
+    python -m harness.shard -n 3 --tenants tenants.json TC003 TC010 TC011 -- --no-network -j 2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from . import config
+from .loader import discover
+
+HISTORY = 5
+FALLBACK_ESTIMATE = 60.0
+# Statuses whose duration says something about the case; errors usually
+# fail fast and would make the case look cheap.
+_MEASURED = {"passed", "failed", "timeout"}
+
+
+def durations_path(plan: bool = False, output_dir: Path = config.OUTPUT_DIR) -> Path:
+    return output_dir / ("plan_durations.json" if plan else "durations.json")
+
+
+def load_durations(path: Path) -> Dict[str, List[float]]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def record_durations(results: Sequence, path: Path) -> None:
+    """Append this run's durations, keeping the last :data:`HISTORY` per case."""
+    history = load_durations(path)
+    for result in results:
+        if result.status in _MEASURED:
+            runs = history.setdefault(result.case_id, [])
+            runs.append(result.duration)
+            del runs[:-HISTORY]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(history, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def estimates(case_ids: Sequence[str], history: Dict[str, List[float]]) -> Dict[str, float]:
+    known = {case: statistics.median(runs) for case, runs in history.items() if runs}
+    fallback = statistics.median(known.values()) if known else FALLBACK_ESTIMATE
+    return {case: known.get(case, fallback) for case in case_ids}
+
+
+@dataclass
+class Shard:
+    index: int
+    cases: List[str] = field(default_factory=list)
+    estimate: float = 0.0
+    status: Optional[int] = None
+    wall_time: float = 0.0
+
+
+def pack(estimated: Dict[str, float], workers: int) -> List[Shard]:
+    """Longest-processing-time-first bin packing onto ``workers`` shards."""
+    shards = [Shard(i) for i in range(max(1, min(workers, len(estimated))))]
+    heap = [(0.0, s.index) for s in shards]
+    for case in sorted(estimated, key=lambda c: (-estimated[c], c)):
+        load, index = heapq.heappop(heap)
+        shards[index].cases.append(case)
+        shards[index].estimate = load + estimated[case]
+        heapq.heappush(heap, (shards[index].estimate, index))
+    for shard in shards:
+        shard.cases.sort()
+        shard.estimate = round(shard.estimate, 1)
+    return shards
+
+
+def _case_ids(selected: Sequence[str], plan: bool) -> List[str]:
+    if plan:
+        from .plan import load_plan
+
+        return [c.case_id for c in load_plan(selected)]
+    return [c.case_id for c in discover(selected)]
+
+
+async def _run_shard(shard: Shard, worker_args: List[str], env: Dict[str, str], output_dir: Path) -> None:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "harness", *shard.cases, *worker_args,
+        cwd=str(config.SUITE_DIR),
+        env={**os.environ, **env, "HARNESS_OUTPUT_DIR": str(output_dir)},
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    with open(output_dir / "worker.log", "wb") as log:
+        async for line in process.stdout:
+            log.write(line)
+            print(f"[shard {shard.index}] {line.decode(errors='replace').rstrip()}")
+    shard.status = await process.wait()
+    shard.wall_time = round(time.perf_counter() - started, 3)
+
+
+async def _run_isolated(shard: Shard, args: argparse.Namespace, tenants: List[Dict[str, str]]) -> None:
+    """Run the shard against its own clone of the template and its own backend."""
+    from .snapshot import isolated_backend
+
+    port = args.base_port + shard.index
+    async with isolated_backend(f"harness_shard_{shard.index}", port) as (database, backend):
+        env = {**tenants[shard.index % len(tenants)], "HARNESS_API_URL": backend, "DATABASE_URL": database}
+        await _run_shard(shard, args.worker_args, env, config.OUTPUT_DIR / "shards" / str(shard.index))
+
+
+def merge_results(shards: Sequence[Shard], output_dir: Path) -> List:
+    from .runner import CaseResult
+
+    results = []
+    for shard in shards:
+        path = output_dir / "shards" / str(shard.index) / "results.json"
+        if path.exists():
+            cases = json.loads(path.read_text(encoding="utf-8"))["cases"]
+            results.extend(CaseResult(**case) for case in cases)
+    return results
+
+
+async def run(args: argparse.Namespace) -> int:
+    from . import budget
+    from .runner import print_summary, write_results
+
+    plan = "--plan" in args.worker_args
+    case_ids = _case_ids(args.cases, plan)
+    if not case_ids:
+        print("no matching cases", file=sys.stderr)
+        return 2
+    history_path = durations_path(plan)
+    shards = pack(estimates(case_ids, load_durations(history_path)), args.workers)
+    tenants = json.loads(Path(args.tenants).read_text(encoding="utf-8")) if args.tenants else [{}]
+    for shard in shards:
+        print(f"shard {shard.index}: ~{shard.estimate:.0f}s  {' '.join(shard.cases)}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _run_isolated(shard, args, tenants) if args.isolate else _run_shard(
+            shard,
+            args.worker_args,
+            tenants[shard.index % len(tenants)],
+            config.OUTPUT_DIR / "shards" / str(shard.index),
+        )
+        for shard in shards
+    ))
+    wall_time = time.perf_counter() - started
+
+    results = merge_results(shards, config.OUTPUT_DIR)
+    write_results(results, wall_time, config.OUTPUT_DIR / "results.json")
+    record_durations(results, history_path)
+    print()
+    print_summary(results, wall_time)
+    budget.print_warnings(results)
+    for shard in shards:
+        print(f"shard {shard.index}: estimated {shard.estimate:.0f}s, took {shard.wall_time:.0f}s, exit {shard.status}")
+    missing = set(case_ids) - {r.case_id for r in results}
+    if missing:
+        print(f"no result from workers for: {' '.join(sorted(missing))}", file=sys.stderr)
+        return 1
+    return 0 if all(r.ok for r in results) else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from . import budget
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    worker_args: List[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, worker_args = argv[:split], argv[split + 1:]
+    parser = argparse.ArgumentParser(
+        prog="python -m harness.shard",
+        description="Run the suite across worker processes.",
+        epilog="Arguments after -- are passed to every `python -m harness` worker.",
+    )
+    parser.add_argument("cases", nargs="*", help="case ids to run (default: all)")
+    parser.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--tenants", help="JSON list of env overrides, one per worker (round-robin)")
+    parser.add_argument("--isolate", action="store_true",
+                        help="give every shard its own template clone and backend (see harness.snapshot)")
+    parser.add_argument("--base-port", type=int, default=4100, help="backend port of shard 0 with --isolate")
+    parser.add_argument("--budgets", choices=budget.MODES, default="on",
+                        help="time budget gating in every worker, see harness.budget (default: %(default)s)")
+    parser.add_argument("--regression", type=float, default=budget.DEFAULT_REGRESSION,
+                        help="slowdown vs the median of recent runs that counts as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+    # Workers record durations in their own output directory; they judge against the shared history.
+    history = durations_path("--plan" in worker_args)
+    args.worker_args = [
+        *worker_args,
+        "--budgets", args.budgets, "--regression", str(args.regression), "--budget-history", str(history),
+    ]
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""Seeded template database, per-run clones and fast restore.
+
+The scripts mutate shared state (guest users, reservations on class 3,
+vouchers), so reruns trip over their own leftovers and cases cannot share
+one database safely. The template is built once: migrations plus
+``prisma/seed.ts`` and ``prisma/seed-multitenancy.ts``. Every isolated
+run then gets ``CREATE DATABASE ... TEMPLATE``, a file-level copy that
+takes well under a second, instead of reseeding.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.snapshot build            # (re)build the template
+    python -m harness.snapshot restore          # reset DATABASE_URL's database to the template
+    python -m harness.snapshot serve scratch1 --port 4101   # clone + backend on it until Ctrl-C
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+import psycopg
+from playwright import async_api
+from psycopg import sql
+
+from . import config, db
+from .loader import TestCase
+from .runner import CaseResult, ContextHook, SuiteRunner
+
+BACKEND_DIR = config.SUITE_DIR.parent / "backend"
+SEED_SCRIPTS = ("prisma/seed.ts", "prisma/seed-multitenancy.ts")
+
+
+def database_url(name: str, base: Optional[str] = None) -> str:
+    """``base`` (default ``DATABASE_URL``) pointing at database ``name``."""
+    parts = urlsplit(base or config.DATABASE_URL)
+    return urlunsplit(parts._replace(path="/" + name))
+
+
+def database_name(url: Optional[str] = None) -> str:
+    return urlsplit(url or config.DATABASE_URL).path.lstrip("/")
+
+
+def _admin() -> psycopg.Connection:
+    # CREATE/DROP DATABASE cannot run inside a transaction or while
+    # connected to the database in question.
+    return db.connect(database_url("postgres"), autocommit=True)
+
+
+def drop(name: str) -> None:
+    with _admin() as conn:
+        conn.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(name)))
+
+
+def clone(name: str, template: str = config.TEMPLATE_DB) -> str:
+    """Fresh copy of ``template`` as ``name`` (replacing it); returns its URL."""
+    with _admin() as conn:
+        conn.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(name)))
+        conn.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(sql.Identifier(name), sql.Identifier(template)))
+    return database_url(name)
+
+
+def restore(url: Optional[str] = None, template: str = config.TEMPLATE_DB) -> float:
+    """Reset the database behind ``url`` to the template; returns seconds taken.
+
+    Open connections (the backend's Prisma pool) are terminated; Prisma
+    reconnects on its next query.
+    """
+    started = time.perf_counter()
+    clone(database_name(url), template)
+    return time.perf_counter() - started
+
+
+def _backend(args: List[str], env: Dict[str, str]) -> None:
+    subprocess.run(["npx", *args], cwd=BACKEND_DIR, env={**os.environ, **env}, check=True)
+
+
+def build_template(template: str = config.TEMPLATE_DB) -> None:
+    """Migrate and seed ``template`` from scratch, then freeze it."""
+    with _admin() as conn:
+        exists = conn.execute("SELECT 1 FROM pg_database WHERE datname = %s", (template,)).fetchone()
+        if exists:
+            conn.execute(sql.SQL("ALTER DATABASE {} WITH is_template false").format(sql.Identifier(template)))
+        conn.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(template)))
+        conn.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(template)))
+    env = {"DATABASE_URL": database_url(template)}
+    _backend(["prisma", "migrate", "deploy"], env)
+    for script in SEED_SCRIPTS:
+        _backend(["ts-node", "--transpile-only", script], env)
+    with _admin() as conn:
+        # No connections allowed: CREATE DATABASE ... TEMPLATE fails while
+        # anyone is connected to the source.
+        conn.execute(
+            sql.SQL("ALTER DATABASE {} WITH is_template true ALLOW_CONNECTIONS false").format(sql.Identifier(template))
+        )
+
+
+class Backend:
+    """``npm run start:dev`` on its own port and database."""
+
+    def __init__(self, database: str, port: int, env: Optional[Dict[str, str]] = None) -> None:
+        self.url = f"http://localhost:{port}"
+        self.env = {**(env or {}), "DATABASE_URL": database, "PORT": str(port)}
+        self.process: Optional[asyncio.subprocess.Process] = None
+
+    async def start(self, timeout: float = 90.0) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            "npm", "run", "start:dev",
+            cwd=str(BACKEND_DIR),
+            env={**os.environ, **self.env},
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient(timeout=2.0) as client:
+            while time.monotonic() < deadline:
+                if self.process.returncode is not None:
+                    raise RuntimeError(f"backend on {self.url} exited with {self.process.returncode}")
+                try:
+                    if (await client.get(self.url + "/health")).status_code == 200:
+                        return
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.5)
+        await self.stop()
+        raise RuntimeError(f"backend on {self.url} not healthy after {timeout:.0f}s")
+
+    async def stop(self) -> None:
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), 10)
+            except asyncio.TimeoutError:
+                self.process.kill()
+        self.process = None
+
+
+@asynccontextmanager
+async def isolated_backend(name: str, port: int, template: str = config.TEMPLATE_DB) -> AsyncIterator[Tuple[str, str]]:
+    """Clone ``template`` as ``name``, run a backend on it, drop both afterwards.
+
+    Yields ``(database_url, backend_url)``.
+    """
+    url = await asyncio.to_thread(clone, name, template)
+    backend = Backend(url, port)
+    try:
+        await backend.start()
+        yield url, backend.url
+    finally:
+        await backend.stop()
+        await asyncio.to_thread(drop, name)
+
+
+class RestoreHook(ContextHook):
+    """Resets ``DATABASE_URL``'s database to the template.
+
+    Once before the run, and with ``per_case`` after every case as well
+    (which only makes sense with ``-j 1``).
+    """
+
+    def __init__(self, per_case: bool = False) -> None:
+        self.per_case = per_case
+        self.restores: List[float] = []
+
+    async def start(self, runner: SuiteRunner) -> None:
+        self.restores.append(await asyncio.to_thread(restore))
+
+    async def on_finish(
+        self, case: TestCase, context: async_api.BrowserContext, result: CaseResult
+    ) -> None:
+        if self.per_case and "db_restore" not in result.extras:
+            seconds = await asyncio.to_thread(restore)
+            self.restores.append(seconds)
+            result.extras["db_restore"] = round(seconds, 3)
+
+    async def stop(self, runner: SuiteRunner) -> None:
+        print(f"database restored {len(self.restores)}x, {sum(self.restores):.2f}s total")
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    async with isolated_backend(args.name, args.port) as (url, backend_url):
+        print(f"{backend_url} on {url} (Ctrl-C to drop)")
+        await asyncio.Event().wait()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.snapshot", description="Template database tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="migrate and seed the template from scratch")
+    sub.add_parser("restore", help="reset DATABASE_URL's database to the template")
+    for name in ("clone", "drop"):
+        sub.add_parser(name).add_argument("name")
+    serve = sub.add_parser("serve", help="clone NAME and run a backend on it until interrupted")
+    serve.add_argument("name")
+    serve.add_argument("--port", type=int, default=4100)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        build_template()
+        print(f"template {config.TEMPLATE_DB} built in {time.perf_counter() - started:.1f}s")
+    elif args.command == "restore":
+        print(f"{database_name()} restored in {restore():.2f}s")
+    elif args.command == "clone":
+        print(clone(args.name))
+    elif args.command == "drop":
+        drop(args.name)
+    else:
+        try:
+            asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
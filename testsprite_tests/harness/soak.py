@@ -0,0 +1,328 @@
+"""Long-running soak test: backend memory and event-loop lag under mixed load.
+
+A weighted mix of reads and writes runs at ``--rate`` requests/s (Poisson
+arrivals) for ``--duration``. It includes the endpoints that load whole
+result sets (``GET /classes/calendar/all``, ``GET /stats/dashboard``), and
+guest checkouts that are canceled again so capacity never runs out.
+Every ``--interval`` a sample is taken:
+
+- RSS, peak RSS and open file descriptors of the Node process from
+  ``/proc/<pid>`` (found through the socket listening on the backend port,
+  or ``--pid``);
+- ``process.memoryUsage()`` as reported by ``GET /health``;
+- event-loop lag: ``GET /`` does no I/O, so anything it takes beyond the
+  fastest observed round trip is time spent queued behind other work.
+
+A metric is flagged as growing when the floor of every window of the run
+(after ``--warmup``) is at least the floor of the window before it, and
+the total rise is above ``--min-growth``. Windows are compared by their
+minimum so GC sawtooth does not count as growth. The report is rewritten
+after every sample, so an interrupted run still leaves its series.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.soak --duration 2h --rate 20
+    python -m harness.soak --duration 20m --pid 4242 --interval 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from surfapi import timing_of
+
+from . import config
+from .api import ApiError, BackendApi
+from .bench import login_all
+from .seed import DEFAULT_CLASS_ID, Seeder, unique_email
+from .stats import percentile
+
+GROWTH_METRICS = ("rss_mb", "heap_used_mb", "external_mb", "fds")
+WINDOWS = 6
+
+
+def duration(value: str) -> float:
+    """``90``, ``45s``, ``20m`` or ``2h`` as seconds."""
+    units = {"s": 1, "m": 60, "h": 3600}
+    if value[-1:] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def pid_for_port(port: int) -> Optional[int]:
+    """Pid of the process holding the listening socket on ``port`` (Linux only)."""
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    # st 0A is LISTEN
+                    if fields[3] == "0A" and int(fields[1].rsplit(":", 1)[1], 16) == port:
+                        inodes.add(fields[9])
+        except FileNotFoundError:
+            continue
+    if not inodes:
+        return None
+    targets = {f"socket:[{inode}]" for inode in inodes}
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            for fd in os.listdir(f"/proc/{pid}/fd"):
+                if os.readlink(f"/proc/{pid}/fd/{fd}") in targets:
+                    return int(pid)
+        except OSError:
+            continue
+    return None
+
+
+def proc_memory(pid: int) -> Dict[str, float]:
+    """RSS and peak RSS (MB) and open descriptors of ``pid``."""
+    values: Dict[str, float] = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                values["rss_mb" if key == "VmRSS" else "peak_rss_mb"] = round(int(rest.split()[0]) / 1024, 1)
+    values["fds"] = len(os.listdir(f"/proc/{pid}/fd"))
+    return values
+
+
+@dataclass
+class Sample:
+    t: float
+    rss_mb: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    fds: Optional[float] = None
+    heap_used_mb: Optional[float] = None
+    heap_total_mb: Optional[float] = None
+    external_mb: Optional[float] = None
+    lag_p50_ms: Optional[float] = None
+    lag_p99_ms: Optional[float] = None
+    lag_max_ms: Optional[float] = None
+    requests: int = 0
+    errors: int = 0
+
+
+def growth(series: List[Tuple[float, float]], min_growth: float) -> Dict[str, Any]:
+    """Slope per hour and whether the windowed floors only ever went up."""
+    if len(series) < WINDOWS * 2:
+        return {"samples": len(series), "growing": False}
+    size = len(series) // WINDOWS
+    floors = [min(v for _, v in series[i * size:(i + 1) * size]) for i in range(WINDOWS)]
+    ts = [t for t, _ in series]
+    vs = [v for _, v in series]
+    mean_t, mean_v = statistics.fmean(ts), statistics.fmean(vs)
+    var_t = sum((t - mean_t) ** 2 for t in ts)
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in series) / var_t if var_t else 0.0
+    rise = floors[-1] - floors[0]
+    monotonic = all(b >= a for a, b in zip(floors, floors[1:]))
+    return {
+        "samples": len(series),
+        "window_floors": [round(f, 2) for f in floors],
+        "slope_per_hour": round(slope * 3600, 2),
+        "growing": monotonic and floors[0] > 0 and rise / floors[0] > min_growth,
+    }
+
+
+class Soak:
+    def __init__(self, api: BackendApi, tokens: Dict[str, str], pid: Optional[int], slots: int = 30) -> None:
+        self.api = api
+        self.tokens = tokens
+        self.seeder = Seeder(api)
+        self.pid = pid
+        first = date.today() + timedelta(days=7)
+        self.dates = [first + timedelta(days=n) for n in range(max(1, slots))]
+        self.outcomes: Counter = Counter()
+        self._n = 0
+        self._window = (0, 0)
+        self._baseline_rtt = float("inf")
+        today = date.today()
+        self.mix: List[Tuple[str, float, Callable[[], Awaitable[Any]]]] = [
+            ("GET /classes", 30, lambda: self.api.get("/classes", params=self._class_query(), token="")),
+            ("GET /classes/:id/calendar", 15, lambda: self.api.get(f"/classes/{DEFAULT_CLASS_ID}/calendar", token="")),
+            ("GET /classes/calendar/all", 10, lambda: self.api.get(
+                "/classes/calendar/all",
+                params={"start": today.isoformat(), "end": (today + timedelta(days=60)).isoformat()},
+                token=self.tokens["school_admin"],
+            )),
+            ("GET /stats/dashboard", 10, lambda: self.api.get(
+                "/stats/dashboard", token=self.tokens[random.choice(("admin", "school_admin"))]
+            )),
+            ("GET /reservations", 10, lambda: self.api.get("/reservations", token=self.tokens["student"])),
+            ("GET /notifications", 5, lambda: self.api.get("/notifications", token=self.tokens["student"])),
+            ("POST+PUT /reservations", 20, self._checkout_and_cancel),
+        ]
+        self._weights = [weight for _, weight, _ in self.mix]
+
+    def _class_query(self) -> Dict[str, str]:
+        return random.choice((
+            {},
+            {"q": "surf"},
+            {"date": (date.today() + timedelta(days=random.randrange(28))).isoformat()},
+            {"level": "BEGINNER", "locality": "Lima"},
+        ))
+
+    async def _checkout_and_cancel(self) -> None:
+        self._n += 1
+        created = await self.seeder.guest_reservation(
+            on=self.dates[self._n % len(self.dates)], email=unique_email("soak")
+        )
+        await self.api.put(f"/reservations/{created['id']}", {"status": "CANCELED"}, token=created["token"])
+
+    async def _one(self) -> None:
+        name, _, call = random.choices(self.mix, weights=self._weights)[0]
+        try:
+            await call()
+            self.outcomes[name, "ok"] += 1
+        except (ApiError, httpx.HTTPError, asyncio.TimeoutError) as exc:
+            status = exc.status if isinstance(exc, ApiError) else type(exc).__name__
+            self.outcomes[name, str(status)] += 1
+
+    async def load(self, rate: float, until: float, max_in_flight: int = 256) -> None:
+        tasks = set()
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        while next_at < until:
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+            next_at += random.expovariate(rate)
+            if len(tasks) >= max_in_flight:
+                self.outcomes["dropped", "client"] += 1
+                continue
+            task = asyncio.ensure_future(self._one())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def lag(self, probes: int, spacing: float) -> List[float]:
+        """Round trips of ``GET /`` minus the fastest one ever seen."""
+        rtts = []
+        for _ in range(probes):
+            try:
+                response = await self.api.send("GET", "/", token="")
+            except httpx.HTTPError:
+                continue
+            rtts.append(timing_of(response).elapsed_ms)
+            await asyncio.sleep(spacing)
+        if rtts:
+            self._baseline_rtt = min(self._baseline_rtt, *rtts)
+        return [rtt - self._baseline_rtt for rtt in rtts]
+
+    async def sample(self, elapsed: float, interval: float) -> Sample:
+        lags = await self.lag(probes=10, spacing=interval / 40)
+        sample = Sample(t=round(elapsed, 1))
+        if lags:
+            sample.lag_p50_ms = round(percentile(lags, 50), 2)
+            sample.lag_p99_ms = round(percentile(lags, 99), 2)
+            sample.lag_max_ms = round(max(lags), 2)
+        if self.pid:
+            try:
+                for key, value in proc_memory(self.pid).items():
+                    setattr(sample, key, value)
+            except OSError:
+                self.pid = None  # the process went away; keep sampling /health
+        try:
+            memory = (await self.api.get("/health", token=""))["memory"]
+            sample.heap_used_mb = round(memory["heapUsed"] / 1048576, 1)
+            sample.heap_total_mb = round(memory["heapTotal"] / 1048576, 1)
+            sample.external_mb = round(memory["external"] / 1048576, 1)
+            if sample.rss_mb is None:
+                sample.rss_mb = round(memory["rss"] / 1048576, 1)
+        except (ApiError, httpx.HTTPError, KeyError):
+            pass
+        total = sum(self.outcomes.values())
+        errors = total - sum(v for (_, kind), v in self.outcomes.items() if kind == "ok")
+        sample.requests, sample.errors = total - self._window[0], errors - self._window[1]
+        self._window = (total, errors)
+        return sample
+
+
+def build_report(args: argparse.Namespace, soak: Soak, samples: List[Sample]) -> Dict[str, Any]:
+    steady = [s for s in samples if s.t >= args.warmup]
+    report: Dict[str, Any] = {
+        "target": config.API_URL,
+        "pid": soak.pid,
+        "rate": args.rate,
+        "interval": args.interval,
+        "warmup": args.warmup,
+        "outcomes": {f"{name} {kind}": n for (name, kind), n in sorted(soak.outcomes.items())},
+        "growth": {},
+        "samples": [asdict(s) for s in samples],
+    }
+    for metric in GROWTH_METRICS:
+        series = [(s.t, getattr(s, metric)) for s in steady if getattr(s, metric) is not None]
+        report["growth"][metric] = growth(series, args.min_growth)
+    lags = [s.lag_p99_ms for s in steady if s.lag_p99_ms is not None]
+    report["lag_p99_ms"] = {"median": round(statistics.median(lags), 2) if lags else None,
+                            "max": max(lags, default=None)}
+    return report
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    pid = args.pid or pid_for_port(urlsplit(config.API_URL).port or 80)
+    if pid is None:
+        print("backend process not found; sampling /health only", file=sys.stderr)
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    async with BackendApi(pool_size=args.connections, timeout=args.request_timeout) as api:
+        soak = Soak(api, await login_all(api, ("student", "school_admin", "admin")), pid)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        load = asyncio.ensure_future(soak.load(args.rate, started + args.duration))
+        samples: List[Sample] = []
+        try:
+            while not load.done():
+                samples.append(await soak.sample(loop.time() - started, args.interval))
+                s = samples[-1]
+                print(
+                    f"{s.t:8.0f}s  rss {s.rss_mb or 0:7.1f}MB  heap {s.heap_used_mb or 0:6.1f}MB  fds {s.fds or 0:4.0f}"
+                    f"  lag p99 {s.lag_p99_ms or 0:6.1f}ms  {s.requests} req  {s.errors} err",
+                    flush=True,
+                )
+                report = build_report(args, soak, samples)
+                output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+                await asyncio.wait([load], timeout=max(0.0, args.interval - (loop.time() - started - s.t)))
+        finally:
+            load.cancel()
+    return build_report(args, soak, samples)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.soak", description="Backend memory and event-loop soak.")
+    parser.add_argument("--duration", type=duration, default=duration("1h"), help="e.g. 900, 30m, 4h")
+    parser.add_argument("--rate", type=float, default=10, help="offered requests/s of the mixed workload")
+    parser.add_argument("--interval", type=float, default=15, help="seconds between samples")
+    parser.add_argument("--warmup", type=duration, default=duration("5m"),
+                        help="samples before this are kept but not used for growth detection")
+    parser.add_argument("--min-growth", type=float, default=0.1,
+                        help="relative rise of the window floors that counts as growth (0.1 = 10%%)")
+    parser.add_argument("--pid", type=int, help="Node process to sample (default: owner of the backend port)")
+    parser.add_argument("--connections", type=int, default=32, help="HTTP connection pool size")
+    parser.add_argument("--request-timeout", type=float, default=30)
+    parser.add_argument("--output", default=str(config.OUTPUT_DIR / "soak.json"))
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    growing = [metric for metric, g in report["growth"].items() if g["growing"]]
+    for metric, g in report["growth"].items():
+        print(f"{metric:<14} {g.get('slope_per_hour', 0):+9.2f}/h  floors {g.get('window_floors', [])}"
+              + ("  <- monotonic growth" if g["growing"] else ""))
+    return 1 if growing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,454 @@
+"""Shared step library for the data-driven plan runner.
+
+``testsprite_frontend_test_plan.json`` describes every case as free-text
+``action``/``assertion`` steps. Each step definition here is registered
+with a regular expression; :meth:`StepLibrary.resolve` matches a step
+description against them once and caches the result, so a plan of any
+size is bound to code at load time.
+
+Steps locate elements by role, label and text instead of the absolute
+XPaths of the generated scripts. :meth:`StepContext.find` resolves a
+named locator once per page state (it is invalidated whenever the main
+frame navigates) and reuses it for every later step on that page.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from playwright import async_api
+from playwright.async_api import expect
+
+from . import config
+from .api import ApiError, BackendApi
+from .loadgen import CAPACITY_MESSAGE
+from .seed import DEFAULT_CLASS_ID, DEFAULT_TIME, Seeder, unique_email
+from .waits import Waiter
+
+StepFunc = Callable[..., Awaitable[None]]
+LocatorFactory = Callable[[async_api.Page], async_api.Locator]
+
+
+class UndefinedStep(LookupError):
+    """No step definition matches a plan step."""
+
+
+@dataclass(frozen=True)
+class StepDef:
+    pattern: "re.Pattern[str]"
+    func: StepFunc
+
+    @property
+    def name(self) -> str:
+        return self.func.__name__
+
+
+class StepLibrary:
+    def __init__(self) -> None:
+        self.definitions: List[StepDef] = []
+        self._resolved: Dict[str, Optional[Tuple[StepDef, Dict[str, str]]]] = {}
+
+    def step(self, pattern: str) -> Callable[[StepFunc], StepFunc]:
+        """Register ``func`` for descriptions matching ``pattern`` (case-insensitive)."""
+
+        def register(func: StepFunc) -> StepFunc:
+            self.definitions.append(StepDef(re.compile(pattern, re.IGNORECASE), func))
+            self._resolved.clear()
+            return func
+
+        return register
+
+    def resolve(self, description: str) -> Tuple[StepDef, Dict[str, str]]:
+        key = " ".join(description.split())
+        if key not in self._resolved:
+            self._resolved[key] = None
+            for definition in self.definitions:
+                match = definition.pattern.search(key)
+                if match:
+                    groups = {k: v for k, v in match.groupdict().items() if v is not None}
+                    self._resolved[key] = (definition, groups)
+                    break
+        found = self._resolved[key]
+        if found is None:
+            raise UndefinedStep(description)
+        return found
+
+
+LIBRARY = StepLibrary()
+step = LIBRARY.step
+
+
+class StepContext:
+    """State shared by the steps of one plan case."""
+
+    def __init__(self, browser: Any, waits: Optional[Waiter] = None) -> None:
+        self.browser = browser
+        self.waits = waits or Waiter()
+        self.context: Any = None
+        self.page: Optional[async_api.Page] = None
+        self.data: Dict[str, Any] = {}
+        self._api: Optional[BackendApi] = None
+        self._seeder: Optional[Seeder] = None
+        self._generation = 0
+        self._locators: Dict[str, async_api.Locator] = {}
+
+    async def open(self) -> async_api.Page:
+        if self.page is None:
+            self.context = await self.browser.new_context()
+            self.page = await self.context.new_page()
+            self.page.on("framenavigated", self._on_navigated)
+        return self.page
+
+    def _on_navigated(self, frame: async_api.Frame) -> None:
+        if self.page is not None and frame == self.page.main_frame:
+            self._generation += 1
+            self._locators.clear()
+
+    async def find(self, name: str, *candidates: LocatorFactory) -> async_api.Locator:
+        """First candidate present on the current page, cached until the next navigation.
+
+        With several candidates the choice costs one ``count()`` each; the
+        winner is reused by every later step until the page changes.
+        """
+        if name in self._locators:
+            return self._locators[name]
+        page = await self.open()
+        generation = self._generation
+        chosen = candidates[0](page).first
+        if len(candidates) > 1:
+            await self.waits.network_idle()
+            for factory in candidates:
+                locator = factory(page).first
+                if await locator.count():
+                    chosen = locator
+                    break
+        if generation == self._generation:
+            self._locators[name] = chosen
+        return chosen
+
+    async def goto(self, path: str) -> async_api.Page:
+        page = await self.open()
+        await page.goto(config.FRONTEND_URL + path, wait_until="domcontentloaded")
+        await self.waits.network_idle()
+        return page
+
+    async def click(self, name: str, *candidates: LocatorFactory) -> None:
+        locator = await self.find(name, *candidates)
+        await self.waits.actionable(locator, "click")
+        await locator.click()
+        await self.waits.network_idle()
+
+    async def fill(self, name: str, value: str, *candidates: LocatorFactory) -> None:
+        locator = await self.find(name, *candidates)
+        await self.waits.actionable(locator, "fill")
+        await locator.fill(value)
+
+    async def seeder(self) -> Seeder:
+        if self._seeder is None:
+            self._api = BackendApi()
+            await self._api.__aenter__()
+            self._seeder = Seeder(self._api)
+        return self._seeder
+
+    async def close(self) -> None:
+        if self._api is not None:
+            await self._api.__aexit__(None, None, None)
+            self._api = self._seeder = None
+        if self.context is not None:
+            await self.context.close()
+
+
+# -- role words used in the plan ------------------------------------------------
+
+_ROLES = (
+    ("super admin", "superadmin"),
+    ("school admin", "school_admin"),
+    ("admin of school", "school_admin"),
+    ("instructor", "instructor"),
+    ("student", "student"),
+    ("user", "student"),
+)
+DASHBOARDS = {
+    "superadmin": "/dashboard/admin",
+    "school_admin": "/dashboard/school",
+    "instructor": "/dashboard/instructor",
+    "student": "/dashboard/student/profile",
+}
+
+
+def role_for(words: str) -> str:
+    words = words.lower()
+    for phrase, role in _ROLES:
+        if phrase in words:
+            return role
+    raise UndefinedStep(f"no role matches {words!r}")
+
+
+# -- locators -------------------------------------------------------------------
+
+def _class_links(page: async_api.Page) -> async_api.Locator:
+    return page.locator('a[href^="/classes/"]')
+
+
+def _reserve_button(page: async_api.Page) -> async_api.Locator:
+    return page.get_by_role("button", name=re.compile(r"^Reservar ahora", re.I))
+
+
+def _next_button(page: async_api.Page) -> async_api.Locator:
+    return page.get_by_role("button", name=re.compile(r"^Siguiente"))
+
+
+def _confirm_button(page: async_api.Page) -> async_api.Locator:
+    return page.get_by_role("button", name=re.compile(r"^Confirmar Reserva"))
+
+
+# -- navigation and login -------------------------------------------------------
+
+@step(r"^navigate to the home page")
+async def home_page(ctx: StepContext) -> None:
+    await ctx.goto("/")
+
+
+@step(r"^navigate to the class listing page")
+async def class_listing(ctx: StepContext) -> None:
+    await ctx.goto("/classes")
+
+
+@step(r"(list of surf classes is visible|surf classes are listed)")
+async def classes_listed(ctx: StepContext) -> None:
+    await expect(await ctx.find("class links", _class_links)).to_be_visible()
+
+
+@step(r"^click on a surf class")
+async def open_class(ctx: StepContext) -> None:
+    await ctx.click("class links", _class_links)
+    await expect(ctx.page).to_have_url(re.compile(r"/classes/\d+"))
+
+
+@step(r"^confirm detailed class information is shown")
+async def class_details(ctx: StepContext) -> None:
+    await expect(await ctx.find("reserve", _reserve_button)).to_be_visible()
+
+
+@step(r"^login as (?P<who>.+?)(?: with valid credentials)?(?: and navigate to (?P<where>dashboard|.*payment section))?$")
+async def login(ctx: StepContext, who: str, where: Optional[str] = None) -> None:
+    role = role_for(who)
+    email, password = config.ROLE_CREDENTIALS[role]
+    page = await ctx.open()
+    await ctx.context.clear_cookies()
+    await ctx.goto("/login")
+    await ctx.fill("login email", email, lambda p: p.locator("#email"))
+    await ctx.fill("login password", password, lambda p: p.locator("#password"))
+    await ctx.click("login submit", lambda p: p.locator('button[type="submit"]'))
+    await expect(page).not_to_have_url(re.compile(r"/login"))
+    ctx.data["role"] = role
+    if where == "dashboard":
+        await ctx.goto(DASHBOARDS[role])
+    elif where:
+        await ctx.goto("/reservations")
+
+
+@step(r"^navigate to (?:the )?(?P<who>\w+) dashboard")
+async def role_dashboard(ctx: StepContext, who: str) -> None:
+    await ctx.goto(DASHBOARDS[role_for(who)])
+
+
+# -- booking flow ---------------------------------------------------------------
+
+@step(r"(open the booking modal|booking modal as guest|start booking a surf class|begin booking as guest)")
+async def open_booking(ctx: StepContext) -> None:
+    await ctx.goto(f"/classes/{DEFAULT_CLASS_ID}")
+    await ctx.click("reserve", _reserve_button)
+    await expect(ctx.page.locator("#name")).to_be_visible()
+
+
+@step(r"^choose a session date and time")
+async def choose_session(ctx: StepContext) -> None:
+    # The modal opens on the first available session; nothing to change
+    # unless the class page offers a session picker and the modal is closed.
+    page = await ctx.open()
+    if await page.locator("#name").count():
+        return
+    picker = page.locator("select").first
+    if await picker.count():
+        await picker.select_option(index=0)
+        await ctx.waits.network_idle()
+
+
+@step(r"(enter participant information|entering participant details|enter partial participant info)")
+async def participant_details(ctx: StepContext) -> None:
+    page = await ctx.open()
+    if not await page.locator("#name").count():
+        await open_booking(ctx)
+    email = ctx.data.setdefault("email", unique_email("plan"))
+    await ctx.fill("name", "Invitado Plan", lambda p: p.locator("#name"))
+    email_input = page.locator("#email")
+    if await email_input.is_editable():
+        await email_input.fill(email)
+    await ctx.fill("age", "25", lambda p: p.locator("#age"))
+    await ctx.click("next", _next_button)
+    await ctx.fill("height", "170", lambda p: p.locator("#height"))
+    await ctx.fill("weight", "70", lambda p: p.locator("#weight"))
+    await ctx.click("next", _next_button)
+
+
+@step(r"^navigate away from booking modal")
+async def leave_booking(ctx: StepContext) -> None:
+    await ctx.goto("/classes")
+
+
+@step(r"^return to booking modal")
+async def return_to_booking(ctx: StepContext) -> None:
+    await open_booking(ctx)
+
+
+@step(r"previously entered details are persisted")
+async def booking_persisted(ctx: StepContext) -> None:
+    await expect(ctx.page.locator("#name")).to_have_value("Invitado Plan")
+
+
+@step(r"(apply valid discount code|enter a valid discount code)")
+async def apply_discount(ctx: StepContext) -> None:
+    page = await ctx.open()
+    if not await page.get_by_placeholder("CODIGO2026").count():
+        await participant_details(ctx)
+    code = (await (await ctx.seeder()).discount_code(percentage=10))["code"]
+    ctx.data["discount_code"] = code
+    await ctx.fill("discount code", code, lambda p: p.get_by_placeholder("CODIGO2026"))
+    await ctx.click("apply discount", lambda p: p.get_by_role("button", name="Aplicar"))
+    await expect(ctx.page.get_by_text("Descuento", exact=True)).to_be_visible()
+
+
+@step(r"^confirm discount .* applied")
+async def discount_applied(ctx: StepContext) -> None:
+    await expect(ctx.page.get_by_text("Descuento", exact=True)).to_be_visible()
+
+
+@step(r"^(submit booking request|submit guest booking|proceed to complete booking|create a new reservation)")
+async def submit_booking(ctx: StepContext) -> None:
+    page = await ctx.open()
+    if not await page.locator("#name").count() and not await _confirm_button(page).count():
+        await participant_details(ctx)
+    button = await ctx.find("confirm", _confirm_button)
+    await ctx.waits.actionable(button, "click")
+    async with page.expect_response(
+        lambda r: r.request.method == "POST" and r.url.rstrip("/").endswith("/reservations")
+    ) as info:
+        await button.click()
+    response = await info.value
+    ctx.data["reservation_status"] = response.status
+    ctx.data["reservation"] = await response.json() if response.ok else None
+    await ctx.waits.network_idle()
+
+
+@step(r"^check booking confirmation page")
+async def confirmation_page(ctx: StepContext) -> None:
+    assert ctx.data.get("reservation"), f"booking failed with HTTP {ctx.data.get('reservation_status')}"
+    await expect(ctx.page).to_have_url(re.compile(r"/reservations"))
+
+
+@step(r"^check response for successful reservation and newly created user account token")
+async def guest_token(ctx: StepContext) -> None:
+    body = ctx.data.get("reservation") or {}
+    assert body.get("token"), f"guest checkout returned no token (HTTP {ctx.data.get('reservation_status')})"
+
+
+@step(r"reservation (appears in|is visible in) user's reservations")
+async def reservation_listed(ctx: StepContext) -> None:
+    await ctx.goto("/reservations")
+    await expect(await ctx.find("reservation links", lambda p: p.locator('a[href^="/reservations/"]'))).to_be_visible()
+
+
+@step(r"^attempt guest booking using an email already associated")
+async def guest_existing_email(ctx: StepContext) -> None:
+    ctx.data["email"] = config.ROLE_CREDENTIALS["student"][0]
+    await open_booking(ctx)
+    # The modal opens on the empty form, which submit_booking would leave as is.
+    await participant_details(ctx)
+    await submit_booking(ctx)
+
+
+@step(r"returns conflict or specific error code")
+async def conflict_returned(ctx: StepContext) -> None:
+    status = ctx.data.get("reservation_status")
+    assert status == 409, f"expected HTTP 409 for an existing email, got {status}"
+
+
+@step(r"^no duplicate user account is created")
+async def single_account(ctx: StepContext) -> None:
+    from . import db  # psycopg is only needed by database-side steps
+
+    with db.connect() as conn:
+        (count,) = conn.execute("SELECT count(*) FROM users WHERE email = %s", (ctx.data["email"],)).fetchone()
+    assert count == 1, f"{count} accounts share {ctx.data['email']}"
+
+
+_EMAIL_CATEGORIES = {
+    "welcome": "WELCOME",
+    "reservation confirmation": "RESERVATION_CONFIRMED",
+    "cancellation": "RESERVATION_CANCELLED",
+    "payment receipt": "PAYMENT_RECEIVED",
+}
+
+
+@step(r"(?P<kind>welcome|reservation confirmation|cancellation|payment receipt) email\b.*\bis (sent|received)")
+async def email_sent(ctx: StepContext, kind: str) -> None:
+    """Ask the Resend stand-in (``python -m harness.mailbox serve``) for the email."""
+    params = {"to": ctx.data["email"], "category": _EMAIL_CATEGORIES[kind.lower()], "wait": 10}
+    async with BackendApi(config.MAILBOX_URL) as mailbox:
+        messages = await mailbox.get("/_harness/messages", params=params)
+    assert messages, f"no {kind} email for {ctx.data['email']}"
+    ctx.data.setdefault("emails", []).extend(messages)
+
+
+# -- access control -------------------------------------------------------------
+
+@step(r"^confirm student .* cannot access admin controls")
+async def student_denied_admin(ctx: StepContext) -> None:
+    await ctx.goto("/dashboard/admin")
+    await expect(ctx.page).not_to_have_url(re.compile(r"/dashboard/admin"))
+
+
+@step(r"^attempt to access .*(school b|school y)")
+async def other_school(ctx: StepContext) -> None:
+    # School admins are confined to /dashboard/school; the admin area lists every school.
+    await ctx.goto("/dashboard/admin/schools")
+
+
+@step(r"access is denied or data is (not returned|not visible)")
+async def access_denied(ctx: StepContext) -> None:
+    await expect(ctx.page).not_to_have_url(re.compile(r"/dashboard/admin"))
+
+
+# -- capacity -------------------------------------------------------------------
+
+@step(r"^identify a class session with participant limit reached")
+async def full_session(ctx: StepContext) -> None:
+    seeder = await ctx.seeder()
+    # Far enough ahead that no other case books the same slot.
+    slot = {"class_id": DEFAULT_CLASS_ID, "on": date.today() + timedelta(days=90), "time": DEFAULT_TIME}
+    for _ in range(100):
+        try:
+            await seeder.guest_reservation(**slot)
+        except ApiError as exc:
+            if isinstance(exc.body, dict) and exc.body.get("message") == CAPACITY_MESSAGE:
+                ctx.data["full_slot"] = slot
+                return
+            raise
+    raise AssertionError("slot still accepts bookings after 100 reservations")
+
+
+@step(r"^attempt to create a new reservation for this session")
+async def book_full_session(ctx: StepContext) -> None:
+    try:
+        ctx.data["overbook"] = await (await ctx.seeder()).guest_reservation(**ctx.data["full_slot"])
+    except ApiError as exc:
+        ctx.data["overbook"] = exc
+
+
+@step(r"returns appropriate error preventing booking")
+async def overbook_rejected(ctx: StepContext) -> None:
+    outcome = ctx.data.get("overbook")
+    assert isinstance(outcome, ApiError) and outcome.status == 400, f"full session accepted a booking: {outcome!r}"
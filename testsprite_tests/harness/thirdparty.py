@@ -0,0 +1,136 @@
+"""Blocking and stubbing of third-party origins during runs.
+
+The class page embeds Google Maps, login offers Google OAuth, images come
+from Cloudinary and the layout loads analytics. On an offline CI box each
+of those hangs until timeout. :class:`ThirdPartyHook` intercepts them per
+context and either aborts them (``block``) or answers with a minimal local
+response of the right type (``stub``). Groups can be let through per case,
+and every intercepted request is counted in the case results.
+"""
+from __future__ import annotations
+
+import base64
+from collections import Counter
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from playwright import async_api
+
+from .loader import TestCase
+from .runner import CaseResult, ContextHook, SuiteRunner
+
+OFF = "off"
+BLOCK = "block"
+STUB = "stub"
+MODES = (OFF, BLOCK, STUB)
+
+
+@dataclass(frozen=True)
+class Group:
+    name: str
+    hosts: Tuple[str, ...]
+    path_prefix: str = ""
+
+    def matches(self, host: str, path: str) -> bool:
+        if not any(host == h or host.endswith("." + h) for h in self.hosts):
+            return False
+        return path.startswith(self.path_prefix)
+
+
+GROUPS = (
+    Group("maps", ("maps.google.com", "maps.googleapis.com", "maps.gstatic.com")),
+    Group("maps", ("www.google.com",), "/maps"),
+    Group("google_oauth", ("accounts.google.com", "oauth2.googleapis.com", "apis.google.com")),
+    Group("cloudinary", ("cloudinary.com",)),
+    Group("analytics", (
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "vercel-insights.com",
+        "connect.facebook.net",
+        "hotjar.com",
+    )),
+)
+GROUP_NAMES = tuple(sorted({g.name for g in GROUPS}))
+
+_PIXEL = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+_STUBS: Dict[str, Tuple[str, bytes]] = {
+    "document": ("text/html", b"<!doctype html><title>stub</title>"),
+    "script": ("application/javascript", b""),
+    "stylesheet": ("text/css", b""),
+    "image": ("image/png", _PIXEL),
+    "xhr": ("application/json", b"{}"),
+    "fetch": ("application/json", b"{}"),
+}
+
+
+def group_for(url: str) -> Optional[str]:
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    for group in GROUPS:
+        if group.matches(host, parts.path):
+            return group.name
+    return None
+
+
+def interceptor(
+    mode: str, allowed: Iterable[str] = (), on_hit: Optional[Callable[[str], None]] = None
+) -> Tuple[Callable[[str], bool], Callable[[async_api.Route], Awaitable[None]]]:
+    """``(url matcher, handler)`` for ``context.route`` applying ``mode`` to every group not in ``allowed``.
+
+    ``on_hit`` receives ``"<mode>:<group>"`` for each intercepted request.
+    """
+    allowed = set(allowed)
+
+    def intercepted(url: str) -> bool:
+        group = group_for(url)
+        return group is not None and group not in allowed
+
+    async def handle(route: async_api.Route) -> None:
+        request = route.request
+        if on_hit is not None:
+            on_hit(f"{mode}:{group_for(request.url)}")
+        if mode == BLOCK:
+            await route.abort("blockedbyclient")
+            return
+        content_type, body = _STUBS.get(request.resource_type, ("text/plain", b""))
+        await route.fulfill(status=200, content_type=content_type, body=body)
+
+    return intercepted, handle
+
+
+class ThirdPartyHook(ContextHook):
+    """Applies ``mode`` to every third-party group not allowed for the case."""
+
+    def __init__(self, mode: str = STUB, allow: Optional[Mapping[str, Iterable[str]]] = None) -> None:
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.mode = mode
+        self.allow = {case.upper(): set(groups) for case, groups in (allow or {}).items()}
+        self.counts: Dict[str, Counter] = {}
+        self.totals: Counter = Counter()
+
+    async def on_context(self, case: TestCase, context: async_api.BrowserContext) -> None:
+        if self.mode == OFF:
+            return
+        counts = self.counts.setdefault(case.case_id, Counter())
+
+        def hit(key: str) -> None:
+            counts[key] += 1
+            self.totals[key] += 1
+
+        await context.route(*interceptor(self.mode, self.allow.get(case.case_id, ()), hit))
+
+    async def on_finish(
+        self, case: TestCase, context: async_api.BrowserContext, result: CaseResult
+    ) -> None:
+        counts = self.counts.pop(case.case_id, None)
+        if counts is not None:
+            result.extras["third_party"] = dict(counts)
+
+    async def stop(self, runner: SuiteRunner) -> None:
+        if self.totals:
+            print("third-party: " + ", ".join(f"{k}={v}" for k, v in sorted(self.totals.items())))
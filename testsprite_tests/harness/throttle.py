@@ -0,0 +1,266 @@
+"""The guest booking flow on ``/classes/3`` under mobile network and CPU profiles.
+
+Each profile pairs a Playwright device (viewport, user agent, touch) with
+CDP throttling applied to the page before it navigates:
+``Network.emulateNetworkConditions`` for latency and bandwidth and
+``Emulation.setCPUThrottlingRate`` for a slower CPU. The flow runs
+``--repeat`` times per profile, each time in a fresh context (cold cache,
+as on a first visit), and reports per profile:
+
+- ``modal_tti_ms``: navigation start until the booking modal's first input
+  is editable. The "Reservar ahora" button is clicked as soon as it is
+  visible and again until the modal opens, so hydration time is included.
+- ``booking_ms``: navigation start until ``POST /reservations`` answered
+  and the page settled, with participant details filled through the plan
+  steps (``--no-submit`` stops at the confirm button instead).
+- navigation timings, script bytes transferred and backend round trips.
+
+Every submitted run creates a guest account and a reservation. The
+reservation is canceled again once the run is timed, so repeats keep
+finding seats on the session. The accounts stay, so run it against a
+disposable database (``harness.snapshot``).
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.throttle                               # every profile
+    python -m harness.throttle --profiles slow-4g,3g-low-end --repeat 5
+    python -m harness.throttle --baseline tmp/harness/throttle.prev.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from playwright import async_api
+from playwright.async_api import expect
+
+from . import config
+from .api import ApiError
+from .routes import backend_path
+from .seed import DEFAULT_CLASS_ID
+from .stats import summarize
+from .steps import StepContext, participant_details, submit_booking
+from .waits import Waiter
+
+MODAL_TIMEOUT_MS = 60000
+# A click before hydration does nothing; retry after this long without a modal.
+REOPEN_AFTER_MS = 1500
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    label: str
+    device: Optional[str]  # key of playwright.devices; None keeps the desktop context
+    latency_ms: float = 0
+    download_kbps: float = 0  # 0 disables the limit
+    upload_kbps: float = 0
+    cpu_rate: float = 1
+
+    @property
+    def throttled(self) -> bool:
+        return bool(self.latency_ms or self.download_kbps or self.upload_kbps)
+
+
+# Network figures follow Lighthouse's mobile preset (slow 4G) and WebPageTest's
+# 3G; CPU rates are relative to the machine running the browser.
+PROFILES = [
+    Profile("desktop", "Desktop, unthrottled", None),
+    Profile("fast-4g", "Fast 4G, recent Android", "Pixel 7", 40, 9000, 1500, 2),
+    Profile("slow-4g", "Slow 4G, mid-range Android", "Pixel 5", 150, 1638.4, 750, 4),
+    Profile("3g-low-end", "3G, low-end Android", "Moto G4", 300, 700, 700, 6),
+]
+PROFILES_BY_NAME = {p.name: p for p in PROFILES}
+
+PAGE_SCRIPT = """
+() => {
+  const nav = performance.getEntriesByType('navigation')[0];
+  const resources = performance.getEntriesByType('resource');
+  return {
+    ttfb_ms: nav ? nav.responseStart : null,
+    dcl_ms: nav ? nav.domContentLoadedEventEnd : null,
+    load_ms: nav && nav.loadEventEnd ? nav.loadEventEnd : null,  // 0 while still loading
+    script_kb: resources.filter((r) => r.initiatorType === 'script')
+      .reduce((sum, r) => sum + r.transferSize, 0) / 1024,
+  };
+}
+"""
+
+METRICS = ("modal_tti_ms", "booking_ms", "ttfb_ms", "dcl_ms", "load_ms", "script_kb", "api_calls")
+GATED = ("modal_tti_ms", "booking_ms")
+
+
+async def apply_profile(context: async_api.BrowserContext, page: async_api.Page, profile: Profile) -> None:
+    """Throttle ``page``; CDP emulation is per target, so each new page needs it."""
+    if not profile.throttled and profile.cpu_rate == 1:
+        return
+    cdp = await context.new_cdp_session(page)
+    if profile.throttled:
+        await cdp.send("Network.enable")
+        await cdp.send("Network.emulateNetworkConditions", {
+            "offline": False,
+            "latency": profile.latency_ms,
+            # CDP wants bytes per second; -1 disables the limit.
+            "downloadThroughput": profile.download_kbps * 1024 / 8 if profile.download_kbps else -1,
+            "uploadThroughput": profile.upload_kbps * 1024 / 8 if profile.upload_kbps else -1,
+        })
+    if profile.cpu_rate != 1:
+        await cdp.send("Emulation.setCPUThrottlingRate", {"rate": profile.cpu_rate})
+
+
+class ThrottledSteps(StepContext):
+    """Step context whose page is created on a device and throttled before first use."""
+
+    def __init__(self, browser: async_api.Browser, profile: Profile, options: Dict[str, Any]) -> None:
+        super().__init__(browser, Waiter(timeout=MODAL_TIMEOUT_MS / 1000))
+        self.profile = profile
+        self.options = options
+
+    async def open(self) -> async_api.Page:
+        if self.page is None:
+            self.context = await self.browser.new_context(**self.options)
+            self.context.set_default_timeout(MODAL_TIMEOUT_MS)
+            self.waits.attach(self.context)
+            self.page = await self.context.new_page()
+            self.page.on("framenavigated", self._on_navigated)
+            await apply_profile(self.context, self.page, self.profile)
+        return self.page
+
+
+async def open_modal(page: async_api.Page) -> None:
+    reserve = page.get_by_role("button", name=re.compile(r"^Reservar ahora", re.I)).first
+    name = page.locator("#name")
+    await reserve.wait_for(state="visible", timeout=MODAL_TIMEOUT_MS)
+    deadline = time.monotonic() + MODAL_TIMEOUT_MS / 1000
+    while True:
+        await reserve.click()
+        try:
+            await name.wait_for(state="visible", timeout=REOPEN_AFTER_MS)
+            break
+        except async_api.Error:
+            if time.monotonic() > deadline:
+                raise
+    await expect(name).to_be_editable(timeout=MODAL_TIMEOUT_MS)
+
+
+async def book_once(browser: async_api.Browser, profile: Profile, options: Dict[str, Any], submit: bool) -> Dict[str, Any]:
+    ctx = ThrottledSteps(browser, profile, options)
+    try:
+        page = await ctx.open()
+        calls: List[str] = []
+
+        def count(request: async_api.Request) -> None:
+            if backend_path(request.url) is not None:
+                calls.append(request.url)
+
+        ctx.context.on("request", count)
+        started = time.perf_counter()
+        await page.goto(f"{config.FRONTEND_URL}/classes/{DEFAULT_CLASS_ID}", wait_until="commit")
+        await open_modal(page)
+        sample: Dict[str, Any] = {"modal_tti_ms": (time.perf_counter() - started) * 1000}
+        sample.update(await page.evaluate(PAGE_SCRIPT))  # before the booking leaves the page
+        await participant_details(ctx)
+        if submit:
+            await submit_booking(ctx)
+            status = ctx.data.get("reservation_status")
+            assert ctx.data.get("reservation"), f"booking failed with HTTP {status}"
+        else:
+            await expect(page.get_by_role("button", name=re.compile(r"^Confirmar Reserva"))).to_be_enabled()
+        sample["booking_ms"] = (time.perf_counter() - started) * 1000
+        sample["api_calls"] = len(calls)
+        if submit:
+            await cancel(ctx, ctx.data["reservation"])
+        return sample
+    finally:
+        await ctx.close()
+
+
+async def cancel(ctx: StepContext, reservation: Dict[str, Any]) -> None:
+    """Give the seats back (``PUT /reservations/:id`` as the guest), outside the timed part."""
+    seeder = await ctx.seeder()
+    token = reservation.get("token") or await seeder.token("admin")
+    await seeder.api.as_(token).reservations.cancel(reservation["id"])
+
+
+def regressions(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    found = []
+    for name, entry in report["profiles"].items():
+        previous = baseline.get(name, {}).get("summary", {})
+        for metric in GATED:
+            now, then = entry["summary"].get(metric, {}).get("p50"), previous.get(metric, {}).get("p50")
+            if now and then and now > then * (1 + tolerance):
+                found.append(f"{name}: {metric} p50 {now:g} regressed >{tolerance:.0%} from {then:g}")
+    return found
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    names = args.profiles.split(",") if args.profiles else [p.name for p in PROFILES]
+    unknown = [n for n in names if n not in PROFILES_BY_NAME]
+    if unknown:
+        raise SystemExit(f"unknown profile(s): {', '.join(unknown)}; choose from {', '.join(PROFILES_BY_NAME)}")
+    report: Dict[str, Any] = {"repeat": args.repeat, "submit": args.submit, "profiles": {}}
+    async with async_api.async_playwright() as pw:
+        browser = await pw.chromium.launch(args=config.BROWSER_ARGS)
+        try:
+            for name in names:
+                profile = PROFILES_BY_NAME[name]
+                options = dict(pw.devices[profile.device]) if profile.device else {}
+                samples, errors = [], []
+                for _ in range(args.repeat):
+                    try:
+                        samples.append(await book_once(browser, profile, options, args.submit))
+                    except (AssertionError, async_api.Error, ApiError) as exc:
+                        errors.append(str(exc).splitlines()[0])
+                summary = {
+                    metric: summarize([s[metric] for s in samples if s.get(metric) is not None], 1)
+                    for metric in METRICS
+                }
+                report["profiles"][name] = {
+                    "profile": asdict(profile), "summary": summary, "samples": samples, "errors": errors,
+                }
+                tti, booking = summary["modal_tti_ms"].get("p50"), summary["booking_ms"].get("p50")
+                print(f"{name:<12} modal TTI p50 {tti} ms  booking p50 {booking} ms  "
+                      f"({len(samples)}/{args.repeat} ok)  {profile.label}")
+                for error in errors:
+                    print(f"    !! {error}")
+        finally:
+            await browser.close()
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m harness.throttle", description="Booking flow timings under mobile throttling profiles."
+    )
+    parser.add_argument("--profiles", help=f"comma-separated profiles (default: all of {', '.join(PROFILES_BY_NAME)})")
+    parser.add_argument("--repeat", type=int, default=3, help="bookings per profile")
+    parser.add_argument("--no-submit", dest="submit", action="store_false",
+                        help="stop at the confirm button instead of creating a reservation")
+    parser.add_argument("--baseline", help="previous throttle report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 regression vs baseline (0.2 = 20%%)")
+    parser.add_argument("--output", default=str(config.OUTPUT_DIR / "throttle.json"))
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    baseline = {}
+    if args.baseline and Path(args.baseline).exists():
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["profiles"]
+    report["regressions"] = regressions(report, baseline, args.tolerance)
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    for problem in report["regressions"]:
+        print(f"!! {problem}")
+    failed = any(entry["errors"] for entry in report["profiles"].values())
+    return 1 if failed or report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Core Web Vitals for the pages the suite depends on.
+
+A ``PerformanceObserver`` is installed in every document before the app's
+own scripts run (``add_init_script``) and read back with ``page.evaluate``
+once the page has settled. Each page is loaded ``--repeat`` times in a
+fresh context and the median of every metric is compared with the page's
+budget; optionally also with a previous report. Any breach fails the run.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.vitals                      # desktop
+    python -m harness.vitals --mobile --repeat 5  # Pixel 5 emulation
+    python -m harness.vitals --baseline tmp/harness/vitals.prev.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from playwright import async_api
+
+from . import config
+from .auth import AuthCache
+
+OBSERVER_SCRIPT = """
+(() => {
+  if (window.__vitals) return;
+  const v = window.__vitals = { fcp: null, lcp: null, cls: 0, longTasks: [] };
+  const observe = (type, fn) => {
+    try {
+      new PerformanceObserver((list) => list.getEntries().forEach(fn)).observe({ type, buffered: true });
+    } catch (e) { /* entry type not supported */ }
+  };
+  observe('paint', (e) => { if (e.name === 'first-contentful-paint') v.fcp = e.startTime; });
+  observe('largest-contentful-paint', (e) => { v.lcp = e.renderTime || e.loadTime || e.startTime; });
+  observe('layout-shift', (e) => { if (!e.hadRecentInput) v.cls += e.value; });
+  observe('longtask', (e) => { v.longTasks.push([e.startTime, e.duration]); });
+})();
+"""
+
+READ_SCRIPT = """
+() => {
+  const v = window.__vitals || {};
+  const nav = performance.getEntriesByType('navigation')[0];
+  const fcp = v.fcp ?? 0;
+  const tbt = (v.longTasks || [])
+    .filter(([start]) => start >= fcp)
+    .reduce((sum, [, duration]) => sum + Math.max(0, duration - 50), 0);
+  return {
+    ttfb: nav ? nav.responseStart : null,
+    fcp: v.fcp,
+    lcp: v.lcp,
+    cls: v.cls,
+    tbt,
+    heap_mb: performance.memory ? performance.memory.usedJSHeapSize / 1048576 : null,
+  };
+}
+"""
+
+METRICS = ("ttfb", "fcp", "lcp", "cls", "tbt", "heap_mb")
+
+# "Good" thresholds from web.dev; dashboards get more room for LCP and heap.
+DEFAULT_BUDGET = {"ttfb": 800, "fcp": 1800, "lcp": 2500, "cls": 0.1, "tbt": 300, "heap_mb": 64}
+
+
+@dataclass
+class PageSpec:
+    name: str
+    path: str
+    role: Optional[str] = None
+    budget: Dict[str, float] = field(default_factory=dict)
+
+    def limits(self) -> Dict[str, float]:
+        return {**DEFAULT_BUDGET, **self.budget}
+
+
+PAGES = [
+    PageSpec("home", "/"),
+    PageSpec("class-detail", "/classes/3"),
+    PageSpec("dashboard-student", "/dashboard/student", role="student"),
+    PageSpec("dashboard-admin", "/dashboard/admin", role="admin", budget={"lcp": 3500, "heap_mb": 96}),
+    PageSpec("dashboard-school", "/dashboard/school", role="school_admin", budget={"lcp": 3500, "heap_mb": 96}),
+]
+
+
+async def measure(context: async_api.BrowserContext, url: str, settle_ms: int = 1000) -> Dict[str, Any]:
+    page = await context.new_page()
+    try:
+        await page.goto(url, wait_until="load", timeout=30000)
+        try:
+            await page.wait_for_load_state("networkidle", timeout=10000)
+        except async_api.Error:
+            pass
+        await page.wait_for_timeout(settle_ms)  # let late LCP candidates and shifts land
+        return await page.evaluate(READ_SCRIPT)
+    finally:
+        await page.close()
+
+
+def _median(samples: List[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    out: Dict[str, Optional[float]] = {}
+    for metric in METRICS:
+        values = [s[metric] for s in samples if s.get(metric) is not None]
+        out[metric] = round(statistics.median(values), 3) if values else None
+    return out
+
+
+def breaches(
+    spec: PageSpec,
+    measured: Dict[str, Optional[float]],
+    baseline: Optional[Dict[str, Optional[float]]],
+    tolerance: float,
+) -> List[str]:
+    found = []
+    for metric, limit in spec.limits().items():
+        value = measured.get(metric)
+        if value is None:
+            continue
+        if value > limit:
+            found.append(f"{metric} {value:g} > budget {limit:g}")
+        previous = (baseline or {}).get(metric)
+        if previous and value > previous * (1 + tolerance):
+            found.append(f"{metric} {value:g} regressed >{tolerance:.0%} from {previous:g}")
+    return found
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    baseline = {}
+    if args.baseline and Path(args.baseline).exists():
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["pages"]
+    wanted = set(args.pages.split(",")) if args.pages else None
+    report: Dict[str, Any] = {"mobile": args.mobile, "repeat": args.repeat, "pages": {}}
+    async with async_api.async_playwright() as pw:
+        browser = await pw.chromium.launch(
+            args=config.BROWSER_ARGS + ["--enable-precise-memory-info"]
+        )
+        auth = AuthCache(pw)
+        device = pw.devices["Pixel 5"] if args.mobile else {}
+        try:
+            for spec in PAGES:
+                if wanted and spec.name not in wanted:
+                    continue
+                options = dict(device)
+                if spec.role:
+                    options["storage_state"] = await auth.storage_state(spec.role)
+                samples = []
+                for _ in range(args.repeat):
+                    context = await browser.new_context(**options)
+                    await context.add_init_script(OBSERVER_SCRIPT)
+                    try:
+                        samples.append(await measure(context, config.FRONTEND_URL + spec.path))
+                    finally:
+                        await context.close()
+                measured = _median(samples)
+                problems = breaches(spec, measured, baseline.get(spec.name, {}).get("median"), args.tolerance)
+                report["pages"][spec.name] = {
+                    "path": spec.path,
+                    "budget": spec.limits(),
+                    "median": measured,
+                    "samples": samples,
+                    "breaches": problems,
+                }
+                print(f"{spec.name:<18} " + "  ".join(f"{m} {measured[m]}" for m in METRICS))
+                for problem in problems:
+                    print(f"    !! {problem}")
+        finally:
+            await browser.close()
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.vitals", description="Core Web Vitals with budgets.")
+    parser.add_argument("--pages", help="comma-separated page names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="loads per page; the median is reported")
+    parser.add_argument("--mobile", action="store_true", help="emulate a Pixel 5")
+    parser.add_argument("--baseline", help="previous vitals report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression vs baseline (0.2 = 20%%)")
+    parser.add_argument("--output", default=str(config.OUTPUT_DIR / "vitals.json"))
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    failed = [name for name, page in report["pages"].items() if page["breaches"]]
+    if failed:
+        print(f"budget exceeded on: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
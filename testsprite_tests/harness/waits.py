@@ -0,0 +1,183 @@
+"""Event-driven waits that replace the fixed sleeps in generated steps.
+
+Every wait is bounded and records how long it actually took, so the report
+shows the real latency of each UI transition instead of a flat 3 seconds.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from playwright import async_api
+from playwright.async_api import expect
+
+from .routes import RoutePattern, backend_path
+
+DEFAULT_WAIT_TIMEOUT = 5.0
+# How long the tracked routes must stay quiet before the network counts as idle.
+DEFAULT_QUIET = 0.25
+
+_EDIT_ACTIONS = {"fill", "type", "press_sequentially", "clear", "select_option", "set_input_files"}
+
+
+class WaitTimeout(AssertionError):
+    """Raised by strict waits; an AssertionError so the case reports as failed."""
+
+
+@dataclass
+class WaitRecord:
+    kind: str
+    target: str
+    waited: float
+    timed_out: bool
+
+
+class Waiter:
+    """Bounded waits for one case.
+
+    ``attach`` must be called for every context the case opens so network
+    idle checks can see its backend traffic.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_WAIT_TIMEOUT, quiet: float = DEFAULT_QUIET) -> None:
+        self.timeout = timeout
+        self.quiet = quiet
+        self.records: List[WaitRecord] = []
+        self._inflight: Dict[Any, tuple] = {}
+        self._changed = asyncio.Event()
+
+    def attach(self, context: async_api.BrowserContext) -> None:
+        context.on("request", self._on_request)
+        context.on("requestfinished", self._on_done)
+        context.on("requestfailed", self._on_done)
+
+    def _on_request(self, request: async_api.Request) -> None:
+        path = backend_path(request.url)
+        if path is not None:
+            self._inflight[request] = (request.method, path)
+            self._changed.set()
+
+    def _on_done(self, request: async_api.Request) -> None:
+        if self._inflight.pop(request, None) is not None:
+            self._changed.set()
+
+    def _busy(self, patterns: Sequence[RoutePattern]) -> bool:
+        if not patterns:
+            return bool(self._inflight)
+        return any(p.matches(m, path) for m, path in self._inflight.values() for p in patterns)
+
+    def _record(self, kind: str, target: str, started: float, timed_out: bool) -> float:
+        waited = time.perf_counter() - started
+        self.records.append(WaitRecord(kind, target, round(waited, 4), timed_out))
+        return waited
+
+    async def actionable(
+        self, locator: async_api.Locator, action: str = "click", timeout: Optional[float] = None
+    ) -> float:
+        """Wait until ``locator`` can receive ``action``.
+
+        Never raises: when the element does not become actionable in time the
+        action that follows fails with Playwright's own, more precise error.
+        """
+        timeout_ms = (timeout or self.timeout) * 1000
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            if action in _EDIT_ACTIONS:
+                await expect(locator).to_be_editable(timeout=timeout_ms)
+            else:
+                await locator.click(trial=True, timeout=timeout_ms)
+        except (AssertionError, async_api.Error):
+            timed_out = True
+        return self._record(f"actionable:{action}", str(locator), started, timed_out)
+
+    async def network_idle(
+        self,
+        *routes: str,
+        timeout: Optional[float] = None,
+        quiet: Optional[float] = None,
+        strict: bool = False,
+    ) -> float:
+        """Wait until no backend call matching ``routes`` is in flight.
+
+        ``routes`` use :class:`RoutePattern` syntax (``"/reservations*"``,
+        ``"GET /classes/:id/calendar"``); with none given, any backend call
+        counts. The network must stay quiet for ``quiet`` seconds.
+        """
+        patterns = [RoutePattern.parse(r) for r in routes]
+        quiet = self.quiet if quiet is None else quiet
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        deadline = loop.time() + (timeout or self.timeout)
+        timed_out = False
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                timed_out = self._busy(patterns)
+                break
+            busy = self._busy(patterns)
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining if busy else min(quiet, remaining))
+            except asyncio.TimeoutError:
+                timed_out = busy
+                break
+        target = ", ".join(routes) or "backend"
+        waited = self._record("network_idle", target, started, timed_out)
+        if timed_out and strict:
+            raise WaitTimeout(f"backend calls to {target} still in flight after {waited:.1f}s")
+        return waited
+
+    async def dom(
+        self,
+        page: async_api.Page,
+        expression: str,
+        arg: Any = None,
+        timeout: Optional[float] = None,
+        strict: bool = True,
+    ) -> float:
+        """Wait until the JS ``expression`` is truthy in ``page``."""
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            await page.wait_for_function(expression, arg=arg, timeout=(timeout or self.timeout) * 1000)
+        except async_api.Error:
+            timed_out = True
+        waited = self._record("dom", expression, started, timed_out)
+        if timed_out and strict:
+            raise WaitTimeout(f"condition {expression!r} not met after {waited:.1f}s")
+        return waited
+
+    async def selector(
+        self,
+        page: async_api.Page,
+        selector: str,
+        state: str = "visible",
+        timeout: Optional[float] = None,
+        strict: bool = True,
+    ) -> float:
+        """Wait until ``selector`` reaches ``state`` (attached, visible, hidden, detached)."""
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            await page.locator(selector).first.wait_for(state=state, timeout=(timeout or self.timeout) * 1000)
+        except async_api.Error:
+            timed_out = True
+        waited = self._record(f"selector:{state}", selector, started, timed_out)
+        if timed_out and strict:
+            raise WaitTimeout(f"{selector!r} not {state} after {waited:.1f}s")
+        return waited
+
+    async def settle(self, page: Any = None, timeout: Optional[float] = None) -> float:
+        """Drop-in for a fixed sleep: wait for backend quiet, at most ``timeout``."""
+        return await self.network_idle(timeout=timeout)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "count": len(self.records),
+            "total_waited": round(sum(r.waited for r in self.records), 3),
+            "timed_out": sum(r.timed_out for r in self.records),
+            "waits": [asdict(r) for r in self.records],
+        }
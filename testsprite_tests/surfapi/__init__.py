@@ -0,0 +1,22 @@
+"""Pooled async client for the clasedesurf backend API.
+
+::
+
+    async with Client(hooks=[recorder]) as api:
+        await api.login("student@surfschool.com", "password123")
+        classes = await api.classes.list(date="2025-01-10")
+"""
+from .client import DEFAULT_POOL_SIZE, ApiError, Client, Session, timing_of
+from .routers import Api
+from .timing import CallTiming, TimingRecorder
+
+__all__ = [
+    "DEFAULT_POOL_SIZE",
+    "Api",
+    "ApiError",
+    "CallTiming",
+    "Client",
+    "Session",
+    "TimingRecorder",
+    "timing_of",
+]
@@ -0,0 +1,263 @@
+"""Pooled async HTTP client for the Express backend."""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional, Sequence
+
+import httpx
+
+from .timing import CallTiming
+
+if TYPE_CHECKING:
+    from .routers import Api
+
+DEFAULT_BASE_URL = os.environ.get("BACKEND_URL", "http://localhost:4000").rstrip("/")
+DEFAULT_POOL_SIZE = 32
+TIMING_KEY = "surfapi.timing"
+
+Hook = Callable[[CallTiming], None]
+
+
+class ApiError(RuntimeError):
+    def __init__(self, method: str, path: str, status: int, body: Any) -> None:
+        self.method = method
+        self.path = path
+        self.status = status
+        self.body = body
+        message = body.get("message") if isinstance(body, dict) else body
+        super().__init__(f"{method} {path} -> {status}: {message}")
+
+    @property
+    def code(self) -> Optional[str]:
+        return self.body.get("code") if isinstance(self.body, dict) else None
+
+
+@dataclass(eq=False)
+class Session:
+    """An access token and, when the backend issued one, the refresh token that renews it."""
+
+    token: str
+    refresh_token: Optional[str] = None
+    refreshes: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+
+def timing_of(response: httpx.Response) -> CallTiming:
+    """The :class:`CallTiming` of a response returned by :meth:`Client.send`."""
+    return response.extensions[TIMING_KEY]
+
+
+class Client:
+    """Keep-alive connection pool shared by every call; ``async with Client() as api: ...``.
+
+    At most ``max_in_flight`` calls (default: ``pool_size``) are on the
+    wire at once, one per connection: HTTP/1.1 cannot multiplex, so a call
+    beyond that would wait inside httpx for a connection and the wait
+    would count as server time. Here it waits for a slot first and is
+    reported as ``queued_ms``.
+
+    Tokens are passed per call (``token=``, ``""`` for an anonymous call)
+    or set on the client. Tokens from :meth:`login` and :meth:`refresh` are
+    remembered as :class:`Session` objects: a call made with any token the
+    session ever had goes out with its current one, and a ``401
+    TOKEN_EXPIRED`` triggers one ``POST /auth/refresh`` and a retry. The
+    client never stores cookies, so several identities can share it.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        token: Optional[str] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = 30.0,
+        max_in_flight: Optional[int] = None,
+        hooks: Sequence[Hook] = (),
+        keepalive_expiry: float = 30.0,
+    ) -> None:
+        self.token = token
+        self.hooks = list(hooks)
+        self._slots = asyncio.Semaphore(max_in_flight or pool_size)
+        self._sessions: Dict[str, Session] = {}
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=keepalive_expiry
+            ),
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+        )
+
+    async def __aenter__(self) -> "Client":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    # -- typed routers ------------------------------------------------------
+
+    @property
+    def api(self) -> "Api":
+        """Routers calling with the client's own token."""
+        from .routers import Api
+
+        return Api(self)
+
+    def as_(self, token: Optional[str]) -> "Api":
+        """Routers calling with ``token`` (``""`` for anonymous calls)."""
+        from .routers import Api
+
+        return Api(self, token)
+
+    def __getattr__(self, name: str) -> Any:
+        # client.classes.list() == client.api.classes.list()
+        from .routers import ROUTERS
+
+        if name in ROUTERS:
+            return getattr(self.api, name)
+        raise AttributeError(name)
+
+    # -- sessions -----------------------------------------------------------
+
+    def session(self, token: str, refresh_token: Optional[str] = None) -> Session:
+        """Remember ``token`` (and how to refresh it); returns its session."""
+        current = self._sessions.get(token)
+        if current is None:
+            current = self._sessions[token] = Session(token, refresh_token)
+        elif refresh_token:
+            current.refresh_token = refresh_token
+        return current
+
+    async def login(self, email: str, password: str) -> Dict[str, Any]:
+        """``POST /auth/login``; returns ``{user, token, refreshToken}`` and keeps the session."""
+        body = await self.request(
+            "POST", "/auth/login", json={"email": email, "password": password}, token="", route="/auth/login"
+        )
+        self.session(body["token"], body.get("refreshToken"))
+        return body
+
+    async def refresh(self, session: Session) -> Session:
+        """Exchange the session's refresh token for a new pair (``POST /auth/refresh``)."""
+        if not session.refresh_token:
+            raise ApiError("POST", "/auth/refresh", 401, {"message": "session has no refresh token"})
+        response = await self._send_once("POST", "/auth/refresh", {"refreshToken": session.refresh_token}, None, None)
+        body = _decode(response)
+        if response.status_code != 200:
+            raise ApiError("POST", "/auth/refresh", response.status_code, body)
+        session.token = body["token"]
+        session.refresh_token = body.get("refreshToken") or session.refresh_token
+        session.refreshes += 1
+        self._sessions[session.token] = session
+        return session
+
+    async def _renew(self, session: Session, stale: str) -> None:
+        async with session.lock:
+            if session.token == stale:  # nobody else refreshed it while we waited
+                await self.refresh(session)
+
+    # -- calls --------------------------------------------------------------
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        json: Any = None,
+        params: Optional[Dict[str, Any]] = None,
+        token: Optional[str] = None,
+        expected: Iterable[int] = (200, 201),
+        route: Optional[str] = None,
+    ) -> Any:
+        """Send one call and decode its JSON body.
+
+        ``token`` overrides the client token for this call; pass ``""`` to
+        send it anonymously. Unexpected statuses raise :class:`ApiError`.
+        """
+        response = await self.send(method, path, json=json, params=params, token=token, route=route)
+        body = _decode(response)
+        if response.status_code not in expected:
+            raise ApiError(method, path, response.status_code, body)
+        return body
+
+    async def send(
+        self,
+        method: str,
+        path: str,
+        json: Any = None,
+        params: Optional[Dict[str, Any]] = None,
+        token: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> httpx.Response:
+        """The raw response, with its :class:`CallTiming` available through :func:`timing_of`."""
+        bearer = self.token if token is None else token
+        session = self._sessions.get(bearer) if bearer else None
+        queued = time.perf_counter()
+        async with self._slots:
+            started = time.perf_counter()
+            refreshed = False
+            try:
+                sent_with = session.token if session is not None else bearer
+                response = await self._send_once(method, path, json, params, sent_with)
+                if session is not None and session.refresh_token and _expired(response):
+                    await self._renew(session, stale=sent_with)
+                    response = await self._send_once(method, path, json, params, session.token)
+                    refreshed = True
+            except httpx.HTTPError as exc:
+                self._report(CallTiming(
+                    method, route or path, path, None, _ms(started - queued), _ms(time.perf_counter() - started),
+                    0, 0, refreshed, type(exc).__name__,
+                ))
+                raise
+            ended = time.perf_counter()
+        timing = CallTiming(
+            method, route or path, path, response.status_code, _ms(started - queued), _ms(ended - started),
+            len(response.request.content), len(response.content), refreshed,
+        )
+        response.extensions[TIMING_KEY] = timing
+        self._report(timing)
+        return response
+
+    async def _send_once(
+        self, method: str, path: str, json: Any, params: Optional[Dict[str, Any]], bearer: Optional[str]
+    ) -> httpx.Response:
+        headers = {"Authorization": f"Bearer {bearer}"} if bearer else {}
+        return await self._client.request(method, path, json=json, params=params, headers=headers)
+
+    def _report(self, timing: CallTiming) -> None:
+        for hook in self.hooks:
+            hook(timing)
+
+    async def get(self, path: str, **kwargs: Any) -> Any:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, json: Any = None, **kwargs: Any) -> Any:
+        return await self.request("POST", path, json=json, **kwargs)
+
+    async def put(self, path: str, json: Any = None, **kwargs: Any) -> Any:
+        return await self.request("PUT", path, json=json, **kwargs)
+
+    async def delete(self, path: str, **kwargs: Any) -> Any:
+        return await self.request("DELETE", path, **kwargs)
+
+
+def _decode(response: httpx.Response) -> Any:
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+def _expired(response: httpx.Response) -> bool:
+    if response.status_code != 401:
+        return False
+    body = _decode(response)
+    return isinstance(body, dict) and body.get("code") == "TOKEN_EXPIRED"
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
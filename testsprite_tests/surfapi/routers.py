@@ -0,0 +1,462 @@
+"""Typed wrappers for the routers ``backend/src/server.ts`` mounts.
+
+One class per router, one method per handler, named after what the
+handler does. Path parameters are positional, bodies are plain dicts in
+the shape the backend's zod schemas expect, and query strings are keyword
+arguments. Every call reports its route template (``/classes/:id``) to
+the client's timing hooks.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, TypedDict, Union
+
+if TYPE_CHECKING:
+    from .client import Client
+
+Json = Dict[str, Any]
+Id = Union[int, str]
+
+
+class User(TypedDict, total=False):
+    id: int
+    email: str
+    name: str
+    role: str
+    schoolId: Optional[int]
+
+
+class LoginResult(TypedDict):
+    user: User
+    token: str
+    refreshToken: str
+
+
+class Reservation(TypedDict, total=False):
+    id: int
+    userId: int
+    classId: int
+    status: str
+    date: str
+    time: str
+    payment: Json
+    # Guest checkout only: the new account's access token.
+    token: Optional[str]
+    isNewUser: bool
+
+
+class Router:
+    prefix = ""
+
+    def __init__(self, client: "Client", token: Optional[str] = None) -> None:
+        self._client = client
+        self._token = token
+
+    async def _call(
+        self, method: str, template: str, *ids: Id, json: Any = None, params: Optional[Json] = None, **kwargs: Any
+    ) -> Any:
+        route = self.prefix + template if template != "/" else self.prefix
+        path = route
+        for value in ids:
+            head, _, tail = path.partition(":")
+            name_end = next((i for i, c in enumerate(tail) if c == "/"), len(tail))
+            path = f"{head}{value}{tail[name_end:]}"
+        if params:
+            params = {k: v for k, v in params.items() if v is not None}
+        kwargs.setdefault("token", self._token)
+        return await self._client.request(method, path, json=json, params=params or None, route=route, **kwargs)
+
+
+class Auth(Router):
+    prefix = "/auth"
+
+    async def register(self, body: Json) -> LoginResult:
+        return await self._call("POST", "/register", json=body, token="")
+
+    async def login(self, email: str, password: str) -> LoginResult:
+        """Also remembers the session, so expired tokens are refreshed on later calls."""
+        return await self._client.login(email, password)
+
+    async def refresh(self, refresh_token: str) -> Json:
+        return await self._call("POST", "/refresh", json={"refreshToken": refresh_token}, token="")
+
+    async def logout(self) -> Json:
+        return await self._call("POST", "/logout")
+
+    async def google(self, body: Json) -> LoginResult:
+        return await self._call("POST", "/google", json=body, token="")
+
+    async def register_school(self, body: Json) -> Json:
+        return await self._call("POST", "/register-school", json=body, token="")
+
+
+class Classes(Router):
+    prefix = "/classes"
+
+    async def list(self, **params: Any) -> List[Json]:
+        return await self._call("GET", "/", params=params)
+
+    async def get(self, class_id: Id) -> Json:
+        return await self._call("GET", "/:id", class_id)
+
+    async def calendar(self, class_id: Id, **params: Any) -> Json:
+        return await self._call("GET", "/:id/calendar", class_id, params=params)
+
+    async def calendar_all(self, **params: Any) -> Any:
+        return await self._call("GET", "/calendar/all", params=params)
+
+    async def create(self, body: Json) -> Json:
+        return await self._call("POST", "/", json=body)
+
+    async def create_bulk(self, body: Json) -> Json:
+        return await self._call("POST", "/bulk", json=body)
+
+    async def create_bulk_sessions(self, body: Json) -> Json:
+        return await self._call("POST", "/bulk-sessions", json=body)
+
+    async def update(self, class_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id", class_id, json=body)
+
+    async def restore(self, class_id: Id) -> Json:
+        return await self._call("POST", "/:id/restore", class_id)
+
+    async def delete(self, class_id: Id) -> Json:
+        return await self._call("DELETE", "/:id", class_id)
+
+    async def add_sessions(self, class_id: Id, body: Json) -> Json:
+        return await self._call("POST", "/:id/sessions", class_id, json=body)
+
+    async def set_instructor_status(self, class_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id/instructor-status", class_id, json=body)
+
+
+class Users(Router):
+    prefix = "/users"
+
+    async def profile(self) -> User:
+        return await self._call("GET", "/profile")
+
+    async def update_profile(self, body: Json) -> User:
+        return await self._call("PUT", "/profile", json=body)
+
+    async def list(self, **params: Any) -> List[User]:
+        return await self._call("GET", "/", params=params)
+
+    async def get(self, user_id: Id) -> User:
+        return await self._call("GET", "/:id", user_id)
+
+
+class Reservations(Router):
+    prefix = "/reservations"
+
+    async def create(self, body: Json) -> Reservation:
+        """Checkout; without a token it is a guest checkout and the reply carries the new account's ``token``."""
+        return await self._call("POST", "/", json=body)
+
+    async def list(self, **params: Any) -> List[Reservation]:
+        return await self._call("GET", "/", params=params)
+
+    async def list_all(self, **params: Any) -> List[Reservation]:
+        return await self._call("GET", "/all", params=params)
+
+    async def get(self, reservation_id: Id) -> Reservation:
+        return await self._call("GET", "/:id", reservation_id)
+
+    async def update(self, reservation_id: Id, body: Json) -> Reservation:
+        return await self._call("PUT", "/:id", reservation_id, json=body)
+
+    async def cancel(self, reservation_id: Id) -> Reservation:
+        return await self.update(reservation_id, {"status": "CANCELED"})
+
+    async def delete(self, reservation_id: Id) -> Json:
+        return await self._call("DELETE", "/:id", reservation_id)
+
+
+class Payments(Router):
+    prefix = "/payments"
+
+    async def create(self, body: Json) -> Json:
+        return await self._call("POST", "/", json=body)
+
+    async def list(self, **params: Any) -> List[Json]:
+        return await self._call("GET", "/", params=params)
+
+    async def get(self, payment_id: Id) -> Json:
+        return await self._call("GET", "/:id", payment_id)
+
+    async def update(self, payment_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id", payment_id, json=body)
+
+    async def delete(self, payment_id: Id) -> Json:
+        return await self._call("DELETE", "/:id", payment_id)
+
+    async def create_intent(self, body: Json) -> Json:
+        return await self._call("POST", "/create-intent", json=body)
+
+    async def providers(self) -> List[Json]:
+        return await self._call("GET", "/providers")
+
+    async def webhook(self, provider: str, body: Json) -> Json:
+        return await self._call("POST", "/webhook/:provider", provider, json=body, token="")
+
+
+class Schools(Router):
+    prefix = "/schools"
+
+    async def list(self, **params: Any) -> List[Json]:
+        return await self._call("GET", "/", params=params)
+
+    async def featured_reviews(self) -> List[Json]:
+        return await self._call("GET", "/reviews/featured")
+
+    async def mine(self) -> Json:
+        return await self._call("GET", "/my-school")
+
+    async def get(self, school_id: Id) -> Json:
+        return await self._call("GET", "/:id", school_id)
+
+    async def classes(self, school_id: Id, **params: Any) -> List[Json]:
+        return await self._call("GET", "/:id/classes", school_id, params=params)
+
+    async def reviews(self, school_id: Id) -> List[Json]:
+        return await self._call("GET", "/:id/reviews", school_id)
+
+    async def set_status(self, school_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id/status", school_id, json=body)
+
+    async def create(self, body: Json) -> Json:
+        return await self._call("POST", "/", json=body)
+
+    async def update(self, school_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id", school_id, json=body)
+
+
+class Instructors(Router):
+    prefix = "/instructors"
+
+    async def create_with_user(self, body: Json) -> Json:
+        return await self._call("POST", "/create-with-user", json=body)
+
+    async def list(self, **params: Any) -> List[Json]:
+        return await self._call("GET", "/", params=params)
+
+    async def get(self, instructor_id: Id) -> Json:
+        return await self._call("GET", "/:id", instructor_id)
+
+    async def create(self, body: Json) -> Json:
+        return await self._call("POST", "/", json=body)
+
+    async def update(self, instructor_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id", instructor_id, json=body)
+
+    async def delete(self, instructor_id: Id) -> Json:
+        return await self._call("DELETE", "/:id", instructor_id)
+
+    async def classes(self, instructor_id: Id) -> List[Json]:
+        return await self._call("GET", "/:id/classes", instructor_id)
+
+    async def review(self, instructor_id: Id, body: Json) -> Json:
+        return await self._call("POST", "/:id/reviews", instructor_id, json=body)
+
+
+class Instructor(Router):
+    """The signed-in instructor's own views (``instructor-classes.ts``)."""
+
+    prefix = "/instructor"
+
+    async def classes(self) -> List[Json]:
+        return await self._call("GET", "/classes")
+
+    async def profile(self) -> Json:
+        return await self._call("GET", "/profile")
+
+    async def students(self) -> List[Json]:
+        return await self._call("GET", "/students")
+
+    async def earnings(self) -> Json:
+        return await self._call("GET", "/earnings")
+
+
+class Students(Router):
+    prefix = "/students"
+
+    async def list(self, **params: Any) -> List[Json]:
+        return await self._call("GET", "/", params=params)
+
+    async def get(self, student_id: Id) -> Json:
+        return await self._call("GET", "/:id", student_id)
+
+    async def create_with_user(self, body: Json) -> Json:
+        return await self._call("POST", "/create-with-user", json=body)
+
+    async def create(self, body: Json) -> Json:
+        return await self._call("POST", "/", json=body)
+
+    async def update(self, student_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id", student_id, json=body)
+
+    async def delete(self, student_id: Id) -> Json:
+        return await self._call("DELETE", "/:id", student_id)
+
+
+class Stats(Router):
+    prefix = "/stats"
+
+    async def dashboard(self, **params: Any) -> Json:
+        return await self._call("GET", "/dashboard", params=params)
+
+
+class Beaches(Router):
+    prefix = "/beaches"
+
+    async def list(self, **params: Any) -> List[Json]:
+        return await self._call("GET", "/", params=params)
+
+    async def get(self, beach_id: Id) -> Json:
+        return await self._call("GET", "/:id", beach_id)
+
+    async def create(self, body: Json) -> Json:
+        return await self._call("POST", "/", json=body)
+
+    async def update(self, beach_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id", beach_id, json=body)
+
+    async def delete(self, beach_id: Id) -> Json:
+        return await self._call("DELETE", "/:id", beach_id)
+
+    async def set_conditions(self, beach_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id/conditions", beach_id, json=body)
+
+
+class Notes(Router):
+    prefix = "/notes"
+
+    async def list(self, **params: Any) -> List[Json]:
+        return await self._call("GET", "/", params=params)
+
+    async def create(self, body: Json) -> Json:
+        return await self._call("POST", "/", json=body)
+
+    async def update(self, note_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id", note_id, json=body)
+
+    async def delete(self, note_id: Id) -> Json:
+        return await self._call("DELETE", "/:id", note_id)
+
+
+class DiscountCodes(Router):
+    prefix = "/discount-codes"
+
+    async def list(self, **params: Any) -> List[Json]:
+        return await self._call("GET", "/", params=params)
+
+    async def get(self, code_id: Id) -> Json:
+        return await self._call("GET", "/:id", code_id)
+
+    async def create(self, body: Json) -> Json:
+        return await self._call("POST", "/", json=body)
+
+    async def update(self, code_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id", code_id, json=body)
+
+    async def delete(self, code_id: Id) -> Json:
+        return await self._call("DELETE", "/:id", code_id)
+
+    async def validate(self, body: Json) -> Json:
+        return await self._call("POST", "/validate", json=body)
+
+
+class Images(Router):
+    prefix = "/images"
+
+    async def library(self, **params: Any) -> Any:
+        return await self._call("GET", "/library", params=params)
+
+
+class Notifications(Router):
+    prefix = "/notifications"
+
+    async def list(self, limit: int = 20, offset: int = 0) -> List[Json]:
+        return await self._call("GET", "/", params={"limit": limit, "offset": offset})
+
+    async def list_all(self, limit: int = 50, offset: int = 0) -> List[Json]:
+        return await self._call("GET", "/all", params={"limit": limit, "offset": offset})
+
+    async def unread_count(self) -> Json:
+        return await self._call("GET", "/unread-count")
+
+    async def get(self, notification_id: Id) -> Json:
+        return await self._call("GET", "/:id", notification_id)
+
+    async def mark_read(self, notification_id: Id) -> Json:
+        return await self._call("PUT", "/:id/read", notification_id)
+
+    async def test_email(self, body: Json) -> Json:
+        return await self._call("POST", "/test-email", json=body)
+
+
+class Products(Router):
+    prefix = "/products"
+
+    async def public(self, **params: Any) -> List[Json]:
+        return await self._call("GET", "/public", params=params)
+
+    async def list(self, **params: Any) -> List[Json]:
+        return await self._call("GET", "/", params=params)
+
+    async def for_school(self, school_id: Id) -> List[Json]:
+        return await self._call("GET", "/school/:schoolId", school_id)
+
+    async def create(self, body: Json) -> Json:
+        return await self._call("POST", "/", json=body)
+
+    async def update(self, product_id: Id, body: Json) -> Json:
+        return await self._call("PUT", "/:id", product_id, json=body)
+
+    async def delete(self, product_id: Id) -> Json:
+        return await self._call("DELETE", "/:id", product_id)
+
+
+# Multipart uploads (/images/upload, /upload) are left to Client.send.
+ROUTERS = {
+    "auth": Auth,
+    "classes": Classes,
+    "users": Users,
+    "reservations": Reservations,
+    "payments": Payments,
+    "schools": Schools,
+    "instructors": Instructors,
+    "instructor": Instructor,
+    "students": Students,
+    "stats": Stats,
+    "beaches": Beaches,
+    "notes": Notes,
+    "discount_codes": DiscountCodes,
+    "images": Images,
+    "notifications": Notifications,
+    "products": Products,
+}
+
+
+class Api:
+    """Every router, bound to one client and token."""
+
+    auth: Auth
+    classes: Classes
+    users: Users
+    reservations: Reservations
+    payments: Payments
+    schools: Schools
+    instructors: Instructors
+    instructor: Instructor
+    students: Students
+    stats: Stats
+    beaches: Beaches
+    notes: Notes
+    discount_codes: DiscountCodes
+    images: Images
+    notifications: Notifications
+    products: Products
+
+    def __init__(self, client: "Client", token: Optional[str] = None) -> None:
+        for name, router in ROUTERS.items():
+            setattr(self, name, router(client, token))
@@ -0,0 +1,67 @@
+"""Per-call timings reported by :class:`surfapi.Client` to its hooks."""
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+
+@dataclass
+class CallTiming:
+    """One call as the client saw it.
+
+    ``queued_ms`` is time spent waiting for a free slot in the client;
+    ``elapsed_ms`` starts once the request is handed to a connection and
+    ends with the last byte of the response, so it is the part of the call
+    the server and the network are responsible for. A call that hit
+    ``TOKEN_EXPIRED`` is retried once after a refresh; ``refreshed`` is set
+    and ``elapsed_ms`` covers all three round trips.
+    """
+
+    method: str
+    route: str  # route template when called through a router, else the path
+    path: str
+    status: Optional[int]
+    queued_ms: float
+    elapsed_ms: float
+    request_bytes: int
+    response_bytes: int
+    refreshed: bool = False
+    error: Optional[str] = None
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    return ordered[max(1, math.ceil(q / 100 * len(ordered))) - 1]
+
+
+class TimingRecorder:
+    """A hook that keeps every timing; ``Client(hooks=[recorder])``."""
+
+    def __init__(self) -> None:
+        self.calls: List[CallTiming] = []
+
+    def __call__(self, timing: CallTiming) -> None:
+        self.calls.append(timing)
+
+    def clear(self) -> None:
+        self.calls.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, errors and elapsed p50/p95/p99 (plus queued p95) per ``METHOD route``."""
+        groups: Dict[str, List[CallTiming]] = defaultdict(list)
+        for call in self.calls:
+            groups[f"{call.method} {call.route}"].append(call)
+        out = {}
+        for key, calls in sorted(groups.items()):
+            elapsed = sorted(c.elapsed_ms for c in calls)
+            queued = sorted(c.queued_ms for c in calls)
+            out[key] = {
+                "count": len(calls),
+                "errors": sum(c.status is None or c.status >= 400 for c in calls),
+                "p50": round(_percentile(elapsed, 50), 2),
+                "p95": round(_percentile(elapsed, 95), 2),
+                "p99": round(_percentile(elapsed, 99), 2),
+                "queued_p95": round(_percentile(queued, 95), 2),
+            }
+        return out